@@ -0,0 +1,192 @@
+"""
+Servo calibration. Each servo has a table of measured angles and the PCA9685
+tick counts that drive it there. Angles in between are linearly interpolated
+and angles beyond the table are clamped to its ends so that a servo is never
+driven past the range it was measured over. Servos without a table use the
+nominal linear mapping.
+
+Tables are kept in a JSON file that maps channel numbers to a table eg.
+
+    {
+        "0": {"angles": [0, 90, 180], "ticks": [112, 307, 496]},
+        "3": {"angles": [60, 95], "ticks": [270, 322]}
+    }
+
+Whole sequences of angles eg. a planned trajectory are converted with a single
+numpy call while single angles are converted without numpy since the cost of
+the call would outweigh the work for a few joints.
+"""
+import bisect
+import json
+import logging
+import os
+
+import numpy as np
+
+_LOGGER = logging.getLogger("CALIBRATION")
+
+# the file that calibration tables are loaded from by default
+DEFAULT_PATH = os.path.join(
+    os.path.expanduser("~"), ".legobot", "servo-calibration.json")
+# PCA9685 ticks per pwm period
+RESOLUTION = 4096
+
+
+class ServoCalibration:
+    """
+    A table of measured angles and the ticks that drive a servo to them.
+
+    Args:
+        angles (sequence): the measured angles in degrees in increasing order
+        ticks (sequence): the tick count for each angle
+
+    Raises:
+        ValueError: if there are fewer than two points, the sequences differ
+            in length, the angles do not increase or a tick count is out of
+            range
+    """
+    def __init__(self, angles, ticks):
+        angles = [float(angle) for angle in angles]
+        ticks = [float(tick) for tick in ticks]
+        if len(angles) < 2 or len(angles) != len(ticks):
+            raise ValueError(
+                "A calibration needs at least two angles, each with a tick "
+                "count")
+        if any(low >= high for low, high in zip(angles, angles[1:])):
+            raise ValueError("Calibrated angles must increase")
+        if not all(0.0 < tick <= RESOLUTION for tick in ticks):
+            raise ValueError(
+                "Calibrated ticks must be between 0 and %d" % RESOLUTION)
+        self._angles = angles
+        self._ticks = ticks
+        self._angle_array = np.array(angles)
+        self._tick_array = np.array(ticks)
+
+    @classmethod
+    def linear(cls, min_angle, min_duty_cycle, max_angle, max_duty_cycle):
+        """
+        A calibration that maps angles linearly onto duty cycles
+
+        Args:
+            min_angle (float): the lowest angle in degrees
+            min_duty_cycle (float): the duty cycle at the lowest angle
+            max_angle (float): the highest angle in degrees
+            max_duty_cycle (float): the duty cycle at the highest angle
+
+        Returns:
+            ServoCalibration: the calibration
+        """
+        return cls(
+            (min_angle, max_angle),
+            (min_duty_cycle * RESOLUTION, max_duty_cycle * RESOLUTION))
+
+    @property
+    def limits(self):
+        """
+        The range of angles that the servo may be driven over
+
+        Returns:
+            tuple: the lowest and highest angles in degrees
+        """
+        return self._angles[0], self._angles[-1]
+
+    def clamp(self, angle):
+        """
+        Limit an angle to the calibrated range
+
+        Args:
+            angle (float): the angle in degrees
+
+        Returns:
+            float: the nearest angle within the calibrated range
+        """
+        return min(max(angle, self._angles[0]), self._angles[-1])
+
+    def duty_cycle(self, angle):
+        """
+        The duty cycle that drives the servo to an angle
+
+        Args:
+            angle (float): the angle in degrees. It is clamped to the
+                calibrated range.
+
+        Returns:
+            float: the duty cycle between 0 and 1
+        """
+        angles = self._angles
+        index = bisect.bisect_right(angles, angle)
+        if index == 0:
+            return self._ticks[0] / RESOLUTION
+        if index == len(angles):
+            return self._ticks[-1] / RESOLUTION
+        low, high = angles[index - 1], angles[index]
+        low_ticks, high_ticks = self._ticks[index - 1], self._ticks[index]
+        ticks = low_ticks + (high_ticks - low_ticks) * (angle - low) \
+            / (high - low)
+        return ticks / RESOLUTION
+
+    def duty_cycles(self, angles):
+        """
+        The duty cycles that drive the servo to each of a sequence of angles
+
+        Args:
+            angles (array_like): the angles in degrees. They are clamped to
+                the calibrated range.
+
+        Returns:
+            numpy.ndarray: the duty cycles between 0 and 1
+        """
+        return np.interp(
+            angles, self._angle_array, self._tick_array) / RESOLUTION
+
+    def to_dict(self):
+        """
+        The table in the form that it is stored in a calibration file
+
+        Returns:
+            dict: the angles and ticks
+        """
+        return {"angles": list(self._angles), "ticks": list(self._ticks)}
+
+
+def load(path=DEFAULT_PATH):
+    """
+    Load calibration tables from a file
+
+    Args:
+        path (str): the file
+
+    Returns:
+        dict: maps each calibrated channel number to its `ServoCalibration`
+
+    Raises:
+        ValueError: if the file does not contain valid tables
+    """
+    with open(path) as stream:
+        tables = json.load(stream)
+    result = {
+        int(channel): ServoCalibration(table["angles"], table["ticks"])
+        for channel, table in tables.items()
+    }
+    _LOGGER.info(
+        "Loaded calibration for channels %s from %s", sorted(result), path)
+    return result
+
+
+def save(calibrations, path=DEFAULT_PATH):
+    """
+    Save calibration tables to a file
+
+    Args:
+        calibrations (dict): maps channel numbers to `ServoCalibration`s
+        path (str): the file. It is overwritten if it exists.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w") as stream:
+        json.dump(
+            {str(channel): calibration.to_dict()
+             for channel, calibration in sorted(calibrations.items())},
+            stream, indent=2)
+        stream.write("\n")
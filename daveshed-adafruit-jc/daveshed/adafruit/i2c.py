@@ -11,11 +11,64 @@ import logging
 
 import pyftdi.i2c
 
-_CONTROLLER = pyftdi.i2c.I2cController()
-_CONTROLLER.configure('ftdi:///1')
+from daveshed.legobot import instrumentation
+from daveshed.legobot import metrics
+
+_FTDI_URL = 'ftdi:///1'
+_CONTROLLER = None
 _LOGGER = logging.getLogger("I2C")
 
 
+class Statistics:
+    """Counts the transactions made by all devices so that the load on the
+    bus may be monitored."""
+    def __init__(self):
+        self.transactions = 0
+        self.bytes_written = 0
+        self.bytes_read = 0
+
+    def count(self, written=0, read=0):
+        """Count a transaction."""
+        self.transactions += 1
+        self.bytes_written += written
+        self.bytes_read += read
+
+
+STATISTICS = Statistics()
+metrics.DEFAULT_REGISTRY.counter(
+    "legobot_i2c_transactions_total",
+    "I2C transactions made by all devices",
+    function=lambda: STATISTICS.transactions)
+metrics.DEFAULT_REGISTRY.counter(
+    "legobot_i2c_bytes_written_total",
+    "Data bytes written to I2C devices",
+    function=lambda: STATISTICS.bytes_written)
+metrics.DEFAULT_REGISTRY.counter(
+    "legobot_i2c_bytes_read_total",
+    "Data bytes read from I2C devices",
+    function=lambda: STATISTICS.bytes_read)
+
+
+def set_controller(controller):
+    """Use another I2C controller eg. a simulation (see
+    daveshed.adafruit.simulation) in place of the FTDI controller. It must
+    provide get_port(address) returning ports with the pyftdi I2cPort
+    interface. Devices that have already been created keep their ports."""
+    global _CONTROLLER
+    _CONTROLLER = controller
+
+
+def get_controller():
+    """Return the I2C controller, opening the FTDI controller the first time it
+    is needed so that importing this module does not require the hardware."""
+    global _CONTROLLER
+    if _CONTROLLER is None:
+        controller = pyftdi.i2c.I2cController()
+        controller.configure(_FTDI_URL)
+        _CONTROLLER = controller
+    return _CONTROLLER
+
+
 def reverseByteOrder(data):
     """Reverses the byte order of an int (16-bit) or long (32-bit) value."""
     # Courtesy Vishal Sapre
@@ -29,12 +82,14 @@ def reverseByteOrder(data):
 def get_default_bus():
     raise NotImplementedError
 
-def get_i2c_device(address, busnum=None, i2c_interface=None, **kwargs):
+def get_i2c_device(address, busnum=None, i2c_interface=None,
+                   shadow_registers=(), **kwargs):
     """Return an I2C device for the specified address and on the specified
     bus. If busnum isn't specified, the default I2C bus for the platform
-    will attempt to be detected.
+    will attempt to be detected. Registers listed in shadow_registers are
+    cached by the device (see Device).
     """
-    return Device(_CONTROLLER.get_port(address))
+    return Device(get_controller().get_port(address), shadow_registers)
 
 def require_repeated_start():
     """Enable repeated start conditions for I2C register reads.  This is the
@@ -49,43 +104,111 @@ class Device:
     """Class for communicating with an I2C device using the adafruit-pureio
     pure python smbus library, or other smbus compatible I2C interface.
     Allows reading and writing 8-bit, 16-bit, and byte array values to
-    registers on the device."""
-    def __init__(self, port):
+    registers on the device.
+
+    Registers whose contents only ever change when written by the host may be
+    listed in shadow_registers. The last value written to each is kept in a
+    write-through shadow so that writes that would not change a register are
+    skipped and reads are answered without a bus transaction. Writing any
+    other register clears the shadow since it may alias shadowed registers eg.
+    the PCA9685 ALL_LED registers."""
+    def __init__(self, port, shadow_registers=()):
         self._port = port
+        self._shadow_registers = frozenset(shadow_registers)
+        self._shadow = {}
         _LOGGER.info("Created an i2c device on %r", port)
 
+    def invalidate_shadow(self):
+        """Forget all shadowed register values so that they are next read from
+        and written to the device."""
+        self._shadow.clear()
+
+    def _write_block(self, register, data):
+        """Write data from the specified register skipping any leading or
+        trailing bytes that the shadow shows are already set. Returns the
+        number of bytes written."""
+        registers = range(register, register + len(data))
+        if not self._shadow_registers.issuperset(registers):
+            with instrumentation.timed(instrumentation.I2C_WRITE):
+                self._port.write_to(register, data)
+            STATISTICS.count(written=len(data))
+            self._shadow.clear()
+            return len(data)
+        changed = [
+            idx for idx, reg in enumerate(registers)
+            if self._shadow.get(reg) != data[idx]
+        ]
+        if not changed:
+            return 0
+        start, stop = changed[0], changed[-1] + 1
+        with instrumentation.timed(instrumentation.I2C_WRITE):
+            self._port.write_to(register + start, data[start:stop])
+        STATISTICS.count(written=stop - start)
+        self._shadow.update(zip(registers, data))
+        return stop - start
+
+    def _read_block(self, register, length):
+        """Read data from the specified register, answered from the shadow if
+        every register is known."""
+        try:
+            return bytes(
+                self._shadow[reg]
+                for reg in range(register, register + length))
+        except KeyError:
+            STATISTICS.count(read=length)
+            return self._port.read_from(register, length)
+
     def writeRaw8(self, value):
         """Write an 8-bit value on the bus (without register)."""
-        raise NotImplementedError
+        value = value & 0xFF
+        self._port.write(value.to_bytes(length=1, byteorder='big'))
+        STATISTICS.count(written=1)
+        _LOGGER.debug("Wrote 0x%02X", value)
 
     def write8(self, register, value):
         """Write an 8-bit value to the specified register."""
         value = value & 0xFF
-        self._port.write_to(
-            register, value.to_bytes(length=1, byteorder='big'))
+        if not self._write_block(
+                register, value.to_bytes(length=1, byteorder='big')):
+            return
         _LOGGER.debug("Wrote 0x%02X to register 0x%02X",
             value, register)
 
     def write16(self, register, value):
         """Write a 16-bit value to the specified register."""
-        raise NotImplementedError
+        value = value & 0xFFFF
+        if not self._write_block(
+                register, value.to_bytes(length=2, byteorder='little')):
+            return
+        _LOGGER.debug("Wrote 0x%04X to register 0x%02X, 0x%02X",
+            value, register, register + 1)
 
     def writeList(self, register, data):
         """Write bytes to the specified register."""
-        raise NotImplementedError
+        written = self._write_block(register, bytes(data))
+        if not written:
+            return
+        _LOGGER.debug("Wrote %d bytes from register 0x%02X",
+            written, register)
 
     def readList(self, register, length):
         """Read a length number of bytes from the specified register.
         Results will be returned as a bytearray."""
-        raise NotImplementedError
+        results = bytearray(self._read_block(register, length))
+        _LOGGER.debug("Read the following from register 0x%02X: %s",
+            register, results)
+        return results
 
     def readRaw8(self):
         """Read an 8-bit value on the bus (without register)."""
-        raise NotImplementedError
+        result = self._port.read(1)[0] & 0xFF
+        STATISTICS.count(read=1)
+        _LOGGER.debug("Read 0x%02X", result)
+        return result
 
     def readU8(self, register):
         """Read an unsigned byte from the specified register."""
-        raw_data = self._port.read_from(register, 1)
+        raw_data = self._read_block(register, 1)
         result = int.from_bytes(raw_data, byteorder='big') & 0xFF
         _LOGGER.debug("Read 0x%02X from register 0x%02X",
                      result, register)
@@ -102,30 +225,38 @@ class Device:
         """Read an unsigned 16-bit value from the specified register, with
         the specified endianness (default little endian, or least
         significant byte first)."""
-        raise NotImplementedError
+        raw_data = self._read_block(register, 2)
+        result = int.from_bytes(
+            raw_data, byteorder='little' if little_endian else 'big')
+        _LOGGER.debug("Read 0x%04X from register pair 0x%02X, 0x%02X",
+            result, register, register + 1)
+        return result
 
     def readS16(self, register, little_endian=True):
         """Read a signed 16-bit value from the specified register, with the
         specified endianness (default little endian, or least significant
         byte first)."""
-        raise NotImplementedError
+        result = self.readU16(register, little_endian)
+        if result > 32767:
+            result -= 65536
+        return result
 
     def readU16LE(self, register):
         """Read an unsigned 16-bit value from the specified register, in
         little endian byte order."""
-        raise NotImplementedError
+        return self.readU16(register, little_endian=True)
 
     def readU16BE(self, register):
         """Read an unsigned 16-bit value from the specified register, in big
         endian byte order."""
-        raise NotImplementedError
+        return self.readU16(register, little_endian=False)
 
     def readS16LE(self, register):
         """Read a signed 16-bit value from the specified register, in little
         endian byte order."""
-        raise NotImplementedError
+        return self.readS16(register, little_endian=True)
 
     def readS16BE(self, register):
         """Read a signed 16-bit value from the specified register, in big
         endian byte order."""
-        raise NotImplementedError
+        return self.readS16(register, little_endian=False)
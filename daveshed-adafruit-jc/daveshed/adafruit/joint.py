@@ -3,14 +3,29 @@ A concrete implementation of the joint controller interface defined by the the
 legobot.
 """
 import logging
-import time
+import os
 
 import Adafruit_PCA9685
+import numpy as np
 
+from daveshed.adafruit import calibration
 from daveshed.adafruit import i2c as i2c_interface
+from daveshed.legobot import logs
+from daveshed.legobot import trajectory
 from daveshed.legobot.joint import JointControllerBase
 
 _LOGGER = logging.getLogger("JOINT")
+_HOT_PATH_LOGGER = logs.HotPathLogger(_LOGGER)
+
+# PCA9685 register map. The adafruit driver does not export these.
+_MODE1 = 0x00
+_AUTO_INCREMENT = 0x20
+_LED0_ON_L = 0x06
+_REGISTERS_PER_CHANNEL = 4
+_NUM_CHANNELS = 16
+# the LED registers only change when written so they can be shadowed
+_LED_REGISTERS = range(
+    _LED0_ON_L, _LED0_ON_L + _REGISTERS_PER_CHANNEL * _NUM_CHANNELS)
 
 
 class PwmChannel:
@@ -22,7 +37,8 @@ class PwmChannel:
         pca (Adafruit_PCA9685.PCA9685): pulse width modulation device
         channel (int): the channel to drive
     """
-    RESOLUTION = 4096
+    RESOLUTION = calibration.RESOLUTION
+
     def __init__(self, pca, channel):
         self._pca = pca
         self._channel = channel
@@ -46,13 +62,68 @@ class PwmChannel:
         Args:
             value (float): the duty cycle between 0 and 1
         """
+        self._validate(value)
+        off_time = self.to_ticks(value)
+        self._pca.set_pwm(self._channel, 0, off_time)
+        self._duty_cycle = value
+
+    @classmethod
+    def set_duty_cycles(cls, duty_cycles):
+        """
+        Sets the duty cycles of several pwm outputs at once. The LED_ON/LED_OFF
+        registers of channels that are adjacent on the same device are written
+        in a single auto-increment burst rather than register by register.
+
+        Args:
+            duty_cycles (dict): maps each PwmChannel to its duty cycle between
+                0 and 1
+        """
+        for value in duty_cycles.values():
+            cls._validate(value)
+        for run in cls._group_adjacent(duty_cycles):
+            data = bytearray()
+            for channel in run:
+                off_time = cls.to_ticks(duty_cycles[channel])
+                data.extend((0, 0, off_time & 0xFF, off_time >> 8))
+            # pylint: disable=protected-access
+            run[0]._pca._device.writeList(
+                _LED0_ON_L + _REGISTERS_PER_CHANNEL * run[0]._channel, data)
+            for channel in run:
+                channel._duty_cycle = duty_cycles[channel]
+
+    @classmethod
+    def to_ticks(cls, value):
+        """
+        Quantizes a duty cycle to the tick count written to the hardware
+
+        Args:
+            value (float): the duty cycle between 0 and 1
+
+        Returns:
+            int: the number of ticks the output is held high for
+        """
+        return int(value * cls.RESOLUTION)
+
+    @staticmethod
+    def _group_adjacent(channels):
+        # pylint: disable=protected-access
+        runs = []
+        for channel in sorted(
+                channels, key=lambda item: (id(item._pca), item._channel)):
+            if runs and runs[-1][-1]._pca is channel._pca \
+                    and runs[-1][-1]._channel + 1 == channel._channel:
+                runs[-1].append(channel)
+            else:
+                runs.append([channel])
+        return runs
+
+    @staticmethod
+    def _validate(value):
         assert value > 0.0, "Cannot set negative duty cycle"
         assert value <= 1.0, "Cannot set duty cycle larger than 1"
-        off_time = int(value * self.RESOLUTION)
-        self._pca.set_pwm(self._channel, 0, off_time)
 
     @classmethod
-    def from_channel_numbers(cls, channels):
+    def from_channel_numbers(cls, channels, i2c=i2c_interface):
         """
         A factory method to create pwm channels from an iterable of channel
         numbers
@@ -60,50 +131,182 @@ class PwmChannel:
         Args:
             iterable of ints: the index of each channel to create a pwm channel
                 on.
+            i2c (module): provides `get_i2c_device` to reach the PCA9685.
+                Defaults to the FTDI adapter.
         """
-        pca = Adafruit_PCA9685.PCA9685(i2c=i2c_interface)
+        pca = Adafruit_PCA9685.PCA9685(
+            i2c=i2c, shadow_registers=_LED_REGISTERS)
         pca.frequency = 50
+        # allow the registers of several channels to be written in one burst
+        # pylint: disable=protected-access
+        mode1 = pca._device.readU8(_MODE1)
+        pca._device.write8(_MODE1, mode1 | _AUTO_INCREMENT)
         return (cls(pca, idx) for idx in channels)
 
 
 class ServoJointController(JointControllerBase):
     """
-    A servo controller.
+    A servo controller. Angles are converted to pwm duty cycles with the
+    servo's calibration and are clamped to the calibrated range.
 
     Args:
         channel (PwmChannelBase): the channel that should be used to control the
             servo through pulse-width-modulation.
+        servo_calibration (daveshed.adafruit.calibration.ServoCalibration):
+            the servo's measured angles. Defaults to the nominal linear
+            mapping.
     """
     MIN_ANGLE_DEG = 0.0
     MIN_DUTY_CYCLE = 0.0025
     MAX_ANGLE_DEG = 180.0
     MAX_DUTY_CYCLE = 0.5
     INITIAL_ANGLE_DEG = 90
-    _SLOPE = (MAX_DUTY_CYCLE - MIN_DUTY_CYCLE) / (MAX_ANGLE_DEG - MIN_ANGLE_DEG)
-    _INTERCEPT = MIN_DUTY_CYCLE
+    NOMINAL_CALIBRATION = calibration.ServoCalibration.linear(
+        MIN_ANGLE_DEG, MIN_DUTY_CYCLE, MAX_ANGLE_DEG, MAX_DUTY_CYCLE)
 
-    def __init__(self, channel: PwmChannel):
+    def __init__(self, channel: PwmChannel, servo_calibration=None):
         super().__init__(None)
         self._channel = channel
-        self.angle = self.INITIAL_ANGLE_DEG
+        self._calibration = self.NOMINAL_CALIBRATION \
+            if servo_calibration is None else servo_calibration
+        self._ticks = None
+        self._suppressed_writes = 0
+        self._prepared = {}
+        self.angle = self.home_angle
+
+    @property
+    def calibration(self):
+        """
+        The servo's calibration
+
+        Returns:
+            daveshed.adafruit.calibration.ServoCalibration: the calibration
+        """
+        return self._calibration
+
+    @property
+    def suppressed_writes(self):
+        """
+        The number of angle updates that were not written to the hardware
+        because they would not have changed the pwm output.
+
+        Returns:
+            int: the number of suppressed writes
+        """
+        return self._suppressed_writes
+
+    @property
+    def home_angle(self):
+        return self._calibration.clamp(self.INITIAL_ANGLE_DEG)
+
+    def duty_cycles(self, angles):
+        """
+        Convert a sequence of angles eg. a planned trajectory to duty cycles
+        in one go
+
+        Args:
+            angles (array_like): the angles in degrees
+
+        Returns:
+            numpy.ndarray: the duty cycle for each angle
+        """
+        return self._calibration.duty_cycles(angles)
+
+    def prepare(self, angles):
+        # the duty cycles of a planned trajectory are converted in one go and
+        # looked up as each angle is set
+        angles = np.asarray(angles, dtype=float)
+        self._prepared = dict(zip(
+            angles.tolist(), self.duty_cycles(angles).tolist()))
+
+    def release(self):
+        self._prepared = {}
+
+    def _duty_cycle(self, angle):
+        duty_cycle = self._prepared.get(angle)
+        if duty_cycle is None:
+            duty_cycle = self._calibration.duty_cycle(angle)
+        return duty_cycle
 
     def _set_angle(self, angle):
-        self._channel.duty_cycle = self._get_duty_cycle(angle)
-        _LOGGER.info("Setting angle to %f", angle)
+        duty_cycle = self._duty_cycle(angle)
+        angle = self._calibration.clamp(angle)
+        ticks = PwmChannel.to_ticks(duty_cycle)
+        if self._suppress(ticks):
+            self._angle = angle
+            return
+        self._channel.duty_cycle = duty_cycle
+        self._written(angle, ticks)
+
+    @classmethod
+    def _set_angles(cls, commands):
+        duty_cycles = {}
+        pending = {}
+        for joint, angle in commands.items():
+            duty_cycle = joint._duty_cycle(angle)
+            angle = joint._calibration.clamp(angle)
+            ticks = PwmChannel.to_ticks(duty_cycle)
+            if joint._suppress(ticks):
+                joint._angle = angle
+            else:
+                duty_cycles[joint._channel] = duty_cycle
+                pending[joint] = (angle, ticks)
+        if duty_cycles:
+            PwmChannel.set_duty_cycles(duty_cycles)
+        for joint, (angle, ticks) in pending.items():
+            joint._written(angle, ticks)
+
+    def _suppress(self, ticks):
+        # the angle is always tracked exactly so that small movements still
+        # accumulate but the hardware is only written when its output changes.
+        if ticks == self._ticks:
+            self._suppressed_writes += 1
+            return True
+        return False
+
+    def _written(self, angle, ticks):
+        # only recorded once the write has succeeded so that a failed write
+        # is retried rather than suppressed
         self._angle = angle
+        self._ticks = ticks
+        _HOT_PATH_LOGGER.info("Setting angle to %f", angle)
 
     def home(self):
-        delta = self.INITIAL_ANGLE_DEG - self.angle
-        if delta == 0.0:
-            return
-        stride = delta / abs(delta)
-        for angle in range(
-                round(self.angle),
-                round(self.INITIAL_ANGLE_DEG),
-                round(stride)):
-            self.angle = angle
-            time.sleep(0.02)
+        """
+        Move the servo to its home angle along a planned trajectory. This
+        does not block.
 
-    @classmethod
-    def _get_duty_cycle(cls, deg):
-        return (cls._SLOPE * deg) + cls._INTERCEPT
+        Returns:
+            daveshed.legobot.trajectory.TrajectoryHandle: a handle to wait on
+                or cancel homing
+        """
+        samples = trajectory.plan_move([self.angle], [self.home_angle])
+        return trajectory.run_trajectory(
+            trajectory.trajectory_setpoints([self], samples))
+
+
+def make_servo_joints(channels, calibration_path=calibration.DEFAULT_PATH):
+    """
+    The adafruit joint backend (see `daveshed.legobot.backends`). Creates a
+    servo controller on each channel of a PCA9685 driven through the FTDI
+    adapter which is opened when the first channel is created.
+
+    Args:
+        channels (iterable): the channel numbers that servos are attached to
+        calibration_path (str): a file of servo calibrations (see
+            `daveshed.adafruit.calibration`). Servos on channels that it does
+            not list, or all servos if it does not exist, use the nominal
+            calibration.
+
+    Returns:
+        list: a `ServoJointController` per channel
+    """
+    channels = list(channels)
+    calibrations = {}
+    if calibration_path and os.path.exists(calibration_path):
+        calibrations = calibration.load(calibration_path)
+    return [
+        ServoJointController(channel, calibrations.get(number))
+        for number, channel in zip(
+            channels, PwmChannel.from_channel_numbers(channels))
+    ]
@@ -0,0 +1,255 @@
+"""
+A simulated FT232H I2C controller with PCA9685 devices attached so that the
+joint controllers may be run and their bus traffic measured without any
+hardware. Plug it in before any channels are created:
+
+    from daveshed.adafruit import i2c, simulation
+
+    i2c.set_controller(simulation.SimulatedController())
+
+Every transaction is charged the FTDI USB round trip latency plus the time to
+clock its bits over the I2C bus. The time is accumulated and may optionally be
+slept so that the simulation runs at the speed of the real hardware.
+"""
+import logging
+import time
+
+_LOGGER = logging.getLogger("SIMULATION")
+
+# PCA9685 register map
+_MODE1 = 0x00
+_MODE2 = 0x01
+_LED0_ON_L = 0x06
+_REGISTERS_PER_CHANNEL = 4
+_NUM_CHANNELS = 16
+_ALL_LED_ON_L = 0xFA
+_PRESCALE = 0xFE
+# MODE1 bits
+_SLEEP = 0x10
+_AUTO_INCREMENT = 0x20
+# each byte on the bus is 8 data bits and an acknowledge
+_BITS_PER_BYTE = 9
+
+
+class BusTiming:
+    """
+    The cost of I2C transactions through an FT232H.
+
+    Args:
+        usb_latency (float): the USB round trip time charged per transaction in
+            seconds
+        clock_hz (float): the I2C clock frequency
+    """
+    def __init__(self, usb_latency=250e-6, clock_hz=100e3):
+        self.usb_latency = usb_latency
+        self.clock_hz = clock_hz
+
+    def transaction_time(self, payload_bytes, conditions=2):
+        """
+        The time taken by a transaction
+
+        Args:
+            payload_bytes (int): the bytes clocked on the bus including the
+                address and register bytes
+            conditions (int): the number of start, repeated start and stop
+                conditions each of which take about one bit
+
+        Returns:
+            float: the time in seconds
+        """
+        bits = payload_bytes * _BITS_PER_BYTE + conditions
+        return self.usb_latency + bits / self.clock_hz
+
+
+class SimulatedPca9685:
+    """
+    The register file of a PCA9685. Multi-byte writes advance the register
+    pointer when the MODE1 auto-increment bit is set and otherwise rewrite the
+    same register. Writes to the ALL_LED registers are applied to every channel
+    and they read back as zero. PRE_SCALE may only be written while asleep.
+    """
+    def __init__(self):
+        self._registers = bytearray(256)
+        self.reset()
+
+    def reset(self):
+        """Restore the power on state of the registers"""
+        self._registers[:] = bytes(256)
+        self._registers[_MODE1] = 0x11
+        self._registers[_MODE2] = 0x04
+        self._registers[_PRESCALE] = 0x1E
+        for channel in range(_NUM_CHANNELS):
+            # LEDn_OFF_H full off bit
+            self._registers[
+                _LED0_ON_L + _REGISTERS_PER_CHANNEL * channel + 3] = 0x10
+
+    def write(self, register, data):
+        """
+        Write bytes starting at a register
+
+        Args:
+            register (int): the first register
+            data (bytes): the values to write
+        """
+        for value in data:
+            self._write_register(register, value)
+            if self._registers[_MODE1] & _AUTO_INCREMENT:
+                register = (register + 1) & 0xFF
+
+    def read(self, register, length):
+        """
+        Read bytes starting at a register
+
+        Args:
+            register (int): the first register
+            length (int): the number of bytes to read
+
+        Returns:
+            bytes: the register values
+        """
+        result = bytearray()
+        for _ in range(length):
+            result.append(
+                0 if register >= _ALL_LED_ON_L and register < _PRESCALE
+                else self._registers[register])
+            if self._registers[_MODE1] & _AUTO_INCREMENT:
+                register = (register + 1) & 0xFF
+        return bytes(result)
+
+    def channel(self, channel):
+        """
+        The pwm output of a channel
+
+        Args:
+            channel (int): the channel number
+
+        Returns:
+            tuple: the (on, off) tick counts. Bit 12 of each is the full on or
+                full off flag.
+        """
+        base = _LED0_ON_L + _REGISTERS_PER_CHANNEL * channel
+        registers = self._registers[base:base + _REGISTERS_PER_CHANNEL]
+        return (
+            registers[0] | registers[1] << 8,
+            registers[2] | registers[3] << 8)
+
+    def _write_register(self, register, value):
+        if _ALL_LED_ON_L <= register < _PRESCALE:
+            offset = register - _ALL_LED_ON_L
+            for channel in range(_NUM_CHANNELS):
+                self._registers[
+                    _LED0_ON_L + _REGISTERS_PER_CHANNEL * channel + offset
+                ] = value
+            return
+        if register == _PRESCALE and not self._registers[_MODE1] & _SLEEP:
+            _LOGGER.debug("PRE_SCALE is only writable while asleep")
+            return
+        self._registers[register] = value
+
+
+class SimulatedPort:
+    """
+    An I2C port on a simulated controller with the same interface as
+    `pyftdi.i2c.I2cPort`.
+
+    Args:
+        controller (SimulatedController): the controller that the port is on
+        device (SimulatedPca9685): the device at the port's address
+    """
+    def __init__(self, controller, device):
+        self._controller = controller
+        self._device = device
+        self._pointer = 0
+
+    def write_to(self, regaddr, out, relax=True, start=True):
+        # pylint: disable=missing-docstring,unused-argument
+        out = bytes(out)
+        self._controller.charge(2 + len(out), 2, len(out))
+        self._pointer = regaddr
+        self._device.write(regaddr, out)
+
+    def read_from(self, regaddr, readlen=0, relax=True, start=True):
+        # pylint: disable=missing-docstring,unused-argument
+        self._controller.charge(3 + readlen, 3, 0)
+        self._pointer = regaddr
+        return self._device.read(regaddr, readlen)
+
+    def write(self, out, relax=True, start=True):
+        # pylint: disable=missing-docstring,unused-argument
+        # without a register the first byte selects the register
+        out = bytes(out)
+        self._controller.charge(1 + len(out), 2, len(out))
+        if out:
+            self._pointer = out[0]
+            self._device.write(out[0], out[1:])
+
+    def read(self, readlen=0, relax=True, start=True):
+        # pylint: disable=missing-docstring,unused-argument
+        self._controller.charge(1 + readlen, 2, 0)
+        return self._device.read(self._pointer, readlen)
+
+
+class SimulatedController:
+    """
+    A simulated FT232H I2C controller that may be plugged into
+    `daveshed.adafruit.i2c.set_controller`. Devices are created on demand at
+    any address that is asked for.
+
+    Args:
+        timing (BusTiming): the cost of each transaction
+        realtime (bool): sleep for the time each transaction would take so
+            that callers see the latency of the real hardware
+    """
+    def __init__(self, timing=None, realtime=False):
+        self.timing = BusTiming() if timing is None else timing
+        self._realtime = realtime
+        self._devices = {}
+        self.transactions = 0
+        self.bytes_written = 0
+        self.bus_time = 0.0
+
+    def get_port(self, address):
+        """
+        The port for a device on the bus
+
+        Args:
+            address (int): the device address
+
+        Returns:
+            SimulatedPort: the port
+        """
+        return SimulatedPort(self, self.device(address))
+
+    def device(self, address):
+        """
+        The simulated device at an address
+
+        Args:
+            address (int): the device address
+
+        Returns:
+            SimulatedPca9685: the device
+        """
+        return self._devices.setdefault(address, SimulatedPca9685())
+
+    def charge(self, payload_bytes, conditions, written):
+        """
+        Account for a transaction
+
+        Args:
+            payload_bytes (int): the bytes clocked on the bus
+            conditions (int): the start and stop conditions
+            written (int): the data bytes written to the device
+        """
+        duration = self.timing.transaction_time(payload_bytes, conditions)
+        self.transactions += 1
+        self.bytes_written += written
+        self.bus_time += duration
+        if self._realtime:
+            time.sleep(duration)
+
+    def reset_statistics(self):
+        """Forget the transactions that have been counted"""
+        self.transactions = 0
+        self.bytes_written = 0
+        self.bus_time = 0.0
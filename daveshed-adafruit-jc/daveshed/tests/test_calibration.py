@@ -0,0 +1,92 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from daveshed.adafruit import calibration
+
+
+class ServoCalibrationTestGroup(unittest.TestCase):
+
+    def setUp(self):
+        self.calibration = calibration.ServoCalibration(
+            angles=(0.0, 90.0, 180.0), ticks=(100.0, 300.0, 500.0))
+
+    def test_duty_cycle_is_interpolated_between_points(self):
+        self.assertAlmostEqual(
+            self.calibration.duty_cycle(45.0), 200.0 / calibration.RESOLUTION)
+        self.assertAlmostEqual(
+            self.calibration.duty_cycle(90.0), 300.0 / calibration.RESOLUTION)
+        self.assertAlmostEqual(
+            self.calibration.duty_cycle(135.0),
+            400.0 / calibration.RESOLUTION)
+
+    def test_duty_cycle_is_clamped_to_the_table(self):
+        self.assertAlmostEqual(
+            self.calibration.duty_cycle(-10.0),
+            100.0 / calibration.RESOLUTION)
+        self.assertAlmostEqual(
+            self.calibration.duty_cycle(200.0),
+            500.0 / calibration.RESOLUTION)
+
+    def test_duty_cycles_match_duty_cycle(self):
+        angles = np.linspace(-20.0, 200.0, 23)
+        np.testing.assert_allclose(
+            self.calibration.duty_cycles(angles),
+            [self.calibration.duty_cycle(angle) for angle in angles])
+
+    def test_angles_are_clamped_to_the_table(self):
+        self.assertEqual(self.calibration.limits, (0.0, 180.0))
+        self.assertEqual(self.calibration.clamp(-1.0), 0.0)
+        self.assertEqual(self.calibration.clamp(181.0), 180.0)
+        self.assertEqual(self.calibration.clamp(45.0), 45.0)
+
+    def test_linear_calibration_spans_the_duty_cycles(self):
+        linear = calibration.ServoCalibration.linear(0.0, 0.025, 180.0, 0.125)
+        self.assertAlmostEqual(linear.duty_cycle(0.0), 0.025)
+        self.assertAlmostEqual(linear.duty_cycle(90.0), 0.075)
+        self.assertAlmostEqual(linear.duty_cycle(180.0), 0.125)
+
+    def test_invalid_tables_are_rejected(self):
+        for angles, ticks in (
+                ((0.0,), (100.0,)),
+                ((0.0, 90.0), (100.0,)),
+                ((90.0, 0.0), (100.0, 300.0)),
+                ((0.0, 0.0), (100.0, 300.0)),
+                ((0.0, 90.0), (0.0, 300.0)),
+                ((0.0, 90.0), (100.0, 5000.0))):
+            with self.assertRaises(ValueError):
+                calibration.ServoCalibration(angles, ticks)
+
+
+class CalibrationFileTestGroup(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.path = os.path.join(directory, "legobot", "calibration.json")
+        self.addCleanup(os.rmdir, directory)
+        self.addCleanup(os.rmdir, os.path.dirname(self.path))
+        self.addCleanup(os.remove, self.path)
+
+    def test_tables_are_saved_and_loaded(self):
+        tables = {
+            0: calibration.ServoCalibration((0, 90, 180), (112, 307, 496)),
+            3: calibration.ServoCalibration((60, 95), (270, 322)),
+        }
+        calibration.save(tables, self.path)
+        loaded = calibration.load(self.path)
+        self.assertEqual(sorted(loaded), [0, 3])
+        for channel, table in tables.items():
+            self.assertEqual(loaded[channel].to_dict(), table.to_dict())
+
+    def test_invalid_tables_are_not_loaded(self):
+        os.makedirs(os.path.dirname(self.path))
+        with open(self.path, "w") as stream:
+            stream.write('{"0": {"angles": [0, 90], "ticks": [100]}}')
+        with self.assertRaises(ValueError):
+            calibration.load(self.path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+import unittest
+
+from daveshed.adafruit import i2c
+from daveshed.adafruit import simulation
+
+ADDRESS = 0x40
+MODE1 = 0x00
+AUTO_INCREMENT = 0x21
+LED0_ON_L = 0x06
+ALL_LED_ON_L = 0xFA
+SHADOWED = range(LED0_ON_L, LED0_ON_L + 64)
+
+
+class DeviceTransferTestGroup(unittest.TestCase):
+
+    def setUp(self):
+        self.controller = simulation.SimulatedController()
+        self.pca = self.controller.device(ADDRESS)
+        self.device = i2c.Device(self.controller.get_port(ADDRESS))
+        self.device.write8(MODE1, AUTO_INCREMENT)
+        self.controller.reset_statistics()
+
+    def registers(self, register, length):
+        return self.pca.read(register, length)
+
+    def test_list_is_written_in_one_transaction(self):
+        self.device.writeList(LED0_ON_L, [1, 2, 3, 4])
+        self.assertEqual(self.registers(LED0_ON_L, 4), bytes((1, 2, 3, 4)))
+        self.assertEqual(self.controller.transactions, 1)
+        self.assertEqual(self.controller.bytes_written, 4)
+
+    def test_16_bit_values_are_written_little_endian(self):
+        self.device.write16(LED0_ON_L, 0x1234)
+        self.assertEqual(self.registers(LED0_ON_L, 2), bytes((0x34, 0x12)))
+        self.assertEqual(self.controller.transactions, 1)
+
+    def test_list_is_read_in_one_transaction(self):
+        self.pca.write(LED0_ON_L, bytes((5, 6, 7)))
+        self.assertEqual(
+            self.device.readList(LED0_ON_L, 3), bytearray((5, 6, 7)))
+        self.assertEqual(self.controller.transactions, 1)
+
+    def test_16_bit_values_are_read_in_either_byte_order(self):
+        self.pca.write(LED0_ON_L, bytes((0xFE, 0xFF)))
+        self.assertEqual(self.device.readU16LE(LED0_ON_L), 0xFFFE)
+        self.assertEqual(self.device.readU16BE(LED0_ON_L), 0xFEFF)
+        self.assertEqual(self.device.readS16LE(LED0_ON_L), -2)
+        self.assertEqual(self.device.readS16BE(LED0_ON_L), -257)
+        self.assertEqual(self.controller.transactions, 4)
+
+    def test_signed_bytes_are_read(self):
+        self.pca.write(LED0_ON_L, bytes((0x80,)))
+        self.assertEqual(self.device.readU8(LED0_ON_L), 0x80)
+        self.assertEqual(self.device.readS8(LED0_ON_L), -128)
+
+    def test_raw_bytes_use_the_register_pointer(self):
+        self.device.writeRaw8(LED0_ON_L)
+        self.pca.write(LED0_ON_L, bytes((9,)))
+        self.assertEqual(self.device.readRaw8(), 9)
+        self.assertEqual(self.controller.transactions, 2)
+
+
+class DeviceShadowTestGroup(unittest.TestCase):
+
+    def setUp(self):
+        self.controller = simulation.SimulatedController()
+        self.pca = self.controller.device(ADDRESS)
+        self.device = i2c.Device(
+            self.controller.get_port(ADDRESS), shadow_registers=SHADOWED)
+        self.device.write8(MODE1, AUTO_INCREMENT)
+        self.device.writeList(LED0_ON_L, [1, 2, 3, 4])
+        self.controller.reset_statistics()
+
+    def test_unchanged_writes_are_skipped(self):
+        self.device.writeList(LED0_ON_L, [1, 2, 3, 4])
+        self.device.write8(LED0_ON_L + 1, 2)
+        self.assertEqual(self.controller.transactions, 0)
+
+    def test_writes_are_trimmed_to_the_changed_registers(self):
+        self.device.writeList(LED0_ON_L, [1, 9, 8, 4])
+        self.assertEqual(self.controller.transactions, 1)
+        self.assertEqual(self.controller.bytes_written, 2)
+        self.assertEqual(
+            self.pca.read(LED0_ON_L, 4), bytes((1, 9, 8, 4)))
+
+    def test_shadowed_registers_are_read_without_the_bus(self):
+        self.assertEqual(
+            self.device.readList(LED0_ON_L, 4), bytearray((1, 2, 3, 4)))
+        self.assertEqual(self.device.readU16(LED0_ON_L + 2), 0x0403)
+        self.assertEqual(self.controller.transactions, 0)
+
+    def test_unknown_registers_are_read_from_the_bus(self):
+        self.device.readList(LED0_ON_L + 2, 4)
+        self.assertEqual(self.controller.transactions, 1)
+
+    def test_other_writes_invalidate_the_shadow(self):
+        # the ALL_LED registers alias every channel's registers
+        self.device.writeList(ALL_LED_ON_L, [0, 0, 0, 0])
+        self.controller.reset_statistics()
+        self.device.writeList(LED0_ON_L, [1, 2, 3, 4])
+        self.assertEqual(self.controller.transactions, 1)
+        self.assertEqual(
+            self.pca.read(LED0_ON_L, 4), bytes((1, 2, 3, 4)))
+
+    def test_invalidating_the_shadow_forces_writes(self):
+        self.device.invalidate_shadow()
+        self.device.writeList(LED0_ON_L, [1, 2, 3, 4])
+        self.assertEqual(self.controller.transactions, 1)
+        self.assertEqual(self.controller.bytes_written, 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
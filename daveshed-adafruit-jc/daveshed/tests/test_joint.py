@@ -0,0 +1,153 @@
+import unittest
+from unittest import mock
+
+from daveshed.adafruit import i2c
+from daveshed.adafruit import simulation
+from daveshed.adafruit.joint import PwmChannel
+from daveshed.adafruit.joint import ServoJointController
+from daveshed.legobot.joint import set_angles
+
+ADDRESS = 0x40
+
+
+class SimulatedPwmTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.controller = simulation.SimulatedController()
+        i2c.set_controller(self.controller)
+        self.addCleanup(i2c.set_controller, None)
+        self.pca = self.controller.device(ADDRESS)
+        self.channels = list(PwmChannel.from_channel_numbers((0, 1, 2, 4)))
+        self.controller.reset_statistics()
+
+
+class PwmChannelTestGroup(SimulatedPwmTestCase):
+
+    def test_duty_cycle_is_written_to_the_channel(self):
+        self.channels[1].duty_cycle = 0.25
+        self.assertEqual(self.pca.channel(1), (0, 1024))
+        self.assertEqual(self.channels[1].duty_cycle, 0.25)
+
+    def test_adjacent_channels_are_written_in_one_burst(self):
+        PwmChannel.set_duty_cycles({
+            self.channels[2]: 0.1,
+            self.channels[0]: 0.05,
+            self.channels[1]: 0.075,
+        })
+        self.assertEqual(self.controller.transactions, 1)
+        self.assertEqual(self.controller.bytes_written, 12)
+        self.assertEqual(
+            [self.pca.channel(idx) for idx in range(3)],
+            [(0, 204), (0, 307), (0, 409)])
+        self.assertEqual(self.channels[2].duty_cycle, 0.1)
+
+    def test_separate_channels_are_written_in_separate_bursts(self):
+        PwmChannel.set_duty_cycles({
+            self.channels[0]: 0.05,
+            self.channels[3]: 0.1,
+        })
+        self.assertEqual(self.controller.transactions, 2)
+        self.assertEqual(self.pca.channel(0), (0, 204))
+        self.assertEqual(self.pca.channel(4), (0, 409))
+        self.assertEqual(self.pca.channel(3), (0, 0))
+
+    def test_nothing_is_written_if_any_duty_cycle_is_invalid(self):
+        with self.assertRaises(AssertionError):
+            PwmChannel.set_duty_cycles({
+                self.channels[0]: 0.05,
+                self.channels[1]: 1.5,
+            })
+        self.assertEqual(self.controller.transactions, 0)
+        self.assertIsNone(self.channels[0].duty_cycle)
+
+
+class ServoJointControllerTestGroup(SimulatedPwmTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.servos = [
+            ServoJointController(channel) for channel in self.channels[:3]]
+        self.controller.reset_statistics()
+
+    def ticks(self, angle):
+        return PwmChannel.to_ticks(
+            ServoJointController.NOMINAL_CALIBRATION.duty_cycle(angle))
+
+    def fail_writes(self):
+        # pylint: disable=protected-access
+        device = self.channels[0]._pca._device
+        return mock.patch.object(
+            device._port, "write_to", side_effect=OSError("USB error"))
+
+    def test_writes_that_do_not_change_the_ticks_are_suppressed(self):
+        self.servos[0].angle = 90.01
+        self.servos[0].angle = 90.02
+        self.assertEqual(self.controller.transactions, 0)
+        self.assertEqual(self.servos[0].suppressed_writes, 2)
+        self.assertEqual(self.servos[0].angle, 90.02)
+
+    def test_small_moves_accumulate_until_the_ticks_change(self):
+        for _ in range(10):
+            self.servos[0].angle += 0.1
+        self.assertAlmostEqual(self.servos[0].angle, 91.0)
+        self.assertEqual(self.pca.channel(0), (0, self.ticks(91.0)))
+
+    def test_batched_writes_only_include_changed_joints(self):
+        set_angles({
+            self.servos[0]: 90.01, self.servos[1]: 45.0,
+            self.servos[2]: 90.0})
+        self.assertEqual(self.controller.transactions, 1)
+        self.assertEqual(self.servos[0].suppressed_writes, 1)
+        self.assertEqual(self.servos[2].suppressed_writes, 1)
+        self.assertEqual(self.pca.channel(1), (0, self.ticks(45.0)))
+
+    def test_prepared_angles_are_not_converted_again(self):
+        calibration = self.servos[0].calibration
+        self.servos[0].prepare([45.0, 60.0])
+        with mock.patch.object(
+                calibration, "duty_cycle",
+                side_effect=AssertionError("converted again")):
+            set_angles({self.servos[0]: 60.0})
+        self.assertEqual(self.pca.channel(0), (0, self.ticks(60.0)))
+
+    def test_prepared_angles_are_forgotten_once_released(self):
+        self.servos[0].prepare([45.0, 60.0])
+        self.servos[0].release()
+        calibration = self.servos[0].calibration
+        with mock.patch.object(
+                calibration, "duty_cycle",
+                wraps=calibration.duty_cycle) as duty_cycle:
+            set_angles({self.servos[0]: 60.0})
+        duty_cycle.assert_called_once_with(60.0)
+
+    def test_homing_follows_a_trajectory_in_the_background(self):
+        self.servos[0].angle = 80.0
+        handle = self.servos[0].home()
+        self.assertTrue(handle.wait(timeout=5.0))
+        self.assertEqual(self.servos[0].angle, 90.0)
+        self.assertEqual(self.pca.channel(0), (0, self.ticks(90.0)))
+
+    def test_failed_writes_are_retried(self):
+        with self.fail_writes(), self.assertRaises(OSError):
+            self.servos[0].angle = 45.0
+        self.assertEqual(self.servos[0].angle, 90.0)
+        self.servos[0].angle = 45.0
+        self.assertEqual(self.servos[0].suppressed_writes, 0)
+        self.assertEqual(self.pca.channel(0), (0, self.ticks(45.0)))
+
+    def test_failed_batched_writes_are_retried(self):
+        commands = {self.servos[0]: 45.0, self.servos[1]: 45.0}
+        with self.fail_writes(), self.assertRaises(OSError):
+            set_angles(commands)
+        self.assertEqual(
+            [servo.angle for servo in self.servos[:2]], [90.0, 90.0])
+        set_angles(commands)
+        self.assertEqual(
+            [servo.suppressed_writes for servo in self.servos[:2]], [0, 0])
+        self.assertEqual(
+            [self.pca.channel(idx) for idx in range(2)],
+            [(0, self.ticks(45.0)), (0, self.ticks(45.0))])
+
+
+if __name__ == "__main__":
+    unittest.main()
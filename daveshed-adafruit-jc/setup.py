@@ -28,10 +28,16 @@ setuptools.setup(
 
     install_requires=[
         'Adafruit_PCA9685',
+        'numpy',
         'pyftdi',
         'daveshed-legobot'
     ],
 
     packages=setuptools.find_namespace_packages(include=['daveshed.*']),
+    entry_points={
+        'daveshed.legobot.joint_backends': [
+            'adafruit = daveshed.adafruit.joint:make_servo_joints',
+        ],
+    },
     zip_safe=False,
 )
\ No newline at end of file
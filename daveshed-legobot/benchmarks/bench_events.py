@@ -0,0 +1,137 @@
+"""
+Benchmark the cost of parsing mouse events at a high polling rate. Events are
+processed in batches the size of a consumer read and made in one of two ways:
+
+    dict    an equivalent event class with an instance __dict__ (as before
+            events were slotted)
+    slots   the slotted event classes
+
+For each the throughput, the memory held by a batch of live events and the
+garbage collections triggered (with the longest pause) are reported.
+
+    $ python benchmarks/bench_events.py
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+from daveshed.legobot.events import mouse
+
+BATCH_SIZE = 64
+CODES = ("REL_X", "REL_Y", "REL_X", "REL_Y", "REL_WHEEL")
+
+
+class DictEvent:
+    """An event with an instance __dict__ as events were before slotting"""
+    # pylint: disable=too-few-public-methods
+
+    def __init__(self, event):
+        self._timestamp = event.timestamp
+
+
+class DictMouseMoved(DictEvent):
+    """A mouse movement event with an instance __dict__"""
+    # pylint: disable=too-few-public-methods
+
+    def __init__(self, event):
+        self._delta = event.state
+        super().__init__(event)
+
+
+class GcPauses:
+    """Records the number and duration of garbage collections"""
+
+    def __init__(self):
+        self.pauses = []
+        self._start = None
+
+    def __enter__(self):
+        gc.callbacks.append(self._callback)
+        return self
+
+    def __exit__(self, *_):
+        gc.callbacks.remove(self._callback)
+
+    def _callback(self, phase, _):
+        if phase == "start":
+            self._start = time.perf_counter()
+        elif self._start is not None:
+            self.pauses.append(time.perf_counter() - self._start)
+
+
+def make_batches(count):
+    now = time.time()
+    raw_events = [
+        SimpleNamespace(
+            ev_type="Relative", code=CODES[idx % len(CODES)],
+            state=(idx % 7) - 3, timestamp=now)
+        for idx in range(count)
+    ]
+    return [
+        raw_events[idx:idx + BATCH_SIZE]
+        for idx in range(0, count, BATCH_SIZE)
+    ]
+
+
+def process_dict(batch):
+    # pylint: disable=protected-access
+    routes = mouse.MouseInputEvent._routes
+    events = [
+        routes[(raw_event.ev_type, raw_event.code, raw_event.state)]
+        and DictMouseMoved(raw_event)
+        for raw_event in batch
+    ]
+    return events
+
+
+def process_slots(batch):
+    # pylint: disable=protected-access
+    routes = mouse.MouseInputEvent._routes
+    events = [
+        routes[(raw_event.ev_type, raw_event.code, raw_event.state)](raw_event)
+        for raw_event in batch
+    ]
+    return events
+
+
+def measure_batch_memory(process, batch):
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    events = process(batch)
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del events
+    return (after - before) / len(batch)
+
+
+def run(name, process, batches):
+    bytes_per_event = measure_batch_memory(process, batches[0])
+    gc.collect()
+    with GcPauses() as pauses:
+        start = time.perf_counter()
+        for batch in batches:
+            process(batch)
+        elapsed = time.perf_counter() - start
+    count = sum(len(batch) for batch in batches)
+    print(
+        "{:<7} {:>9.0f} events/s  {:>6.1f} B/event  {:>4} collections  "
+        "{:>7.1f} us longest pause".format(
+            name, count / elapsed, bytes_per_event, len(pauses.pauses),
+            max(pauses.pauses, default=0.0) * 1e6))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=500000)
+    args = parser.parse_args()
+    batches = make_batches(args.events)
+    run("dict", process_dict, batches)
+    run("slots", process_slots, batches)
+
+
+if __name__ == "__main__":
+    main()
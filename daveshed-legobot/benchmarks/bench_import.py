@@ -0,0 +1,61 @@
+"""
+Benchmark the time taken to import the application and build a stub factory
+in a fresh interpreter, as a stub or test process would at start up. Each
+measurement is repeated in new processes and the median is reported together
+with whether the heavy optional dependencies were loaded.
+
+    $ python benchmarks/bench_import.py --repeat 20
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    "elapsed": elapsed,
+    "loaded": [name for name in {watched!r} if name in sys.modules],
+}}))
+"""
+WATCHED = ("numpy", "Adafruit_PCA9685", "pyftdi", "daveshed.adafruit.joint")
+CASES = {
+    "import application": "import daveshed.legobot.application",
+    "import factory": "import daveshed.legobot.factory",
+    "stub factory": (
+        "from daveshed.legobot.factory import MouseRobotStubFactory\n"
+        "MouseRobotStubFactory()"),
+}
+
+
+def measure(statement, repeat):
+    script = SCRIPT.format(statement=statement, watched=WATCHED)
+    results = [
+        json.loads(subprocess.run(
+            [sys.executable, "-c", script], check=True,
+            stdout=subprocess.PIPE).stdout)
+        for _ in range(repeat)
+    ]
+    return (
+        statistics.median(result["elapsed"] for result in results),
+        results[-1]["loaded"])
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+    for name, statement in CASES.items():
+        elapsed, loaded = measure(statement, args.repeat)
+        print("{:<20} {:>7.1f} ms  loaded: {}".format(
+            name, elapsed * 1e3, ", ".join(loaded) or "-"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Benchmark the kinematics that the Cartesian robot solves on every control loop
+tick. Solves per second are reported for
+
+    forward   the position of random joint angles
+    jacobian  the jacobian of random joint angles
+    closed    inverse kinematics of random reachable targets that are solved
+              in closed form, with caching defeated
+    numeric   inverse kinematics of random targets beyond reach that fall back
+              to the damped least squares solver, with caching defeated
+    cached    inverse kinematics of a mouse-like path that returns to the
+              positions it has already visited
+
+along with how many times over each rate covers a control loop running at the
+given rate, which must be at least one for the loop to keep up.
+
+    $ python benchmarks/bench_kinematics.py --loop-rate 100
+"""
+import argparse
+import math
+import random
+import time
+
+from daveshed.legobot import kinematics
+
+
+def random_angles(count, rng):
+    return [
+        tuple(rng.uniform(0.0, 180.0) for _ in range(3))
+        for _ in range(count)
+    ]
+
+
+def beyond_reach(arm, count, rng):
+    geometry = arm.geometry
+    reach = 1.5 * (geometry.upper_arm + geometry.forearm)
+    return [
+        (reach * math.cos(bearing), reach * math.sin(bearing),
+         geometry.base_height + rng.uniform(-50.0, 50.0))
+        for bearing in (rng.uniform(0.0, math.pi) for _ in range(count))
+    ]
+
+
+def mouse_path(arm, count):
+    # the end effector circles back and forth over the same few centimetres
+    x, y, z = arm.forward((90.0, 90.0, 90.0))
+    return [
+        (x + 20.0 * math.cos(idx / 20.0), y + 20.0 * math.sin(idx / 20.0), z)
+        for idx in range(count)
+    ]
+
+
+def run(name, solve, inputs, loop_rate):
+    start = time.perf_counter()
+    for value in inputs:
+        solve(value)
+    rate = len(inputs) / (time.perf_counter() - start)
+    print("{:<9} {:>9.0f} solves/s  {:>8.0f}x a {:.0f}Hz loop".format(
+        name, rate, rate / loop_rate, loop_rate))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--solves", type=int, default=5000)
+    parser.add_argument("--loop-rate", type=float, default=100.0,
+                        help="control loop rate in Hz")
+    args = parser.parse_args()
+    rng = random.Random(0)
+    arm = kinematics.ArmKinematics(cache_size=0)
+    angles = random_angles(args.solves, rng)
+    run("forward", arm.forward, angles, args.loop_rate)
+    run("jacobian", arm.jacobian, angles, args.loop_rate)
+    run("closed", arm.inverse, [arm.forward(value) for value in angles],
+        args.loop_rate)
+    run("numeric", arm.inverse, beyond_reach(arm, args.solves // 10, rng),
+        args.loop_rate)
+    cached = kinematics.ArmKinematics()
+    run("cached", cached.inverse, mouse_path(cached, args.solves),
+        args.loop_rate)
+    print(cached.cache_info())
+
+
+if __name__ == "__main__":
+    main()
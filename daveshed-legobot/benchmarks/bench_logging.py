@@ -0,0 +1,100 @@
+"""
+Benchmark the cost of logging on the input to actuation pipeline. The pipeline
+benchmark is run for each controller against the simulated PCA9685 robot with
+logging at INFO level, as the examples enable it, configured in one of three
+ways:
+
+    disabled  logging disabled as a reference
+    basic     `logging.basicConfig` writing every record from the calling
+              thread
+    queued    `daveshed.legobot.logs.configure` rate limiting each call site
+              and writing from a background thread
+
+Records are written to a temporary file. The throughput and p50/p99 latency
+are reported along with the number of records written.
+
+    $ python benchmarks/bench_logging.py
+"""
+import argparse
+import logging
+import os
+import tempfile
+
+import bench_pipeline
+
+from daveshed.legobot import logs
+
+FORMAT = logging.BASIC_FORMAT
+
+
+def disabled(_path):
+    logging.disable(logging.INFO)
+    return lambda: logging.disable(logging.NOTSET)
+
+
+def basic(path):
+    logging.basicConfig(
+        level=logging.INFO, filename=path, format=FORMAT, force=True)
+
+    def restore():
+        root = logging.getLogger()
+        for handler in root.handlers[:]:
+            root.removeHandler(handler)
+            handler.close()
+    return restore
+
+
+def queued(path):
+    handler = logging.FileHandler(path)
+    handler.setFormatter(logging.Formatter(FORMAT))
+    logs.configure(level=logging.INFO, handlers=[handler])
+
+    def restore():
+        logs.shutdown()
+        handler.close()
+    return restore
+
+
+MODES = {
+    "disabled": disabled,
+    "basic": basic,
+    "queued": queued,
+}
+
+
+def count_lines(path):
+    with open(path) as stream:
+        return sum(1 for _ in stream)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=5000)
+    args = parser.parse_args()
+    directory = tempfile.mkdtemp()
+    for controller_name in bench_pipeline.CONTROLLERS:
+        for mode, setup in MODES.items():
+            path = os.path.join(directory, "%s-%s.log" % (
+                controller_name, mode))
+            restore = setup(path)
+            try:
+                result = bench_pipeline.run(
+                    controller_name, "pca9685", args.frames)
+            finally:
+                restore()
+            print(
+                "{:<18} {:>9.0f} events/s  p50 {:>7.1f} us  "
+                "p99 {:>7.1f} us  {:>7d} records".format(
+                    "%s/%s" % (controller_name, mode),
+                    result["events_per_sec"], result["p50_latency_us"],
+                    result["p99_latency_us"],
+                    count_lines(path) if os.path.exists(path) else 0))
+            if os.path.exists(path):
+                os.remove(path)
+    os.rmdir(directory)
+
+
+if __name__ == "__main__":
+    main()
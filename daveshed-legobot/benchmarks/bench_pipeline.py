@@ -0,0 +1,258 @@
+"""
+Benchmark the input to actuation pipeline for each controller. A synthetic
+stream of raw events for the controller's device is parsed, dispatched to the
+controller and applied to a robot by ticking the motion loop after every frame
+of input, as if the control loop kept pace with the device.
+
+Each controller is run against two robots:
+
+    stub     `RobotStub` which does nothing
+    pca9685  a `ThreeDofLegoRobot` with servos on a PCA9685 on the simulated
+             FT232H backend so that bus transactions are counted and timed
+             rather than sent
+
+The throughput, the p50/p99 latency from reading a frame to updating the robot
+and the bus traffic per frame (with its modelled bus time) are reported.
+Results are compared against the baseline in benchmarks/baselines/pipeline.json
+and the script exits non-zero if the hot path has regressed: throughput has
+dropped by more than the tolerance (timings vary between machines) or bus
+traffic has grown at all (it is deterministic).
+
+    $ python benchmarks/bench_pipeline.py            # compare to baseline
+    $ python benchmarks/bench_pipeline.py --save     # record a new baseline
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+from daveshed.adafruit import i2c
+from daveshed.adafruit import joint
+from daveshed.adafruit import simulation
+from daveshed.legobot import controller
+from daveshed.legobot import robot
+from daveshed.legobot.events import base
+from daveshed.legobot.events import gamepad as gamepad_events
+from daveshed.legobot.events import mouse as mouse_events
+from daveshed.legobot.events import trackpad as trackpad_events
+from daveshed.legobot.grasper import LegoServoGrasper
+from daveshed.legobot.motion import MotionLoop
+
+BASELINE = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "baselines", "pipeline.json")
+SYNC = ("Sync", "SYN_REPORT", 0)
+
+
+class SyntheticDevice:
+    """Returns one frame of raw events per read stamped as they are read"""
+
+    def __init__(self, frames):
+        self._frames = frames
+        self._index = 0
+        self.events_read = 0
+
+    def read(self):
+        frame = self._frames[self._index % len(self._frames)]
+        self._index += 1
+        self.events_read += len(frame)
+        now = time.time()
+        return [
+            SimpleNamespace(
+                ev_type=ev_type, code=code, state=state, timestamp=now)
+            for ev_type, code, state in frame
+        ]
+
+
+def gamepad_frames():
+    # press and release the d-pad and x/b buttons so that the robot moves
+    # back and forth
+    return [
+        [("Absolute", "ABS_Y", 255), SYNC],
+        [("Absolute", "ABS_Y", 127), SYNC],
+        [("Absolute", "ABS_Y", 0), SYNC],
+        [("Absolute", "ABS_Y", 127), SYNC],
+        [("Absolute", "ABS_X", 255), SYNC],
+        [("Absolute", "ABS_X", 127), SYNC],
+        [("Absolute", "ABS_X", 0), SYNC],
+        [("Absolute", "ABS_X", 127), SYNC],
+        [("Key", "BTN_TRIGGER", 1), SYNC],
+        [("Key", "BTN_TRIGGER", 0), SYNC],
+        [("Key", "BTN_THUMB2", 1), SYNC],
+        [("Key", "BTN_THUMB2", 0), SYNC],
+    ]
+
+
+def mouse_frames():
+    frames = []
+    for idx in range(100):
+        delta = 5 if idx % 2 else -5
+        frames.append([
+            ("Relative", "REL_X", delta), ("Relative", "REL_Y", -delta), SYNC])
+    frames.append([("Key", "BTN_LEFT", 1), SYNC])
+    frames.append([("Key", "BTN_LEFT", 0), SYNC])
+    return frames
+
+
+def trackpad_frames():
+    # the first position after a touch is only a reference so an odd number
+    # of positions makes an even number of moves that cancel out
+    frames = [[("Key", "BTN_TOUCH", 1), SYNC]]
+    for idx in range(101):
+        position = 140 if idx % 2 else 100
+        frames.append([
+            ("Absolute", "ABS_X", position),
+            ("Absolute", "ABS_Y", 240 - position),
+            SYNC,
+        ])
+    frames.append([("Key", "BTN_TOUCH", 0), SYNC])
+    return frames
+
+
+CONTROLLERS = {
+    "gamepad": (
+        controller.GamepadController, gamepad_events,
+        gamepad_events.GamepadInputEvent, gamepad_frames),
+    "mouse": (
+        controller.MouseController, mouse_events,
+        mouse_events.MouseInputEvent, mouse_frames),
+    "trackpad": (
+        controller.TrackpadController, trackpad_events,
+        trackpad_events.TrackpadInputEvent, trackpad_frames),
+}
+
+
+def make_stub_robot():
+    return robot.RobotStub(), None
+
+
+def make_pca9685_robot():
+    bus = simulation.SimulatedController()
+    i2c.set_controller(bus)
+    servos = [
+        joint.ServoJointController(channel)
+        for channel in joint.PwmChannel.from_channel_numbers((0, 1, 2, 3))
+    ]
+    lego_robot = robot.ThreeDofLegoRobot(
+        joints=servos[0:3], grasper=LegoServoGrasper(servos[-1]))
+    lego_robot.home().wait()
+    return lego_robot, bus
+
+
+ROBOTS = {
+    "stub": make_stub_robot,
+    "pca9685": make_pca9685_robot,
+}
+
+
+def percentile(ordered, value):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * value / 100.0))]
+
+
+def run(controller_name, robot_name, frames):
+    controller_class, events, event_base, make_frames = \
+        CONTROLLERS[controller_name]
+    target, i2c_bus = ROBOTS[robot_name]()
+    motion_loop = MotionLoop(target)
+    bus = base.EventBus()
+    controller_class(motion_loop, bus).register_handlers(events)
+    device = SyntheticDevice(make_frames())
+    stream = base.InputStream(
+        device, event_base.from_raw_input_event, bus, shed_load=False)
+    if i2c_bus:
+        i2c_bus.reset_statistics()
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(frames):
+        frame_start = time.perf_counter()
+        stream.process()
+        motion_loop.tick()
+        latencies.append(time.perf_counter() - frame_start)
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "events_per_sec": device.events_read / elapsed,
+        "p50_latency_us": percentile(latencies, 50) * 1e6,
+        "p99_latency_us": percentile(latencies, 99) * 1e6,
+        "transactions_per_frame":
+            i2c_bus.transactions / frames if i2c_bus else 0.0,
+        "bytes_per_frame": i2c_bus.bytes_written / frames if i2c_bus else 0.0,
+        "bus_time_per_frame_us":
+            i2c_bus.bus_time / frames * 1e6 if i2c_bus else 0.0,
+    }
+
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    for name, result in sorted(results.items()):
+        expected = baseline.get(name)
+        if expected is None:
+            continue
+        if result["events_per_sec"] \
+                < expected["events_per_sec"] * (1.0 - tolerance):
+            regressions.append(
+                "%s: %.0f events/s is below the baseline of %.0f" % (
+                    name, result["events_per_sec"],
+                    expected["events_per_sec"]))
+        for key in (
+                "transactions_per_frame", "bytes_per_frame",
+                "bus_time_per_frame_us"):
+            if key in expected and result[key] > expected[key] + 1e-3:
+                regressions.append(
+                    "%s: %s rose from %.3f to %.3f" % (
+                        name, key, expected[key], result[key]))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=20000)
+    parser.add_argument("--save", action="store_true",
+                        help="record the results as the new baseline")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed fractional drop in throughput")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    results = {}
+    for controller_name in CONTROLLERS:
+        for robot_name in ROBOTS:
+            name = "%s/%s" % (controller_name, robot_name)
+            results[name] = result = run(
+                controller_name, robot_name, args.frames)
+            print(
+                "{:<18} {:>9.0f} events/s  p50 {:>7.1f} us  "
+                "p99 {:>7.1f} us  {:>5.2f} i2c/frame  {:>5.2f} B/frame  "
+                "{:>7.1f} us bus/frame".format(
+                    name, result["events_per_sec"], result["p50_latency_us"],
+                    result["p99_latency_us"],
+                    result["transactions_per_frame"],
+                    result["bytes_per_frame"],
+                    result["bus_time_per_frame_us"]))
+    if args.save:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w") as stream:
+            rounded = {
+                name: {key: round(value, 3) for key, value in result.items()}
+                for name, result in results.items()
+            }
+            json.dump(rounded, stream, indent=2, sort_keys=True)
+            stream.write("\n")
+        print("Saved baseline to %s" % args.baseline)
+        return 0
+    if not os.path.exists(args.baseline):
+        print("No baseline at %s. Run with --save." % args.baseline)
+        return 0
+    with open(args.baseline) as stream:
+        regressions = compare(results, json.load(stream), args.tolerance)
+    for regression in regressions:
+        print("REGRESSION %s" % regression)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+"""
+Benchmark driving servos through `ServoJointController` and `PwmChannel` on
+the simulated FT232H/PCA9685 backend. Three joints are swept through a range
+of angles and updated either
+
+    per-joint  by setting each joint's angle in turn
+    batched    by setting all of them at once with `set_angles`
+
+For each the CPU throughput, the I2C transactions and bytes per update and the
+bus time per update (with the maximum update rate the bus would allow) are
+reported. Bus time is modelled from the FTDI USB latency and I2C clock which
+may be varied.
+
+The time to convert a planned trajectory of every joint to duty cycles with a
+calibration table is also reported, converting angles one at a time and each
+joint's angles in a single numpy call.
+
+    $ python benchmarks/bench_servo.py --usb-latency 250e-6 --clock 400e3
+"""
+import argparse
+import logging
+import math
+import time
+
+from daveshed.adafruit import calibration
+from daveshed.adafruit import i2c
+from daveshed.adafruit import joint
+from daveshed.adafruit import simulation
+from daveshed.legobot import trajectory
+from daveshed.legobot.joint import set_angles
+
+# a servo that is measured to be non-linear towards its ends
+CALIBRATION = calibration.ServoCalibration(
+    angles=(0.0, 30.0, 90.0, 150.0, 180.0),
+    ticks=(120.0, 190.0, 307.0, 425.0, 490.0))
+
+
+def make_servos(controller):
+    i2c.set_controller(controller)
+    return [
+        joint.ServoJointController(channel)
+        for channel in joint.PwmChannel.from_channel_numbers((0, 1, 2))
+    ]
+
+
+def sweep(updates, joints):
+    # each joint sweeps +/-30 degrees about its home angle out of phase
+    return [
+        [
+            90.0 + 30.0 * math.sin(
+                2.0 * math.pi * (idx / 200.0 + offset / 3.0))
+            for offset in range(joints)
+        ]
+        for idx in range(updates)
+    ]
+
+
+def update_per_joint(servos, angles):
+    for servo, angle in zip(servos, angles):
+        servo.angle = angle
+
+
+def update_batched(servos, angles):
+    set_angles(dict(zip(servos, angles)))
+
+
+def run(name, update, updates, timing):
+    controller = simulation.SimulatedController(timing)
+    servos = make_servos(controller)
+    setpoints = sweep(updates, len(servos))
+    controller.reset_statistics()
+    start = time.perf_counter()
+    for angles in setpoints:
+        update(servos, angles)
+    elapsed = time.perf_counter() - start
+    bus_time = controller.bus_time / updates
+    print(
+        "{:<10} {:>8.0f} updates/s cpu  {:>5.2f} i2c/update  "
+        "{:>5.2f} B/update  {:>7.1f} us bus/update  "
+        "{:>6.0f} updates/s bus".format(
+            name, updates / elapsed, controller.transactions / updates,
+            controller.bytes_written / updates, bus_time * 1e6,
+            1.0 / bus_time if bus_time else float("inf")))
+
+
+def convert_trajectory(name, convert, repeats):
+    samples = trajectory.plan_move((0.0, 45.0, 90.0), (180.0, 135.0, 30.0))
+    columns = samples.T
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for column in columns:
+            convert(column)
+    elapsed = (time.perf_counter() - start) / repeats
+    print("{:<10} {:>8.1f} us per trajectory of {} setpoints".format(
+        name, elapsed * 1e6, len(samples)))
+
+
+def convert_one_at_a_time(angles):
+    return [CALIBRATION.duty_cycle(angle) for angle in angles.tolist()]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--updates", type=int, default=20000)
+    parser.add_argument("--usb-latency", type=float, default=250e-6,
+                        help="USB round trip per transaction in seconds")
+    parser.add_argument("--clock", type=float, default=100e3,
+                        help="I2C clock frequency in Hz")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    timing = simulation.BusTiming(args.usb_latency, args.clock)
+    run("per-joint", update_per_joint, args.updates, timing)
+    run("batched", update_batched, args.updates, timing)
+    convert_trajectory("scalar", convert_one_at_a_time, 1000)
+    convert_trajectory("numpy", CALIBRATION.duty_cycles, 1000)
+
+
+if __name__ == "__main__":
+    main()
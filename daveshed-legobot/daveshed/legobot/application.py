@@ -3,15 +3,25 @@ Application class definitions
 """
 import abc
 
+from daveshed.legobot import metrics
+from daveshed.legobot import profiler
+from daveshed.legobot.events.base import EventBus
+from daveshed.legobot.events.base import InputStream
 from daveshed.legobot.events.base import UserInputEventConsumer
+from daveshed.legobot.events.multiplexer import InputMultiplexer
+from daveshed.legobot.motion import MotionLoop
 
 
 class AbstractApplicationFactory(abc.ABC):
     """
-    Abstract factory required by the application class to create dependencies
+    Abstract factory required by the application class to create dependencies.
+    Each factory has its own event bus so that several applications may run in
+    one process without their handlers interfering.
     """
     def __init__(self):
+        self._bus = EventBus()
         self._robot = self._make_robot()
+        self._motion_loop = MotionLoop(self._robot, daemon=True)
 
     # pylint: disable=too-few-public-methods
     def make_event_consumer(self):
@@ -23,12 +33,36 @@ class AbstractApplicationFactory(abc.ABC):
         return UserInputEventConsumer(
             device=self._make_user_input_device(),
             parser=self._get_parser(),
+            bus=self._bus,
             daemon=True)
 
+    def make_input_stream(self):
+        """
+        Make a stream of the events from the user input device that are
+        published to this factory's bus. Streams from several factories may
+        be served by a single `InputMultiplexer`.
+
+        Returns:
+            daveshed.legobot.events.base.InputStream: the stream
+        """
+        self._register_controller()
+        return InputStream(
+            device=self._make_user_input_device(),
+            parser=self._get_parser(),
+            bus=self._bus)
+
+    @property
+    def bus(self):
+        return self._bus
+
     @property
     def robot(self):
         return self._robot
 
+    @property
+    def motion_loop(self):
+        return self._motion_loop
+
     @abc.abstractmethod
     def _register_controller(self):
         return
@@ -57,16 +91,135 @@ class Application:
         factory (daveshed.legobot.application.AbstractApplicationFactory):
             a concrete instance of an application factory that creates
             dependencies.
+        metrics_address (tuple or str): the (host, port) or unix socket path
+            that metrics are served from in the Prometheus text format while
+            the application runs or None to not serve them. See
+            `daveshed.legobot.metrics`.
+        profile_rate (float): the rate in Hz at which the event consumer and
+            control loop threads are sampled while profiling
     """
-    def __init__(self, factory):
+    def __init__(self, factory, metrics_address=None,
+                 profile_rate=profiler.DEFAULT_RATE_HZ):
         self._robot = factory.robot
+        self._motion_loop = factory.motion_loop
         self._event_consumer = factory.make_event_consumer()
+        self._metrics = make_metrics(
+            self._event_consumer.stream, factory.bus, self._robot)
+        self._metrics_server = None if metrics_address is None else \
+            metrics.MetricsServer(
+                metrics_address,
+                registries=(self._metrics, metrics.DEFAULT_REGISTRY))
+        self._profiler = profiler.SamplingProfiler(
+            (self._event_consumer, self._motion_loop), profile_rate)
+
+    @property
+    def metrics(self):
+        """
+        The application's metrics
+
+        Returns:
+            daveshed.legobot.metrics.Registry: the metrics
+        """
+        return self._metrics
+
+    @property
+    def profiler(self):
+        """
+        A sampling profiler for the event consumer and control loop threads.
+        It is stopped until started or toggled eg. on a signal with its
+        `install_signal_handler`.
+
+        Returns:
+            daveshed.legobot.profiler.SamplingProfiler: the profiler
+        """
+        return self._profiler
 
     def start(self):
         """Start the application"""
+        if self._metrics_server is not None:
+            self._metrics_server.start()
+        self._motion_loop.start()
         self._event_consumer.start()
 
     def terminate(self):
         """Graceful teardown the application"""
-        self._robot.home()
+        self._motion_loop.terminate()
+        self._robot.home().wait()
         self._event_consumer.terminate()
+        self._profiler.stop()
+        if self._metrics_server is not None:
+            self._metrics_server.stop()
+
+
+class MultiplexedApplication:
+    """
+    Runs several robot applications in one process. Each factory's robot is
+    driven by its own controller and motion loop while the input devices of
+    all of them are served by a single thread.
+
+    Args:
+        factories (iterable): concrete instances of
+            `daveshed.legobot.application.AbstractApplicationFactory`
+    """
+    def __init__(self, factories):
+        self._factories = list(factories)
+        streams = [factory.make_input_stream() for factory in self._factories]
+        self._multiplexer = InputMultiplexer(streams=streams, daemon=True)
+
+    def start(self):
+        """Start the application"""
+        for factory in self._factories:
+            factory.motion_loop.start()
+        self._multiplexer.start()
+
+    def terminate(self):
+        """Graceful teardown the application"""
+        for factory in self._factories:
+            factory.motion_loop.terminate()
+        for handle in [factory.robot.home() for factory in self._factories]:
+            handle.wait()
+        self._multiplexer.terminate()
+
+
+def make_metrics(stream, bus, robot):
+    """
+    Make the metrics for the pipeline from an input stream to a robot. Every
+    value is read when the metrics are scraped.
+
+    Args:
+        stream (daveshed.legobot.events.base.InputStream): the input stream
+        bus (daveshed.legobot.events.base.EventBus): the bus that the stream
+            publishes events to
+        robot (daveshed.legobot.robot.Robot): the robot
+
+    Returns:
+        daveshed.legobot.metrics.Registry: the metrics
+    """
+    registry = metrics.Registry()
+    registry.counter(
+        "legobot_input_events_read_total",
+        "Raw events read from the input device",
+        function=lambda: stream.events_read)
+    registry.counter(
+        "legobot_input_events_parsed_total",
+        "Events parsed from raw input events",
+        function=lambda: stream.events_parsed)
+    registry.counter(
+        "legobot_input_events_dropped_total",
+        "Stale motion events dropped to catch up with the input device",
+        function=lambda: stream.dropped_events)
+    registry.counter(
+        "legobot_handler_calls_total",
+        "Calls to event handlers",
+        function=lambda: bus.handler_calls)
+    for idx in range(len(robot.joint_angles)):
+        registry.gauge(
+            "legobot_joint_angle_degrees",
+            "The angle of each joint",
+            labels={"joint": idx},
+            function=lambda idx=idx: robot.joint_angles[idx])
+    registry.gauge(
+        "legobot_grasper_open",
+        "Whether the grasper is open",
+        function=lambda: robot.grasper_open)
+    return registry
@@ -0,0 +1,151 @@
+"""
+An asyncio runtime for the application that runs alongside the threaded
+`daveshed.legobot.application.Application`. The input device is read whenever
+the event loop reports it readable, the motion control loop is a task and
+robot commands are queued so that everything runs on a single thread. Nothing
+ever blocks waiting for input so shutdown is prompt and other tasks such as
+telemetry may share the same event loop.
+"""
+import asyncio
+import logging
+
+from daveshed.legobot import trajectory
+from daveshed.legobot.trajectory import TrajectoryHandle
+
+_LOGGER = logging.getLogger("ASYNC_APPLICATION")
+
+
+class AsyncApplication:
+    """
+    The robot controller application on an asyncio event loop. The factory's
+    motion loop accumulates setpoints from the controller as it does in the
+    threaded application but it is ticked by a task rather than its own
+    thread.
+
+        asyncio.run(AsyncApplication(factory).run())
+
+    Args:
+        factory (daveshed.legobot.application.AbstractApplicationFactory):
+            a concrete instance of an application factory that creates
+            dependencies. Its input device must be backed by an evdev
+            character device.
+
+    Raises:
+        ValueError: if the input device cannot be watched by the event loop
+    """
+    def __init__(self, factory):
+        self._motion_loop = factory.motion_loop
+        self._stream = factory.make_input_stream()
+        if self._stream.fileno() is None:
+            raise ValueError(
+                "%r has no file descriptor to watch" % self._stream.device)
+        self._commands = asyncio.Queue()
+        self._finished = None
+
+    async def run(self):
+        """
+        Run the application until it is stopped, cancelled or the input device
+        is closed. The robot is homed on the way out.
+        """
+        loop = asyncio.get_running_loop()
+        self._finished = loop.create_future()
+        loop.add_reader(self._stream.fileno(), self._read_input)
+        tasks = [
+            asyncio.create_task(self._control()),
+            asyncio.create_task(self._execute_commands()),
+        ]
+        try:
+            await self._finished
+        finally:
+            loop.remove_reader(self._stream.fileno())
+            self._stream.summarise_dropped()
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await self._follow(self._motion_loop.home())
+            _LOGGER.info("Application finished")
+
+    def stop(self):
+        """Make `run` return once the robot has been homed"""
+        if self._finished is not None and not self._finished.done():
+            self._finished.set_result(None)
+
+    async def submit(self, command):
+        """
+        Queue a command for the robot and wait for it to be carried out.
+        Commands are carried out one at a time in the order they were queued.
+        If the caller is cancelled while a trajectory started by the command
+        is being followed, the trajectory is cancelled too.
+
+        Args:
+            command (callable): takes the robot and may return a
+                `daveshed.legobot.trajectory.TrajectoryHandle` for a move that
+                is followed in the background
+
+        Returns:
+            obj: whatever the command returned once it has been carried out
+        """
+        done = asyncio.get_running_loop().create_future()
+        self._commands.put_nowait((command, done))
+        return await done
+
+    async def home(self):
+        """
+        Home the robot. Cancelling the caller stops the robot where it is.
+        """
+        await self.submit(lambda robot: robot.home())
+
+    def _read_input(self):
+        try:
+            self._stream.process()
+        except EOFError as error:
+            _LOGGER.info("No more events: %s", error)
+            self.stop()
+        except OSError as error:
+            if not self._finished.done():
+                self._finished.set_exception(error)
+
+    async def _control(self):
+        loop = asyncio.get_running_loop()
+        period = self._motion_loop.period
+        deadline = loop.time()
+        while True:
+            self._motion_loop.tick()
+            deadline += period
+            delay = deadline - loop.time()
+            if delay < 0.0:
+                _LOGGER.debug("Control loop overran by %fs", -delay)
+                deadline = loop.time()
+                delay = 0.0
+            await asyncio.sleep(delay)
+
+    async def _execute_commands(self):
+        while True:
+            command, done = await self._commands.get()
+            if done.cancelled():
+                continue
+            try:
+                result = command(self._motion_loop)
+                if isinstance(result, TrajectoryHandle):
+                    await self._follow(result, done)
+            # pylint: disable=broad-except
+            except Exception as error:
+                if not done.done():
+                    done.set_exception(error)
+                continue
+            if not done.done():
+                done.set_result(result)
+
+    @staticmethod
+    async def _follow(handle, done=None):
+        # trajectories are followed by a background thread so poll the handle
+        # once per setpoint rather than block the event loop waiting on it.
+        try:
+            while not handle.done():
+                if done is not None and done.cancelled():
+                    handle.cancel()
+                    return
+                await asyncio.sleep(trajectory.PERIOD_SEC)
+        except asyncio.CancelledError:
+            handle.cancel()
+            raise
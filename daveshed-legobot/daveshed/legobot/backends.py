@@ -0,0 +1,133 @@
+"""
+A registry of hardware backends that provide joint controllers. Backends are
+looked up by name and only imported when they are first needed so that the
+hardware libraries (and the hardware itself) are not required to import the
+application or run it against a robot stub.
+
+Packages advertise backends with an entry point in the
+`daveshed.legobot.joint_backends` group that names a callable taking channel
+numbers and returning a joint controller for each, eg. in setup.py
+
+    entry_points={
+        "daveshed.legobot.joint_backends": [
+            "adafruit = daveshed.adafruit.joint:make_servo_joints",
+        ],
+    }
+
+Backends may also be registered at runtime with `register`.
+"""
+import importlib
+import logging
+import threading
+
+_LOGGER = logging.getLogger("BACKENDS")
+
+ENTRY_POINT_GROUP = "daveshed.legobot.joint_backends"
+DEFAULT_BACKEND = "adafruit"
+
+# used when the package providing a backend is installed without its entry
+# points eg. from a source tree that has not been reinstalled.
+_BUILTIN = {
+    "adafruit": "daveshed.adafruit.joint:make_servo_joints",
+}
+_REGISTERED = {}
+_LOADED = {}
+_LOCK = threading.Lock()
+
+
+def register(name, backend):
+    """
+    Register a backend
+
+    Args:
+        name (str): the name that the backend is loaded by
+        backend (callable or str): a callable that takes channel numbers and
+            returns joint controllers or a "module:attribute" reference to one
+            that is imported when first loaded
+    """
+    with _LOCK:
+        _REGISTERED[name] = backend
+        _LOADED.pop(name, None)
+
+
+def available():
+    """
+    The names of all backends that may be loaded
+
+    Returns:
+        list: the backend names
+    """
+    names = set(_BUILTIN) | set(_REGISTERED)
+    names.update(entry_point.name for entry_point in _entry_points())
+    return sorted(names)
+
+
+def load(name=DEFAULT_BACKEND):
+    """
+    Load a backend importing it if this is the first time that it is needed
+
+    Args:
+        name (str): the backend name
+
+    Returns:
+        callable: takes an iterable of channel numbers and returns a list of
+            `daveshed.legobot.joint.JointControllerBase`s
+
+    Raises:
+        LookupError: if there is no backend with the given name
+    """
+    try:
+        return _LOADED[name]
+    except KeyError:
+        pass
+    with _LOCK:
+        if name not in _LOADED:
+            _LOADED[name] = _resolve(_find(name))
+            _LOGGER.info("Loaded %s joint backend", name)
+        return _LOADED[name]
+
+
+def make_joints(channels, name=DEFAULT_BACKEND):
+    """
+    Make joint controllers with a backend
+
+    Args:
+        channels (iterable): the channel numbers that joints are attached to
+        name (str): the backend name
+
+    Returns:
+        list: a `daveshed.legobot.joint.JointControllerBase` per channel
+    """
+    return list(load(name)(channels))
+
+
+def _find(name):
+    if name in _REGISTERED:
+        return _REGISTERED[name]
+    for entry_point in _entry_points():
+        if entry_point.name == name:
+            return entry_point
+    if name in _BUILTIN:
+        return _BUILTIN[name]
+    raise LookupError(
+        "No joint backend named %r. Available: %s" % (
+            name, ", ".join(available())))
+
+
+def _resolve(backend):
+    if hasattr(backend, "load"):
+        return backend.load()
+    if isinstance(backend, str):
+        module_name, _, attribute = backend.partition(":")
+        return getattr(importlib.import_module(module_name), attribute)
+    return backend
+
+
+def _entry_points():
+    # importlib.metadata is slow to import so wait until a backend is needed
+    # pylint: disable=import-outside-toplevel
+    from importlib import metadata
+    entry_points = metadata.entry_points()
+    if hasattr(entry_points, "select"):
+        return list(entry_points.select(group=ENTRY_POINT_GROUP))
+    return list(entry_points.get(ENTRY_POINT_GROUP, []))
@@ -4,7 +4,11 @@ and map them to commands applied to a robot.
 """
 import logging
 
+from daveshed.legobot import logs
+from daveshed.legobot.events.base import DEFAULT_BUS
+
 _LOGGER = logging.getLogger("CONTROLLER")
+_HOT_PATH_LOGGER = logs.HotPathLogger(_LOGGER)
 
 
 class RobotControllerBase:
@@ -16,9 +20,26 @@ class RobotControllerBase:
 
     Args:
         robot (daveshed.legobot.robot.Robot): a robot that will be controlled
+        bus (daveshed.legobot.events.base.EventBus): the bus that handlers are
+            subscribed to. Defaults to the bus used by the class level handler
+            registration.
+
+    Attributes:
+        MOVEMENT_THRESHOLD (float): below this value a movement is ignored
+        SENSITIVITY (float): multiplies displacements to control sensitivity
     """
-    def __init__(self, robot):
+    MOVEMENT_THRESHOLD = 1
+    SENSITIVITY = 1
+
+    def __init__(self, robot, bus=None):
         self._robot = robot
+        self._bus = DEFAULT_BUS if bus is None else bus
+        self._subscriptions = []
+        self._relative_moves = {
+            "X": robot.move_x,
+            "Y": robot.move_y,
+            "Z": robot.move_z,
+        }
         self.position = None
 
     @property
@@ -41,11 +62,7 @@ class RobotControllerBase:
             value (float): the relative change read from the controller which
                 will be mapped to the robot's speed of movement
         """
-        {
-            "X": self.robot.move_x,
-            "Y": self.robot.move_y,
-            "Z": self.robot.move_z,
-        }[axis](value)
+        self._relative_moves[axis](value)
 
     def handle_absolute_position(self, axis, value):
         """
@@ -69,7 +86,7 @@ class RobotControllerBase:
         """
         Notify the controller that an absolute position update has begun.
         """
-        _LOGGER.debug("Starting absolute movement")
+        _HOT_PATH_LOGGER.debug("Starting absolute movement")
         self.position = _AbsolutePositionValues()
 
     def handle_absolute_complete(self):
@@ -77,7 +94,7 @@ class RobotControllerBase:
         Notify the controller that the absolute position update that it is
         handling has completed.
         """
-        _LOGGER.debug("Absolute movement complete")
+        _HOT_PATH_LOGGER.debug("Absolute movement complete")
         self.position = None
 
     def register_handlers(self, events):
@@ -90,6 +107,19 @@ class RobotControllerBase:
         """
         raise NotImplementedError
 
+    def deregister_handlers(self):
+        """
+        Deregister all handlers registered by this controller leaving those of
+        any other subscribers to the bus in place.
+        """
+        for event_class, handler in self._subscriptions:
+            self._bus.unsubscribe(event_class, handler)
+        self._subscriptions = []
+
+    def _subscribe(self, event_class, handler):
+        self._subscriptions.append((event_class, handler))
+        self._bus.subscribe(event_class, handler)
+
 
 class GamepadController(RobotControllerBase):
     """
@@ -103,25 +133,33 @@ class GamepadController(RobotControllerBase):
         self._register_grasper_handlers(events)
 
     def _register_for_xy_movements(self, events):
-        events.UpDpadPressed.register_handler(
+        self._subscribe(
+            events.UpDpadPressed,
             lambda _: self.handle_relative_position("Y", 1))
-        events.DownDpadPressed.register_handler(
+        self._subscribe(
+            events.DownDpadPressed,
             lambda _: self.handle_relative_position("Y", -1))
-        events.LeftDpadPressed.register_handler(
+        self._subscribe(
+            events.LeftDpadPressed,
             lambda _: self.handle_relative_position("X", -1))
-        events.RightDpadPressed.register_handler(
+        self._subscribe(
+            events.RightDpadPressed,
             lambda _: self.handle_relative_position("X", 1))
 
     def _register_for_z_movements(self, events):
-        events.XButtonPressed.register_handler(
+        self._subscribe(
+            events.XButtonPressed,
             lambda _: self.handle_relative_position("Z", 1))
-        events.BButtonPressed.register_handler(
+        self._subscribe(
+            events.BButtonPressed,
             lambda _: self.handle_relative_position("Z", -1))
 
     def _register_grasper_handlers(self, events):
-        events.YButtonPressed.register_handler(
+        self._subscribe(
+            events.YButtonPressed,
             lambda _: self.robot.open_grasper())
-        events.YButtonReleased.register_handler(
+        self._subscribe(
+            events.YButtonReleased,
             lambda _: self.robot.close_grasper())
 
 
@@ -143,22 +181,27 @@ class MouseController(RobotControllerBase):
         self._register_grasper_handlers(events)
 
     def _register_for_relative_movements(self, events):
-        events.MouseMovedX.register_handler(
+        self._subscribe(
+            events.MouseMovedX,
             lambda event: self._handle_xy_position_update("X", event.delta))
-        events.MouseMovedY.register_handler(
+        self._subscribe(
+            events.MouseMovedY,
             lambda event: self._handle_xy_position_update("Y", event.delta))
-        events.WheelMoved.register_handler(
+        self._subscribe(
+            events.WheelMoved,
             lambda event: self.handle_relative_position("Z", event.delta))
 
     def _register_grasper_handlers(self, events):
-        events.LeftButtonClicked.register_handler(
+        self._subscribe(
+            events.LeftButtonClicked,
             lambda _: self.robot.open_grasper())
-        events.LeftButtonReleased.register_handler(
+        self._subscribe(
+            events.LeftButtonReleased,
             lambda _: self.robot.close_grasper())
 
     def _handle_xy_position_update(self, axis, delta):
         if abs(delta) < self.MOVEMENT_THRESHOLD:
-            _LOGGER.debug("Movement below threshold. Ignored.")
+            _HOT_PATH_LOGGER.debug("Movement below threshold. Ignored.")
             return
         self.handle_relative_position(axis, delta * self.SENSITIVITY)
 
@@ -175,64 +218,63 @@ class TrackpadController(RobotControllerBase):
     MOVEMENT_THRESHOLD = 3.0
     SENSITIVITY = 0.05
 
+    def __init__(self, robot, bus=None):
+        super().__init__(robot, bus)
+        # since only one trackpad is available that has two degrees of freedom,
+        # the right button changes the mode so that y movement maps to z
+        self._vertical_axis = "Y"
+
     def register_handlers(self, events):
         _LOGGER.debug("Registering handlers for %r", events)
-        _AbsolutePositionUpdate.sensitivity = self.SENSITIVITY
-        _AbsolutePositionUpdate.movement_threshold = self.MOVEMENT_THRESHOLD
         self._register_for_absolute_movements(events)
         self._register_movement_mode_handlers(events)
         self._register_grasper_handlers(events)
-        self._set_xy_movement_mode(events)
 
-    def _set_xy_movement_mode(self, events):
-        self._deregister_z_movement_handlers(events)
-        self._register_xy_movement_handlers(events)
+    def _set_xy_movement_mode(self):
+        self._vertical_axis = "Y"
 
-    def _set_z_movement_mode(self, events):
-        self._deregister_xy_movement_handlers(events)
-        self._register_z_movement_handlers(events)
+    def _set_z_movement_mode(self):
+        self._vertical_axis = "Z"
 
     def _register_for_absolute_movements(self, events):
         # trackpads emit absolute position updates after a button touch event
         # which are followed by another button touch event when the user takes
         # their finger of the device.
-        events.PadTouched.register_handler(
+        self._subscribe(
+            events.PadTouched,
             lambda _: self.handle_absolute_start())
-        events.PadReleased.register_handler(
+        self._subscribe(
+            events.PadReleased,
             lambda _: self.handle_absolute_complete())
+        self._subscribe(events.TrackpadMovedX, self._handle_x_position)
+        self._subscribe(
+            events.TrackpadMovedY,
+            lambda event: self.handle_absolute_position(
+                self._vertical_axis, event.position))
 
-    def _register_xy_movement_handlers(self, events):
-        events.TrackpadMovedX.register_handler(
-            lambda event: self.handle_absolute_position("X", event.position))
-        events.TrackpadMovedY.register_handler(
-            lambda event: self.handle_absolute_position("Y", event.position))
-
-    @staticmethod
-    def _deregister_xy_movement_handlers(events):
-        events.TrackpadMovedX.deregister_handler()
-        events.TrackpadMovedY.deregister_handler()
-
-    def _register_z_movement_handlers(self, events):
-        # since only one trackpad is available that has two degrees of freedom,
-        # we need to change mode using the right button to enable z movment mode
-        events.TrackpadMovedY.register_handler(
-            lambda event: self.handle_absolute_position("Z", event.position))
-
-    @staticmethod
-    def _deregister_z_movement_handlers(events):
-        events.TrackpadMovedY.deregister_handler()
+    def _handle_x_position(self, event):
+        # x movement is ignored while the right button maps y movement to z
+        if self._vertical_axis == "Y":
+            self.handle_absolute_position("X", event.position)
 
     def _register_grasper_handlers(self, events):
-        events.LeftButtonClicked.register_handler(
+        self._subscribe(
+            events.LeftButtonClicked,
             lambda _: self.robot.open_grasper())
-        events.LeftButtonReleased.register_handler(
+        self._subscribe(
+            events.LeftButtonReleased,
             lambda _: self.robot.close_grasper())
 
     def _register_movement_mode_handlers(self, events):
-        events.RightButtonClicked.register_handler(
-            lambda _: self._set_z_movement_mode(events))
-        events.RightButtonReleased.register_handler(
-            lambda _: self._set_xy_movement_mode(events))
+        # switching mode only flips an attribute so that no subscriptions
+        # change (and no lock is taken) while the device is in use.
+        self._subscribe(
+            events.RightButtonClicked,
+            lambda _: self._set_z_movement_mode())
+        self._subscribe(
+            events.RightButtonReleased,
+            lambda _: self._set_xy_movement_mode())
+
 
 class _AbsolutePositionValues:
     # pylint: disable=missing-docstring
@@ -262,35 +304,33 @@ class _AbsolutePositionValues:
 
 class _AbsolutePositionUpdate:
     # pylint: disable=missing-docstring
-    movement_threshold = 1
-    sensitivity = 1
+    def __init__(self, controller, new_position):
+        self._new_position = new_position
+        self._movement_threshold = controller.MOVEMENT_THRESHOLD
+        self._sensitivity = controller.SENSITIVITY
 
     @staticmethod
     def from_axis_specifier(axis):
-        return {
-            "X": _XUpdate,
-            "Y": _YUpdate,
-            "Z": _ZUpdate,
-        }[axis]
+        return _AXIS_UPDATES[axis]
 
     def execute(self):
-        _LOGGER.debug("Updating position")
+        _HOT_PATH_LOGGER.debug("Updating position")
         # getters/setters will be specified in the init of each command.
         # pylint: disable=no-member
         if self._get_position() is None:
             pass
         else:
             delta = self._new_position - self._get_position()
-            if abs(delta) < self.sensitivity:
+            if abs(delta) < self._movement_threshold:
                 return
-            self._move_robot(delta * self.sensitivity)
+            self._move_robot(delta * self._sensitivity)
         self._set_position(self._new_position)
 
 
 class _XUpdate(_AbsolutePositionUpdate):
     # pylint: disable=missing-docstring
     def __init__(self, controller, x_new):
-        self._new_position = x_new
+        super().__init__(controller, x_new)
         self._get_position = controller.position.get_x
         self._set_position = controller.position.set_x
         self._move_robot = controller.robot.move_x
@@ -299,7 +339,7 @@ class _XUpdate(_AbsolutePositionUpdate):
 class _YUpdate(_AbsolutePositionUpdate):
     # pylint: disable=missing-docstring
     def __init__(self, controller, y_new):
-        self._new_position = y_new
+        super().__init__(controller, y_new)
         self._get_position = controller.position.get_y
         self._set_position = controller.position.set_y
         self._move_robot = controller.robot.move_y
@@ -308,7 +348,14 @@ class _YUpdate(_AbsolutePositionUpdate):
 class _ZUpdate(_AbsolutePositionUpdate):
     # pylint: disable=missing-docstring
     def __init__(self, controller, z_new):
-        self._new_position = z_new
+        super().__init__(controller, z_new)
         self._get_position = controller.position.get_z
         self._set_position = controller.position.set_z
         self._move_robot = controller.robot.move_z
+
+
+_AXIS_UPDATES = {
+    "X": _XUpdate,
+    "Y": _YUpdate,
+    "Z": _ZUpdate,
+}
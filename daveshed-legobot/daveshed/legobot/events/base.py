@@ -1,23 +1,170 @@
 """
 User interface input event definitions and base classes
 """
+import io
 import logging
+import os
 import threading
 import time
 
 import inputs
 
+from daveshed.legobot import instrumentation
+from daveshed.legobot import logs
+
 _LOGGER = logging.getLogger("INPUT")
+_HOT_PATH_LOGGER = logs.HotPathLogger(_LOGGER)
+
+# matches a raw event code regardless of its state when used in a route
+ANY_STATE = object()
+
+
+class _RouteTable(dict):
+    """
+    Maps the (ev_type, code, state) of a raw input event to the event class it
+    is parsed into, or to None if the event is ignored. Routes for a specific
+    state are held in the table itself. Routes that match any state are looked
+    up by (ev_type, code) when the state is not in the table. They are never
+    added to the table, nor are events without a route, so that devices whose
+    states change with every event eg. timestamps or multi-touch slots do not
+    grow it without bound.
+
+    Args:
+        routes (dict): maps (ev_type, code, state) to an event class. The state
+            may be `ANY_STATE`.
+        event_types (iterable): all raw event types the device may report
+    """
+    def __init__(self, routes, event_types):
+        super().__init__()
+        self._event_types = frozenset(event_types)
+        self._any_state_routes = {}
+        for (ev_type, code, state), event_class in routes.items():
+            if state is ANY_STATE:
+                self._any_state_routes[(ev_type, code)] = event_class
+            else:
+                self[(ev_type, code, state)] = event_class
+
+    def __missing__(self, key):
+        ev_type, code, _ = key
+        event_class = self._any_state_routes.get((ev_type, code))
+        if event_class is None and ev_type not in self._event_types:
+            raise AssertionError("Unknown event type %r" % (key,))
+        return event_class
+
+
+class EventBus:
+    """
+    Dispatches consumed events to the handlers subscribed to their class. Each
+    bus has its own subscriptions so that several devices and robots may be
+    driven independently in one process.
+
+    Subscriptions are held in a mapping of event class to a tuple of handlers
+    that is never modified in place. Any change builds a new mapping under a
+    lock and swaps it in so that dispatch reads it without taking the lock.
+    """
+    def __init__(self):
+        self._subscriptions = {}
+        self._lock = threading.Lock()
+        self._handler_calls = 0
+
+    @property
+    def handler_calls(self):
+        """
+        The number of times that a handler has been called with an event
+
+        Returns:
+            int: the number of calls
+        """
+        return self._handler_calls
+
+    def subscribe(self, event_class, handler, exclusive=False):
+        """
+        Subscribe a callback to events of the given class. Handlers are called
+        in the order that they were subscribed.
+
+        Args:
+            event_class (type): the event class
+            handler (callable): the callback that takes the event
+            exclusive (bool): replace any handlers already subscribed
+
+        Returns:
+            callable: the handler which may be used to unsubscribe
+        """
+        with self._lock:
+            subscriptions = dict(self._subscriptions)
+            handlers = () if exclusive else subscriptions.get(event_class, ())
+            subscriptions[event_class] = handlers + (handler,)
+            self._subscriptions = subscriptions
+        return handler
+
+    def unsubscribe(self, event_class, handler=None):
+        """
+        Unsubscribe a callback from events of the given class. Unknown
+        handlers are ignored.
+
+        Args:
+            event_class (type): the event class
+            handler (callable): the callback to remove or None to remove all
+                handlers for the event class
+        """
+        with self._lock:
+            handlers = self._subscriptions.get(event_class, ())
+            remaining = () if handler is None else tuple(
+                each for each in handlers if each is not handler)
+            if remaining == handlers:
+                return
+            subscriptions = dict(self._subscriptions)
+            if remaining:
+                subscriptions[event_class] = remaining
+            else:
+                del subscriptions[event_class]
+            self._subscriptions = subscriptions
+
+    def handlers(self, event_class):
+        """
+        The callbacks subscribed to events of the given class
+
+        Args:
+            event_class (type): the event class
+
+        Returns:
+            tuple: the handlers in the order they are called
+        """
+        return self._subscriptions.get(event_class, ())
+
+    def publish(self, event):
+        """
+        Pass an event to every handler subscribed to its class
+
+        Args:
+            event (UserInputEventBase): the event
+        """
+        handlers = self._subscriptions.get(type(event))
+        if not handlers:
+            _HOT_PATH_LOGGER.debug("%r has no handlers", event)
+            return
+        self._handler_calls += len(handlers)
+        for handler in handlers:
+            _HOT_PATH_LOGGER.debug("Calling handler %r", handler)
+            handler(event)
+
+
+# the bus used by the class level handler registration
+DEFAULT_BUS = EventBus()
 
 
 class UserInputEventBase:
     """
     Baseclass for all user input events. These events may be consumed by the
-    UserInputEventConsumer who will call the associated handler.
+    UserInputEventConsumer who will publish them to an `EventBus`.
+
+    Events are compact slotted objects without an instance __dict__ since one
+    is made for every raw input event. Subclasses must declare __slots__ too.
     """
-    _handlers = {}
+    __slots__ = ("_timestamp",)
+    _routes = None
     _DEADLINE_SEC = 0.2
-    _lock = threading.Lock()
+    _EVENT_TYPES = ("Relative", "Absolute", "Sync", "Misc", "Key")
 
     def __init__(self, event):
         self._timestamp = event.timestamp
@@ -45,38 +192,46 @@ class UserInputEventBase:
     @classmethod
     def register_handler(cls, handler):
         """
-        Register a callback to be called when this event this event is consumed.
-        Note that only one callback can be registered. Registering another will
-        overwrite.
+        Register a callback on the default bus to be called when this event is
+        consumed. Note that only one callback can be registered this way.
+        Registering another will overwrite. Use an `EventBus` directly for
+        several subscribers.
 
         Args:
             callable: the callback
         """
-        with cls._lock:
-            cls._handlers[cls] = handler
+        DEFAULT_BUS.subscribe(cls, handler, exclusive=True)
 
     @classmethod
     def deregister_handler(cls):
         """
-        Deregister any callbacka that has previously been registered.
+        Deregister any callbacks that have been registered on the default bus.
         """
-        with cls._lock:
-            try:
-                cls._handlers.pop(cls)
-            except KeyError:
-                # no handler is registered so do nothing.
-                pass
+        DEFAULT_BUS.unsubscribe(cls)
 
-    def consume(self):
+    def consume(self, bus=DEFAULT_BUS):
         """
-        Consume this event instance by passing it to any registered callback
+        Consume this event instance by passing it to the registered callbacks
+
+        Args:
+            bus (EventBus): the bus to publish this event to
         """
-        try:
-            callback = self._handlers[type(self)]
-            _LOGGER.debug("Calling handler %r", callback)
-            callback(self)
-        except KeyError:
-            _LOGGER.debug("%r has no handlers", self)
+        bus.publish(self)
+
+    @classmethod
+    def compile_routes(cls, routes):
+        """
+        Build the table used to parse raw input events from a device into its
+        event classes. This should be called once when the device's events are
+        defined.
+
+        Args:
+            routes (dict): maps (ev_type, code, state) of raw input events to
+                the event class to create. The state may be `ANY_STATE` to
+                match events with the given code regardless of state. Raw
+                events that have no route are ignored.
+        """
+        cls._routes = _RouteTable(routes, cls._EVENT_TYPES)
 
     @classmethod
     def from_raw_input_event(cls, event):
@@ -91,27 +246,10 @@ class UserInputEventBase:
             UserInputEventBase: the specific event instance corresponding to the
                 raw input event.
         """
-        try:
-            raw_event_handler = {
-                "Relative": cls._parse_movement_event,
-                "Absolute": cls._parse_movement_event,
-                "Sync": None,
-                "Misc": None,
-                "Key": cls._parse_key_event,
-            }[event.ev_type]
-            if raw_event_handler:
-                return raw_event_handler(event)
+        event_class = cls._routes[(event.ev_type, event.code, event.state)]
+        if event_class is None:
             return None
-        except KeyError:
-            raise AssertionError("Unknown event type %r" % event)
-
-    @staticmethod
-    def _parse_movement_event(event):
-        raise NotImplementedError
-
-    @staticmethod
-    def _parse_key_event(event):
-        raise NotImplementedError
+        return event_class(event)
 
 
 class AbsolutePositionX(UserInputEventBase):
@@ -122,6 +260,8 @@ class AbsolutePositionX(UserInputEventBase):
         event (inputs.InputEvent): the associated raw input event
     """
     # pylint: disable=abstract-method
+    __slots__ = ("_position",)
+
     def __init__(self, event):
         self._position = event.state
         super().__init__(event)
@@ -145,6 +285,8 @@ class AbsolutePositionY(UserInputEventBase):
         event (inputs.InputEvent): the associated raw input event
     """
     # pylint: disable=abstract-method
+    __slots__ = ("_position",)
+
     def __init__(self, event):
         self._position = event.state
         super().__init__(event)
@@ -160,14 +302,16 @@ class AbsolutePositionY(UserInputEventBase):
         return self._position
 
 
-class RelativePositionX(UserInputEventBase):
+class RelativePosition(UserInputEventBase):
     """
-    A relative position update in the x-axis
+    A relative position update
 
     Args:
         event (inputs.InputEvent): the associated raw input event
     """
     # pylint: disable=abstract-method
+    __slots__ = ("_delta",)
+
     def __init__(self, event):
         self._delta = event.state
         super().__init__(event)
@@ -182,8 +326,19 @@ class RelativePositionX(UserInputEventBase):
         """
         return self._delta
 
+    def accumulate(self, other):
+        """
+        Merge a later update in the same axis into this one so that this event
+        represents the total position change of both.
+
+        Args:
+            other (RelativePosition): the later event to merge
+        """
+        self._delta += other.delta
+        self._timestamp = other.timestamp
+
 
-class RelativePositionY(UserInputEventBase):
+class RelativePositionX(RelativePosition):
     """
     A relative position update in the x-axis
 
@@ -191,81 +346,357 @@ class RelativePositionY(UserInputEventBase):
         event (inputs.InputEvent): the associated raw input event
     """
     # pylint: disable=abstract-method
-    def __init__(self, event):
-        self._delta = event.state
-        super().__init__(event)
+    __slots__ = ()
 
-    @property
-    def delta(self):
-        """
-        Position change
 
-        Returns:
-            float: the position change
-        """
-        return self._delta
+class RelativePositionY(RelativePosition):
+    """
+    A relative position update in the y-axis
+
+    Args:
+        event (inputs.InputEvent): the associated raw input event
+    """
+    # pylint: disable=abstract-method
+    __slots__ = ()
 
 
 # pylint: disable=abstract-method
 class ButtonClicked(UserInputEventBase):
     """Button click event"""
+    __slots__ = ()
 # pylint: enable=abstract-method
 
 
 # pylint: disable=abstract-method
 class ButtonReleased(UserInputEventBase):
     """Button release event"""
+    __slots__ = ()
 # pylint: enable=abstract-method
 
 
-class UserInputEventConsumer(threading.Thread):
+# events that are shed when stale. Anything else eg. a button or d-pad
+# transition is always dispatched.
+_MOTION_EVENT_CLASSES = (
+    RelativePosition, AbsolutePositionX, AbsolutePositionY)
+
+
+class RelativeMotionCoalescer:
+    """
+    Merges relative motion events so that one combined event is dispatched per
+    axis rather than one per raw record. Devices report a frame of records that
+    is terminated by a "Sync" record so motion is only ever released on a frame
+    boundary. Any other event releases the pending motion ahead of itself so
+    that the order of e.g. button clicks relative to motion is preserved.
     """
-    A thread that consumes input device events
+    def __init__(self):
+        self._pending = {}
+
+    def push(self, event, output):
+        """
+        Add a parsed event to the current frame.
+
+        Args:
+            event (UserInputEventBase): the parsed event
+            output (list): events ready for dispatch are appended to this
+        """
+        if not isinstance(event, RelativePosition):
+            self.flush(output)
+            output.append(event)
+            return
+        pending = self._pending.get(type(event))
+        if pending is None:
+            self._pending[type(event)] = event
+        else:
+            pending.accumulate(event)
+
+    def flush(self, output):
+        """
+        Release the combined motion for all axes.
+
+        Args:
+            output (list): events ready for dispatch are appended to this
+        """
+        if self._pending:
+            output.extend(self._pending.values())
+            self._pending.clear()
+
+
+class InputStream:
+    """
+    The events from one input device. Events are read in batches ie. all
+    events pending on the device are drained with a single read, parsed and
+    then dispatched in order to a bus. Relative motion within the frames
+    drained by a read is coalesced into a single event per axis.
+
+    When shedding load, a stream that has fallen behind skips ahead to the
+    newest motion in one step by discarding stale motion as it is parsed
+    rather than dispatching it. Latest wins for motion but button and d-pad
+    transitions are always dispatched, however late. Dropped events are
+    counted and summarised periodically, and when the stream is finished
+    with, rather than logged one by one.
 
     Args:
         device (obj): a user input device
-        event_parser (callable): parses raw input events
+        parser (callable): parses raw input events
+        bus (EventBus): the bus that events are published to. Defaults to the
+            bus used by the class level handler registration.
+        shed_load (bool): whether to shed stale motion events in bulk
     """
     _DEADLINE_SEC = 0.2
+    _MAX_BATCH_SIZE = 64
+    _SUMMARY_INTERVAL_SEC = 5.0
 
-    def __init__(self, device, parser, *args, **kwargs):
-        self.stop = threading.Event()
+    def __init__(self, device, parser, bus=None, shed_load=True):
         self._device = device
         self._parser = parser
-        super().__init__(*args, **kwargs)
+        self._bus = DEFAULT_BUS if bus is None else bus
+        self._shed_load = shed_load
+        self._fileno = self._find_fileno(device)
+        self._coalescer = RelativeMotionCoalescer()
+        self._read = 0
+        self._parsed = 0
+        self._dropped = 0
+        self._dropped_since_summary = 0
+        self._last_summary = time.monotonic()
 
-    def run(self):
-        while not self.stop.is_set():
-            event = self._get_next_event()
-            if not event:
-                continue
-            if not event.is_real_time:
-                self._handle_stale_event(event)
+    @property
+    def device(self):
+        """
+        The user input device that events are read from
+
+        Returns:
+            obj: the device
+        """
+        return self._device
+
+    @property
+    def events_read(self):
+        """
+        The number of raw events that have been read from the device
+
+        Returns:
+            int: the number of events
+        """
+        return self._read
+
+    @property
+    def events_parsed(self):
+        """
+        The number of events that raw events have been parsed into
+
+        Returns:
+            int: the number of events
+        """
+        return self._parsed
+
+    @property
+    def dropped_events(self):
+        """
+        The number of stale events that have been dropped
+
+        Returns:
+            int: the number of events
+        """
+        return self._dropped
+
+    def summarise_dropped(self):
+        """
+        Log how many stale events have been dropped since the last summary.
+        Summaries are logged periodically while events are processed so this
+        need only be called when the stream is finished with so that the last
+        of the dropped events are reported.
+        """
+        now = time.monotonic()
+        if self._dropped_since_summary:
+            _LOGGER.warning(
+                "Dropped %d stale events in the last %.1fs (%d in total)",
+                self._dropped_since_summary, now - self._last_summary,
+                self._dropped)
+        self._dropped_since_summary = 0
+        self._last_summary = now
+
+    def fileno(self):
+        """
+        The file descriptor of the device's evdev character device so that the
+        stream may be watched for events with a selector.
+
+        Returns:
+            int: the file descriptor or None if the device is not backed by a
+                character device
+        """
+        return self._fileno
+
+    def process(self):
+        """
+        Read the pending events from the device and dispatch them. This blocks
+        until the device has something to read.
+
+        Raises:
+            EOFError: if the device has been closed
+        """
+        for event in self.read_events():
+            if event.is_real_time or self._must_keep(event):
+                self._handle_real_time_event(event)
                 continue
-            self._handle_real_time_event(event)
+            self._handle_stale_event(event)
+        if self._dropped_since_summary:
+            self._summarise_dropped_if_due()
 
-    def terminate(self):
-        """Graceful exit"""
-        self.stop.set()
-        self.join()
+    def read_events(self):
+        """
+        Read and parse the pending events from the device.
 
-    def _get_next_event(self):
-        result = None
-        try:
-            [raw_event] = self._device.read()
-            _LOGGER.debug(
-                "Captured input event <%r, %r, %r>",
-                raw_event.ev_type, raw_event.code, raw_event.state)
-            result = self._parser(raw_event)
-        except inputs.UnknownEventCode as error:
-            _LOGGER.warning("Unknown event error: %r", error)
+        Returns:
+            list: the parsed events that are ready to dispatch in order
+        """
+        result = []
+        pending_frame = False
+        raw_events = self._read_raw_events()
+        self._read += len(raw_events)
+        # motion older than the cutoff is dropped as soon as it is parsed
+        cutoff = None
+        if self._shed_load and raw_events \
+                and raw_events[0].timestamp < time.time() - self._DEADLINE_SEC:
+            cutoff = time.time() - self._DEADLINE_SEC
+        dropped = 0
+        # checked once per read rather than once per raw event
+        debug = _LOGGER.isEnabledFor(logging.DEBUG)
+        for raw_event in raw_events:
+            if debug:
+                _HOT_PATH_LOGGER.debug(
+                    "Captured input event <%r, %r, %r>",
+                    raw_event.ev_type, raw_event.code, raw_event.state)
+            if raw_event.ev_type == "Sync":
+                pending_frame = False
+                continue
+            with instrumentation.timed(instrumentation.PARSE):
+                event = self._parser(raw_event)
+            if event:
+                self._parsed += 1
+                if cutoff is not None and event.timestamp < cutoff \
+                        and isinstance(event, _MOTION_EVENT_CLASSES):
+                    dropped += 1
+                    continue
+                self._coalescer.push(event, result)
+                pending_frame = True
+        if dropped:
+            self._record_dropped(dropped)
+        if not pending_frame:
+            # every frame in this read is complete so release the motion now.
+            # Otherwise hold it until the rest of the frame has been read.
+            self._coalescer.flush(result)
+        return result
+
+    def _read_raw_events(self):
+        if self._fileno is None:
+            # not backed by an evdev character device so fall back to the
+            # device's own read which may return one or more events.
+            try:
+                return self._device.read()
+            except inputs.UnknownEventCode as error:
+                _LOGGER.warning("Unknown event error: %r", error)
+                return []
+        # evdev devices return as many whole events as are pending (up to the
+        # requested size) from a single read so drain them all in one go.
+        data = os.read(self._fileno, inputs.EVENT_SIZE * self._MAX_BATCH_SIZE)
+        if not data:
+            raise EOFError("%r has been closed" % self._device)
+        result = []
+        for fields in inputs.iter_unpack(data):
+            try:
+                # pylint: disable=protected-access
+                result.append(self._device._make_event(*fields))
+            except inputs.UnknownEventCode as error:
+                _LOGGER.warning("Unknown event error: %r", error)
         return result
 
     @staticmethod
-    def _handle_stale_event(event):
+    def _find_fileno(device):
+        try:
+            # pylint: disable=protected-access
+            return device._character_device.fileno()
+        except (AttributeError, io.UnsupportedOperation):
+            return None
+
+    def _must_keep(self, event):
+        return self._shed_load and not isinstance(
+            event, _MOTION_EVENT_CLASSES)
+
+    def _record_dropped(self, count):
+        self._dropped += count
+        self._dropped_since_summary += count
+        self._summarise_dropped_if_due()
+
+    def _summarise_dropped_if_due(self):
+        if time.monotonic() - self._last_summary >= self._SUMMARY_INTERVAL_SEC:
+            self.summarise_dropped()
+
+    def _handle_stale_event(self, event):
+        if self._shed_load:
+            self._record_dropped(1)
+            return
         _LOGGER.warning("Event %r is not real time. Rejected.", event)
 
-    @staticmethod
-    def _handle_real_time_event(event):
-        _LOGGER.debug("Got event %r", event)
-        event.consume()
+    def _handle_real_time_event(self, event):
+        _HOT_PATH_LOGGER.debug("Got event %r", event)
+        instrumentation.record(
+            instrumentation.EVENT_AGE, time.time() - event.timestamp)
+        with instrumentation.timed(instrumentation.CONSUME):
+            event.consume(self._bus)
+
+
+class UserInputEventConsumer(threading.Thread):
+    """
+    A thread that consumes the events from a single input device with blocking
+    reads. See `InputStream` for how events are read and dispatched and
+    `daveshed.legobot.events.multiplexer.InputMultiplexer` to serve several
+    devices from one thread.
+
+    Args:
+        device (obj): a user input device
+        event_parser (callable): parses raw input events
+        bus (EventBus): the bus that events are published to. Defaults to the
+            bus used by the class level handler registration.
+        shed_load (bool): whether to shed stale motion events in bulk
+    """
+    def __init__(self, device, parser, *args, bus=None, shed_load=True,
+                 **kwargs):
+        self.stop = threading.Event()
+        self._stream = InputStream(device, parser, bus, shed_load)
+        super().__init__(*args, **kwargs)
+
+    @property
+    def stream(self):
+        """
+        The stream of events from the device
+
+        Returns:
+            InputStream: the stream
+        """
+        return self._stream
+
+    @property
+    def dropped_events(self):
+        """
+        The number of stale events that have been dropped
+
+        Returns:
+            int: the number of events
+        """
+        return self._stream.dropped_events
+
+    def run(self):
+        try:
+            while not self.stop.is_set():
+                try:
+                    self._stream.process()
+                except EOFError as error:
+                    _LOGGER.info("No more events: %s", error)
+                    return
+        finally:
+            self._stream.summarise_dropped()
+
+    def terminate(self):
+        """Graceful exit"""
+        self.stop.set()
+        self.join()
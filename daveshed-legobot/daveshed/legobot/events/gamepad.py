@@ -8,74 +8,61 @@ class GamepadInputEvent(events.UserInputEventBase):
     """
     Gamepad input event base class
     """
-    @staticmethod
-    def _parse_movement_event(event):
-        event_map = {
-            ('ABS_Y', 255,): UpDpadPressed,
-            ('ABS_Y', 127,): UpDpadReleased,
-            ('ABS_Y', 0,): DownDpadPressed,
-            ('ABS_Y', 127,): DownDpadReleased,
-            ('ABS_X', 0,): LeftDpadPressed,
-            ('ABS_X', 127,): LeftDpadReleased,
-            ('ABS_X', 255,): RightDpadPressed,
-            ('ABS_X', 127,): RightDpadReleased,
-        }
-        try:
-            event_type = event_map[(event.code, event.state,)]
-            return event_type(event)
-        except KeyError:
-            return None
-
-    @staticmethod
-    def _parse_key_event(event):
-        event_map = {
-            ('BTN_THUMB', 1,): AButtonPressed,
-            ('BTN_THUMB', 0,): AButtonReleased,
-            ('BTN_THUMB2', 1,): BButtonPressed,
-            ('BTN_THUMB2', 0,): BButtonReleased,
-            ('BTN_TRIGGER', 1,): XButtonPressed,
-            ('BTN_TRIGGER', 0,): XButtonReleased,
-            ('BTN_TOP', 0,): YButtonPressed,
-            ('BTN_TOP', 1,): YButtonReleased,
-            ('BTN_BASE4', 1,): StartButtonPressed,
-            ('BTN_BASE4', 0,): StartButtonReleased,
-            ('BTN_BASE3', 1,): SelectButtonPressed,
-            ('BTN_BASE3', 1,): SelectButtonReleased,
-            ('BTN_TOP2', 1,): LeftBumperPressed,
-            ('BTN_TOP2', 0,): LeftBumperReleased,
-            ('BTN_PINKIE', 1,): RightBumperPressed,
-            ('BTN_PINKIE', 0,): RightBumperReleased,
-        }
-        try:
-            event_type = event_map[(event.code, event.state,)]
-            return event_type(event)
-        except KeyError:
-            return None
+    __slots__ = ()
 
 # pylint: disable=missing-class-docstring
 # pylint: disable=too-few-public-methods,
 # pylint: disable=multiple-statements
-class AButtonPressed(GamepadInputEvent): pass
-class AButtonReleased(GamepadInputEvent): pass
-class BButtonPressed(GamepadInputEvent): pass
-class BButtonReleased(GamepadInputEvent): pass
-class XButtonPressed(GamepadInputEvent): pass
-class XButtonReleased(GamepadInputEvent): pass
-class YButtonPressed(GamepadInputEvent): pass
-class YButtonReleased(GamepadInputEvent): pass
-class StartButtonPressed(GamepadInputEvent): pass
-class StartButtonReleased(GamepadInputEvent): pass
-class SelectButtonPressed(GamepadInputEvent): pass
-class SelectButtonReleased(GamepadInputEvent): pass
-class LeftBumperPressed(GamepadInputEvent): pass
-class LeftBumperReleased(GamepadInputEvent): pass
-class RightBumperPressed(GamepadInputEvent): pass
-class RightBumperReleased(GamepadInputEvent): pass
-class UpDpadPressed(GamepadInputEvent): pass
-class UpDpadReleased(GamepadInputEvent): pass
-class DownDpadPressed(GamepadInputEvent): pass
-class DownDpadReleased(GamepadInputEvent): pass
-class LeftDpadPressed(GamepadInputEvent): pass
-class LeftDpadReleased(GamepadInputEvent): pass
-class RightDpadPressed(GamepadInputEvent): pass
-class RightDpadReleased(GamepadInputEvent): pass
+class AButtonPressed(GamepadInputEvent): __slots__ = ()
+class AButtonReleased(GamepadInputEvent): __slots__ = ()
+class BButtonPressed(GamepadInputEvent): __slots__ = ()
+class BButtonReleased(GamepadInputEvent): __slots__ = ()
+class XButtonPressed(GamepadInputEvent): __slots__ = ()
+class XButtonReleased(GamepadInputEvent): __slots__ = ()
+class YButtonPressed(GamepadInputEvent): __slots__ = ()
+class YButtonReleased(GamepadInputEvent): __slots__ = ()
+class StartButtonPressed(GamepadInputEvent): __slots__ = ()
+class StartButtonReleased(GamepadInputEvent): __slots__ = ()
+class SelectButtonPressed(GamepadInputEvent): __slots__ = ()
+class SelectButtonReleased(GamepadInputEvent): __slots__ = ()
+class LeftBumperPressed(GamepadInputEvent): __slots__ = ()
+class LeftBumperReleased(GamepadInputEvent): __slots__ = ()
+class RightBumperPressed(GamepadInputEvent): __slots__ = ()
+class RightBumperReleased(GamepadInputEvent): __slots__ = ()
+class UpDpadPressed(GamepadInputEvent): __slots__ = ()
+class UpDpadReleased(GamepadInputEvent): __slots__ = ()
+class DownDpadPressed(GamepadInputEvent): __slots__ = ()
+class DownDpadReleased(GamepadInputEvent): __slots__ = ()
+class LeftDpadPressed(GamepadInputEvent): __slots__ = ()
+class LeftDpadReleased(GamepadInputEvent): __slots__ = ()
+class RightDpadPressed(GamepadInputEvent): __slots__ = ()
+class RightDpadReleased(GamepadInputEvent): __slots__ = ()
+
+# pylint: enable=multiple-statements
+# pylint: disable=duplicate-key
+GamepadInputEvent.compile_routes({
+    ('Absolute', 'ABS_Y', 255,): UpDpadPressed,
+    ('Absolute', 'ABS_Y', 127,): UpDpadReleased,
+    ('Absolute', 'ABS_Y', 0,): DownDpadPressed,
+    ('Absolute', 'ABS_Y', 127,): DownDpadReleased,
+    ('Absolute', 'ABS_X', 0,): LeftDpadPressed,
+    ('Absolute', 'ABS_X', 127,): LeftDpadReleased,
+    ('Absolute', 'ABS_X', 255,): RightDpadPressed,
+    ('Absolute', 'ABS_X', 127,): RightDpadReleased,
+    ('Key', 'BTN_THUMB', 1,): AButtonPressed,
+    ('Key', 'BTN_THUMB', 0,): AButtonReleased,
+    ('Key', 'BTN_THUMB2', 1,): BButtonPressed,
+    ('Key', 'BTN_THUMB2', 0,): BButtonReleased,
+    ('Key', 'BTN_TRIGGER', 1,): XButtonPressed,
+    ('Key', 'BTN_TRIGGER', 0,): XButtonReleased,
+    ('Key', 'BTN_TOP', 0,): YButtonPressed,
+    ('Key', 'BTN_TOP', 1,): YButtonReleased,
+    ('Key', 'BTN_BASE4', 1,): StartButtonPressed,
+    ('Key', 'BTN_BASE4', 0,): StartButtonReleased,
+    ('Key', 'BTN_BASE3', 1,): SelectButtonPressed,
+    ('Key', 'BTN_BASE3', 1,): SelectButtonReleased,
+    ('Key', 'BTN_TOP2', 1,): LeftBumperPressed,
+    ('Key', 'BTN_TOP2', 0,): LeftBumperReleased,
+    ('Key', 'BTN_PINKIE', 1,): RightBumperPressed,
+    ('Key', 'BTN_PINKIE', 0,): RightBumperReleased,
+})
@@ -8,45 +8,31 @@ class MouseInputEvent(events.UserInputEventBase):
     """
     Mouse input event base class
     """
-    @staticmethod
-    def _parse_movement_event(event):
-        event_map = {
-            'REL_X': MouseMovedX,
-            'REL_Y': MouseMovedY,
-            'REL_WHEEL': WheelMoved,
-        }
-        try:
-            event_type = event_map[event.code]
-            return event_type(event)
-        except KeyError:
-            return None
-
-    @staticmethod
-    def _parse_key_event(event):
-        event_map = {
-            ('BTN_LEFT', 1,): LeftButtonClicked,
-            ('BTN_LEFT', 0,): LeftButtonReleased,
-            ('BTN_RIGHT', 1,): RightButtonClicked,
-            ('BTN_RIGHT', 0,): RightButtonReleased,
-            ('BTN_MIDDLE', 1,): MiddleButtonClicked,
-            ('BTN_MIDDLE', 0,): MiddleButtonReleased,
-        }
-        try:
-            event_type = event_map[(event.code, event.state,)]
-            return event_type(event)
-        except KeyError:
-            return None
+    __slots__ = ()
 
 # pylint: disable=missing-class-docstring
 # pylint: disable=too-few-public-methods,
 # pylint: disable=multiple-statements
 # pylint: disable=abstract-method
-class MouseMovedX(events.RelativePositionX): pass
-class MouseMovedY(events.RelativePositionY): pass
-class WheelMoved(events.RelativePositionY): pass
-class LeftButtonClicked(events.ButtonClicked): pass
-class LeftButtonReleased(events.ButtonReleased): pass
-class RightButtonClicked(events.ButtonClicked): pass
-class RightButtonReleased(events.ButtonReleased): pass
-class MiddleButtonClicked(events.ButtonClicked): pass
-class MiddleButtonReleased(events.ButtonReleased): pass
+class MouseMovedX(events.RelativePositionX): __slots__ = ()
+class MouseMovedY(events.RelativePositionY): __slots__ = ()
+class WheelMoved(events.RelativePositionY): __slots__ = ()
+class LeftButtonClicked(events.ButtonClicked): __slots__ = ()
+class LeftButtonReleased(events.ButtonReleased): __slots__ = ()
+class RightButtonClicked(events.ButtonClicked): __slots__ = ()
+class RightButtonReleased(events.ButtonReleased): __slots__ = ()
+class MiddleButtonClicked(events.ButtonClicked): __slots__ = ()
+class MiddleButtonReleased(events.ButtonReleased): __slots__ = ()
+
+# pylint: enable=multiple-statements
+MouseInputEvent.compile_routes({
+    ('Relative', 'REL_X', events.ANY_STATE,): MouseMovedX,
+    ('Relative', 'REL_Y', events.ANY_STATE,): MouseMovedY,
+    ('Relative', 'REL_WHEEL', events.ANY_STATE,): WheelMoved,
+    ('Key', 'BTN_LEFT', 1,): LeftButtonClicked,
+    ('Key', 'BTN_LEFT', 0,): LeftButtonReleased,
+    ('Key', 'BTN_RIGHT', 1,): RightButtonClicked,
+    ('Key', 'BTN_RIGHT', 0,): RightButtonReleased,
+    ('Key', 'BTN_MIDDLE', 1,): MiddleButtonClicked,
+    ('Key', 'BTN_MIDDLE', 0,): MiddleButtonReleased,
+})
@@ -0,0 +1,117 @@
+"""
+Serves several user input devices from a single thread. The evdev character
+device behind each input stream is watched with a selector (epoll on linux) so
+that a stream is only read when it has events pending and no thread is left
+blocked in a read when the multiplexer is terminated.
+"""
+import logging
+import os
+import selectors
+import threading
+
+_LOGGER = logging.getLogger("MULTIPLEXER")
+
+
+class InputMultiplexer(threading.Thread):
+    """
+    A thread that dispatches the events of many input streams, each to its own
+    bus, as they become readable.
+
+    Args:
+        streams (iterable): the `daveshed.legobot.events.base.InputStream`s to
+            serve. More may be added while running with `add_stream`.
+    """
+    def __init__(self, *args, streams=(), **kwargs):
+        self.stop = threading.Event()
+        self._selector = selectors.DefaultSelector()
+        self._wakeup_read, self._wakeup_write = os.pipe()
+        os.set_blocking(self._wakeup_read, False)
+        os.set_blocking(self._wakeup_write, False)
+        self._selector.register(self._wakeup_read, selectors.EVENT_READ)
+        for stream in streams:
+            self.add_stream(stream)
+        super().__init__(*args, **kwargs)
+
+    @property
+    def streams(self):
+        """
+        The input streams being served
+
+        Returns:
+            list: the streams
+        """
+        return [
+            key.data for key in self._selector.get_map().values()
+            if key.data is not None
+        ]
+
+    def add_stream(self, stream):
+        """
+        Serve another input stream
+
+        Args:
+            stream (daveshed.legobot.events.base.InputStream): the stream. Its
+                device must be backed by an evdev character device.
+
+        Raises:
+            ValueError: if the stream cannot be watched by a selector
+        """
+        if stream.fileno() is None:
+            raise ValueError(
+                "%r has no file descriptor to select on" % stream.device)
+        self._selector.register(stream, selectors.EVENT_READ, stream)
+        self._wake()
+
+    def remove_stream(self, stream):
+        """
+        Stop serving an input stream
+
+        Args:
+            stream (daveshed.legobot.events.base.InputStream): the stream
+        """
+        self._selector.unregister(stream)
+        self._wake()
+
+    def run(self):
+        while not self.stop.is_set():
+            for key, _ in self._selector.select():
+                if key.data is None:
+                    self._drain_wakeup()
+                else:
+                    self._process(key.data)
+
+    def terminate(self):
+        """Graceful exit. The devices themselves are left open."""
+        self.stop.set()
+        self._wake()
+        if self.is_alive():
+            self.join()
+        for stream in self.streams:
+            stream.summarise_dropped()
+        self._selector.close()
+        os.close(self._wakeup_read)
+        os.close(self._wakeup_write)
+
+    def _process(self, stream):
+        try:
+            stream.process()
+        except (OSError, EOFError) as error:
+            # the device has been closed or unplugged so stop watching it
+            # rather than spinning on a descriptor that is always readable.
+            _LOGGER.error("Removing %r: %r", stream.device, error)
+            self._selector.unregister(stream)
+            stream.summarise_dropped()
+
+    def _wake(self):
+        try:
+            os.write(self._wakeup_write, b"\0")
+        except BlockingIOError:
+            # a wake up is already pending
+            pass
+
+    def _drain_wakeup(self):
+        try:
+            while os.read(self._wakeup_read, 512):
+                pass
+        except BlockingIOError:
+            pass
@@ -0,0 +1,268 @@
+"""
+Record and replay of raw input events so that the input pipeline may be driven
+without a physical device, eg. to benchmark it reproducibly on a headless box.
+
+Recordings are compact binary files. After a short header, each record starts
+with a tag byte. A string record assigns the next id to an event type or code
+the first time it is seen and an event record refers to those ids:
+
+    string  <tag=0> <length: u16> <utf-8 bytes>
+    event   <tag=1> <timestamp: f64> <ev_type id: u16> <code id: u16>
+            <state: i32>
+"""
+import logging
+import struct
+import time
+
+_LOGGER = logging.getLogger("REPLAY")
+
+_MAGIC = b"LGBR\x01"
+_STRING = 0
+_EVENT = 1
+_TAG = struct.Struct("<B")
+_STRING_LENGTH = struct.Struct("<H")
+_EVENT_FIELDS = struct.Struct("<dHHi")
+
+# replay at the rate that the events were recorded
+REAL_TIME = 1.0
+# replay events as fast as they can be read
+AS_FAST_AS_POSSIBLE = None
+
+
+class ReplayedEvent:
+    """
+    A raw input event read from a recording. It has the same fields as an
+    `inputs.InputEvent` that the event parsers use.
+
+    Args:
+        ev_type (str): the event type eg. "Relative"
+        code (str): the event code eg. "REL_X"
+        state (int): the event value
+        timestamp (float): the time of the event in seconds since the epoch
+    """
+    __slots__ = ("ev_type", "code", "state", "timestamp")
+
+    def __init__(self, ev_type, code, state, timestamp):
+        self.ev_type = ev_type
+        self.code = code
+        self.state = state
+        self.timestamp = timestamp
+
+    def __repr__(self):
+        return "%s(%r, %r, %r, %r)" % (
+            type(self).__name__, self.ev_type, self.code, self.state,
+            self.timestamp)
+
+
+class EventRecorder:
+    """
+    Wraps a user input device and records every event read from it.
+
+    Args:
+        device (obj): the user input device to record
+        stream (file): a binary file that the recording is written to
+    """
+    def __init__(self, device, stream):
+        self._device = device
+        self._stream = stream
+        self._string_ids = {}
+        self._stream.write(_MAGIC)
+
+    @classmethod
+    def open(cls, device, path):
+        """
+        Record a device to a file
+
+        Args:
+            device (obj): the user input device to record
+            path (str): the file to write. It is overwritten if it exists.
+
+        Returns:
+            EventRecorder: the recorder
+        """
+        return cls(device, open(path, "wb"))
+
+    def read(self):
+        """
+        Read and record the next events from the device
+
+        Returns:
+            list: the raw input events read
+        """
+        events = self._device.read()
+        for event in events:
+            self.record(event)
+        self._stream.flush()
+        return events
+
+    def record(self, event):
+        """
+        Record a raw input event
+
+        Args:
+            event (inputs.InputEvent): the event
+        """
+        self._stream.write(
+            _TAG.pack(_EVENT)
+            + _EVENT_FIELDS.pack(
+                event.timestamp,
+                self._string_id(event.ev_type),
+                self._string_id(event.code),
+                event.state))
+
+    def close(self):
+        """Finish the recording"""
+        self._stream.close()
+
+    def _string_id(self, string):
+        try:
+            return self._string_ids[string]
+        except KeyError:
+            data = string.encode("utf-8")
+            self._stream.write(
+                _TAG.pack(_STRING) + _STRING_LENGTH.pack(len(data)) + data)
+            return self._string_ids.setdefault(string, len(self._string_ids))
+
+
+class ReplayDevice:
+    """
+    A user input device that plays back a recording. Each read returns the
+    next frame of events ie. up to and including the next "Sync" event. Events
+    are re-stamped as if they happened now so that they are not rejected as
+    stale.
+
+    Args:
+        stream (file): a binary file containing a recording
+        speed (float): the rate of playback relative to the recording eg. 2.0
+            to replay twice as fast or `AS_FAST_AS_POSSIBLE`
+    """
+    def __init__(self, stream, speed=REAL_TIME):
+        if speed is not None and speed <= 0.0:
+            raise ValueError("Replay speed must be positive")
+        if stream.read(len(_MAGIC)) != _MAGIC:
+            raise ValueError("%r is not an input recording" % stream)
+        self._stream = stream
+        self._speed = speed
+        self._strings = []
+        self._first_timestamp = None
+        self._start = None
+
+    @classmethod
+    def open(cls, path, speed=REAL_TIME):
+        """
+        Replay a recording from a file
+
+        Args:
+            path (str): the recording
+            speed (float): the rate of playback relative to the recording
+
+        Returns:
+            ReplayDevice: the device
+        """
+        return cls(open(path, "rb"), speed)
+
+    def read(self):
+        """
+        Read the next frame of events waiting until they are due
+
+        Returns:
+            list: the `ReplayedEvent`s in the frame
+
+        Raises:
+            EOFError: when the recording has been played back
+        """
+        result = []
+        while not result or result[-1].ev_type != "Sync":
+            event = self._next_event()
+            if event is None:
+                if result:
+                    break
+                raise EOFError("End of recording %r" % self._stream)
+            result.append(event)
+        return result
+
+    def close(self):
+        """Stop replaying"""
+        self._stream.close()
+
+    def _next_event(self):
+        while True:
+            tag = self._stream.read(_TAG.size)
+            if not tag:
+                return None
+            if _TAG.unpack(tag)[0] == _STRING:
+                self._read_string()
+                continue
+            timestamp, ev_type, code, state = _EVENT_FIELDS.unpack(
+                self._read_exactly(_EVENT_FIELDS.size))
+            return ReplayedEvent(
+                self._strings[ev_type], self._strings[code], state,
+                self._restamp(timestamp))
+
+    def _read_string(self):
+        [length] = _STRING_LENGTH.unpack(
+            self._read_exactly(_STRING_LENGTH.size))
+        self._strings.append(self._read_exactly(length).decode("utf-8"))
+
+    def _read_exactly(self, size):
+        data = self._stream.read(size)
+        if len(data) != size:
+            raise EOFError("Truncated recording %r" % self._stream)
+        return data
+
+    def _restamp(self, timestamp):
+        now = time.time()
+        if self._speed is None:
+            return now
+        if self._first_timestamp is None:
+            self._first_timestamp = timestamp
+            self._start = now
+        due = self._start + (timestamp - self._first_timestamp) / self._speed
+        if due > now:
+            time.sleep(due - now)
+        return due
+
+
+def recording(factory_class, path):
+    """
+    Make an application factory that records its user input device
+
+    Args:
+        factory_class (type): a concrete
+            `daveshed.legobot.application.AbstractApplicationFactory`
+        path (str): the file to record to
+
+    Returns:
+        type: a subclass of the factory class
+    """
+    class RecordingFactory(factory_class):
+        # pylint: disable=missing-docstring,too-few-public-methods
+        def _make_user_input_device(self):
+            _LOGGER.info("Recording input to %s", path)
+            return EventRecorder.open(super()._make_user_input_device(), path)
+
+    RecordingFactory.__name__ = "Recording" + factory_class.__name__
+    return RecordingFactory
+
+
+def replaying(factory_class, path, speed=REAL_TIME):
+    """
+    Make an application factory whose user input device replays a recording
+
+    Args:
+        factory_class (type): a concrete
+            `daveshed.legobot.application.AbstractApplicationFactory`
+        path (str): the recording to replay
+        speed (float): the rate of playback relative to the recording
+
+    Returns:
+        type: a subclass of the factory class
+    """
+    class ReplayingFactory(factory_class):
+        # pylint: disable=missing-docstring,too-few-public-methods
+        def _make_user_input_device(self):
+            _LOGGER.info("Replaying input from %s", path)
+            return ReplayDevice.open(path, speed)
+
+    ReplayingFactory.__name__ = "Replaying" + factory_class.__name__
+    return ReplayingFactory
@@ -8,43 +8,29 @@ class TrackpadInputEvent(events.UserInputEventBase):
     """
     Base class for trackpad events
     """
-    @staticmethod
-    def _parse_movement_event(event):
-        event_map = {
-            'ABS_X': TrackpadMovedX,
-            'ABS_Y': TrackpadMovedY,
-        }
-        try:
-            event_type = event_map[event.code]
-            return event_type(event)
-        except KeyError:
-            return None
-
-    @staticmethod
-    def _parse_key_event(event):
-        event_map = {
-            ('BTN_LEFT', 1,): LeftButtonClicked,
-            ('BTN_LEFT', 0,): LeftButtonReleased,
-            ('BTN_RIGHT', 1,): RightButtonClicked,
-            ('BTN_RIGHT', 0,): RightButtonReleased,
-            ('BTN_TOUCH', 1,): PadTouched,
-            ('BTN_TOUCH', 0,): PadReleased,
-        }
-        try:
-            event_type = event_map[(event.code, event.state,)]
-            return event_type(event)
-        except KeyError:
-            return None
+    __slots__ = ()
 
 # pylint: disable=missing-class-docstring
 # pylint: disable=too-few-public-methods,
 # pylint: disable=multiple-statements
 # pylint: disable=abstract-method
-class TrackpadMovedX(events.AbsolutePositionX): pass
-class TrackpadMovedY(events.AbsolutePositionY): pass
-class LeftButtonClicked(events.ButtonClicked): pass
-class LeftButtonReleased(events.ButtonReleased): pass
-class RightButtonClicked(events.ButtonClicked): pass
-class RightButtonReleased(events.ButtonReleased): pass
-class PadTouched(events.ButtonClicked): pass
-class PadReleased(events.ButtonReleased): pass
+class TrackpadMovedX(events.AbsolutePositionX): __slots__ = ()
+class TrackpadMovedY(events.AbsolutePositionY): __slots__ = ()
+class LeftButtonClicked(events.ButtonClicked): __slots__ = ()
+class LeftButtonReleased(events.ButtonReleased): __slots__ = ()
+class RightButtonClicked(events.ButtonClicked): __slots__ = ()
+class RightButtonReleased(events.ButtonReleased): __slots__ = ()
+class PadTouched(events.ButtonClicked): __slots__ = ()
+class PadReleased(events.ButtonReleased): __slots__ = ()
+
+# pylint: enable=multiple-statements
+TrackpadInputEvent.compile_routes({
+    ('Absolute', 'ABS_X', events.ANY_STATE,): TrackpadMovedX,
+    ('Absolute', 'ABS_Y', events.ANY_STATE,): TrackpadMovedY,
+    ('Key', 'BTN_LEFT', 1,): LeftButtonClicked,
+    ('Key', 'BTN_LEFT', 0,): LeftButtonReleased,
+    ('Key', 'BTN_RIGHT', 1,): RightButtonClicked,
+    ('Key', 'BTN_RIGHT', 0,): RightButtonReleased,
+    ('Key', 'BTN_TOUCH', 1,): PadTouched,
+    ('Key', 'BTN_TOUCH', 0,): PadReleased,
+})
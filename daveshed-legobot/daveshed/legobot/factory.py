@@ -3,6 +3,7 @@ Factory definitions required to start up the application
 """
 import inputs
 
+from daveshed.legobot import backends
 from daveshed.legobot import controller
 from daveshed.legobot import robot
 from daveshed.legobot.application import AbstractApplicationFactory
@@ -11,10 +12,13 @@ from daveshed.legobot.events import mouse as mouse_events
 from daveshed.legobot.events import trackpad as trackpad_events
 from daveshed.legobot.grasper import LegoServoGrasper
 
-# This import should not be here - concrete factories should be defined in
-# the example scripts (entry point) so that we don't have to pollute
-# requirements with hardware specific dependencies.
-from daveshed.adafruit import joint
+
+def _make_lego_robot(robot_class=robot.ThreeDofLegoRobot):
+    # the hardware backend is only imported (and the hardware opened) here so
+    # that the stub factories do not need it.
+    joints = backends.make_joints((0, 1, 2, 3))
+    grasper = LegoServoGrasper(joints[-1])
+    return robot_class(joints=joints[0:3], grasper=grasper)
 
 
 class GamepadRobotStubFactory(AbstractApplicationFactory):
@@ -25,7 +29,7 @@ class GamepadRobotStubFactory(AbstractApplicationFactory):
     # pylint: disable=too-few-public-methods
     def _register_controller(self):
         (
-            controller.GamepadController(self.robot)
+            controller.GamepadController(self.motion_loop, self.bus)
             .register_handlers(gamepad_events)
         )
 
@@ -50,7 +54,7 @@ class GamepadLegoRobotFactory(AbstractApplicationFactory):
     # pylint: disable=too-few-public-methods
     def _register_controller(self):
         (
-            controller.GamepadController(self.robot)
+            controller.GamepadController(self.motion_loop, self.bus)
             .register_handlers(gamepad_events)
         )
 
@@ -64,12 +68,7 @@ class GamepadLegoRobotFactory(AbstractApplicationFactory):
 
     @staticmethod
     def _make_robot():
-        servos = [
-            joint.ServoJointController(channel)
-            for channel in joint.PwmChannel.from_channel_numbers((0,1,2,3))
-        ]
-        grasper = LegoServoGrasper(servos[-1])
-        return robot.ThreeDofLegoRobot(joints=servos[0:3], grasper=grasper)
+        return _make_lego_robot()
 
 
 class MouseRobotStubFactory(AbstractApplicationFactory):
@@ -80,7 +79,7 @@ class MouseRobotStubFactory(AbstractApplicationFactory):
     # pylint: disable=too-few-public-methods
     def _register_controller(self):
         (
-            controller.MouseController(self.robot)
+            controller.MouseController(self.motion_loop, self.bus)
                 .register_handlers(mouse_events)
         )
 
@@ -104,7 +103,10 @@ class MouseLegoRobotFactory(AbstractApplicationFactory):
     """
     # pylint: disable=too-few-public-methods
     def _register_controller(self):
-        controller.MouseController(self.robot).register_handlers(mouse_events)
+        (
+            controller.MouseController(self.motion_loop, self.bus)
+                .register_handlers(mouse_events)
+        )
 
     @staticmethod
     def _make_user_input_device():
@@ -116,12 +118,18 @@ class MouseLegoRobotFactory(AbstractApplicationFactory):
 
     @staticmethod
     def _make_robot():
-        servos = [
-            joint.ServoJointController(channel)
-            for channel in joint.PwmChannel.from_channel_numbers((0,1,2,3))
-        ]
-        grasper = LegoServoGrasper(servos[-1])
-        return robot.ThreeDofLegoRobot(joints=servos[0:3], grasper=grasper)
+        return _make_lego_robot()
+
+
+class MouseCartesianLegoRobotFactory(MouseLegoRobotFactory):
+    """
+    Factory that creates a lego robot (hardware required) that moves its
+    grasper along the x, y and z axes as a mouse is moved.
+    """
+    # pylint: disable=too-few-public-methods
+    @staticmethod
+    def _make_robot():
+        return _make_lego_robot(robot.CartesianLegoRobot)
 
 
 class TrackpadRobotStubFactory(AbstractApplicationFactory):
@@ -132,7 +140,7 @@ class TrackpadRobotStubFactory(AbstractApplicationFactory):
     # pylint: disable=too-few-public-methods
     def _register_controller(self):
         (
-            controller.TrackpadController(self.robot)
+            controller.TrackpadController(self.motion_loop, self.bus)
                 .register_handlers(trackpad_events)
         )
 
@@ -157,7 +165,7 @@ class TrackpadLegoRobotFactory(AbstractApplicationFactory):
     # pylint: disable=too-few-public-methods
     def _register_controller(self):
         (
-            controller.TrackpadController(self.robot)
+            controller.TrackpadController(self.motion_loop, self.bus)
                 .register_handlers(trackpad_events)
         )
 
@@ -171,9 +179,4 @@ class TrackpadLegoRobotFactory(AbstractApplicationFactory):
 
     @staticmethod
     def _make_robot():
-        servos = [
-            joint.ServoJointController(channel)
-            for channel in joint.PwmChannel.from_channel_numbers((0,1,2,3))
-        ]
-        grasper = LegoServoGrasper(servos[-1])
-        return robot.ThreeDofLegoRobot(joints=servos[0:3], grasper=grasper)
+        return _make_lego_robot()
@@ -0,0 +1,268 @@
+"""
+Latency instrumentation for the input to actuation pipeline. Each stage of the
+pipeline is timed and recorded into a histogram that may be read while the
+application is running. Instrumentation is disabled until it is installed so
+that the hot path only pays for a no-op context manager.
+"""
+import contextlib
+import threading
+import time
+
+PARSE = "parse"
+EVENT_AGE = "event_age"
+CONSUME = "consume"
+MOTION_QUEUE = "motion_queue"
+ROBOT_MOVE = "robot_move"
+I2C_WRITE = "i2c_write"
+
+_NULL_TIMER = contextlib.nullcontext()
+_ACTIVE = None
+
+
+class Histogram:
+    """
+    A log-linear histogram in the style of HdrHistogram. Values are counted in
+    buckets whose width grows with their magnitude so that any recorded value
+    is reproduced to within a fixed relative precision while the memory used
+    stays constant. Recording is lock-free; under contention a count may very
+    occasionally be lost which is acceptable for latency statistics.
+
+    Args:
+        significant_bits (int): the number of bits of precision kept for each
+            value. 5 bits keeps values to within about 3%.
+        max_exponent (int): values up to 2 ** max_exponent microseconds may be
+            recorded. Larger values are clamped.
+    """
+    def __init__(self, significant_bits=5, max_exponent=32):
+        self._sub_buckets = 1 << significant_bits
+        self._linear_limit = self._sub_buckets << 1
+        self._shift = significant_bits + 1
+        self._max_value = (1 << max_exponent) - 1
+        self._counts = [0] * self._index(self._max_value) + [0]
+        self._total = 0
+        self._max = 0
+
+    @property
+    def count(self):
+        """
+        The number of recorded values
+
+        Returns:
+            int: the count
+        """
+        return self._total
+
+    @property
+    def max(self):
+        """
+        The largest recorded value
+
+        Returns:
+            float: the value in seconds
+        """
+        return self._max / 1e6
+
+    def record(self, seconds):
+        """
+        Record a value
+
+        Args:
+            seconds (float): the value to record. Negative values count as 0.
+        """
+        value = min(max(int(seconds * 1e6), 0), self._max_value)
+        self._counts[self._index(value)] += 1
+        self._total += 1
+        if value > self._max:
+            self._max = value
+
+    def percentile(self, percentile):
+        """
+        The value below which the given percentage of recorded values fall
+
+        Args:
+            percentile (float): the percentile between 0 and 100
+
+        Returns:
+            float: the value in seconds or None if nothing has been recorded
+        """
+        total = self._total
+        if not total:
+            return None
+        threshold = max(1, int(round(total * percentile / 100.0)))
+        cumulative = 0
+        for index, count in enumerate(self._counts):
+            cumulative += count
+            if cumulative >= threshold:
+                return min(self._upper_value(index), self._max) / 1e6
+        return self.max
+
+    def reset(self):
+        """Forget all recorded values"""
+        self._counts = [0] * len(self._counts)
+        self._total = 0
+        self._max = 0
+
+    def _index(self, value):
+        if value < self._linear_limit:
+            return value
+        exponent = value.bit_length() - self._shift
+        return (exponent + 1) * self._sub_buckets \
+            + (value >> exponent) - self._sub_buckets
+
+    def _upper_value(self, index):
+        if index < self._linear_limit:
+            return index
+        exponent = index // self._sub_buckets - 1
+        sub_bucket = index % self._sub_buckets + self._sub_buckets
+        return ((sub_bucket + 1) << exponent) - 1
+
+
+class Instruments:
+    """
+    A collection of histograms, one per pipeline stage, that stage timings are
+    recorded into.
+    """
+    def __init__(self):
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, stage):
+        """
+        The histogram for a stage. It is created the first time it is needed.
+
+        Args:
+            stage (str): the stage name
+
+        Returns:
+            Histogram: the stage's histogram
+        """
+        try:
+            return self._histograms[stage]
+        except KeyError:
+            with self._lock:
+                return self._histograms.setdefault(stage, Histogram())
+
+    def record(self, stage, seconds):
+        """
+        Record a timing for a stage
+
+        Args:
+            stage (str): the stage name
+            seconds (float): the time taken
+        """
+        self.histogram(stage).record(seconds)
+
+    def timer(self, stage):
+        """
+        A context manager that records the time spent inside it
+
+        Args:
+            stage (str): the stage name
+
+        Returns:
+            a context manager
+        """
+        return _StageTimer(self.histogram(stage))
+
+    def snapshot(self):
+        """
+        Summarise the timings recorded so far
+
+        Returns:
+            dict: maps each stage to a dict of its count and the p50, p99 and
+                max timings in seconds
+        """
+        return {
+            stage: {
+                "count": histogram.count,
+                "p50": histogram.percentile(50),
+                "p99": histogram.percentile(99),
+                "max": histogram.max,
+            }
+            for stage, histogram in list(self._histograms.items())
+        }
+
+    def reset(self):
+        """Forget all recorded timings"""
+        for histogram in list(self._histograms.values()):
+            histogram.reset()
+
+
+class _StageTimer:
+    # pylint: disable=missing-docstring,too-few-public-methods
+    __slots__ = ("_histogram", "_start")
+
+    def __init__(self, histogram):
+        self._histogram = histogram
+        self._start = None
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *_):
+        self._histogram.record(time.perf_counter() - self._start)
+
+
+def install(instruments=None):
+    """
+    Start recording stage timings
+
+    Args:
+        instruments (Instruments): where to record timings. A new collection is
+            made if one is not given.
+
+    Returns:
+        Instruments: the installed instruments
+    """
+    # pylint: disable=global-statement
+    global _ACTIVE
+    _ACTIVE = instruments if instruments is not None else Instruments()
+    return _ACTIVE
+
+
+def uninstall():
+    """Stop recording stage timings"""
+    # pylint: disable=global-statement
+    global _ACTIVE
+    _ACTIVE = None
+
+
+def active():
+    """
+    The instruments that timings are currently recorded into
+
+    Returns:
+        Instruments: the installed instruments or None if disabled
+    """
+    return _ACTIVE
+
+
+def timed(stage):
+    """
+    A context manager that records the time spent inside it against a stage if
+    instrumentation is installed and otherwise does nothing.
+
+    Args:
+        stage (str): the stage name
+
+    Returns:
+        a context manager
+    """
+    instruments = _ACTIVE
+    if instruments is None:
+        return _NULL_TIMER
+    return instruments.timer(stage)
+
+
+def record(stage, seconds):
+    """
+    Record a timing against a stage if instrumentation is installed
+
+    Args:
+        stage (str): the stage name
+        seconds (float): the time taken
+    """
+    instruments = _ACTIVE
+    if instruments is not None:
+        instruments.record(stage, seconds)
@@ -6,7 +6,27 @@ so that the robot library may be ignorant of joint controller implementation.
 import abc
 import logging
 
+from daveshed.legobot import logs
+
 _LOGGER = logging.getLogger("JOINT")
+_HOT_PATH_LOGGER = logs.HotPathLogger(_LOGGER)
+
+
+def set_angles(commands):
+    """
+    Set the angles of several joints at once. Joints of the same type are
+    handed to their implementation together so that it may batch the update
+    eg. into a single bus transaction.
+
+    Args:
+        commands (dict): maps each `JointControllerBase` to the angle to set
+    """
+    by_type = {}
+    for joint, angle in commands.items():
+        by_type.setdefault(type(joint), {})[joint] = angle
+    for joint_type, group in by_type.items():
+        # pylint: disable=protected-access
+        joint_type._set_angles(group)
 
 
 class JointControllerBase(abc.ABC):
@@ -41,6 +61,35 @@ class JointControllerBase(abc.ABC):
         """
         self._set_angle(angle)
 
+    @property
+    @abc.abstractmethod
+    def home_angle(self):
+        """
+        The angle of the joint's home position in degrees measured from the
+        datum angle.
+
+        Returns:
+            float: the angle
+        """
+
+    def prepare(self, angles):
+        """
+        Called with the angles that the joint is about to be moved through
+        eg. a planned trajectory so that an implementation may convert them
+        all up front rather than one at a time as they are set. Does nothing
+        unless overridden.
+
+        Args:
+            angles (array_like): the angles in degrees
+        """
+
+    def release(self):
+        """
+        Called once the prepared angles have been moved through, or the move
+        has been cancelled, so that an implementation may let go of anything
+        it kept for them. Does nothing unless overridden.
+        """
+
     @abc.abstractmethod
     def _set_angle(self, angle):
         """
@@ -50,6 +99,18 @@ class JointControllerBase(abc.ABC):
             angle (float): the angle to set
         """
 
+    @classmethod
+    def _set_angles(cls, commands):
+        """
+        Private implementation required to set the angles of several joints of
+        this type at once. Joints are set one at a time unless overridden.
+
+        Args:
+            commands (dict): maps each joint to the angle to set
+        """
+        for joint, angle in commands.items():
+            joint.angle = angle
+
     @abc.abstractmethod
     def home(self):
         """
@@ -70,10 +131,15 @@ class FakeJointController(JointControllerBase):
         self._idx = idx
         _LOGGER.info("Instantiating joint <%r>", self._idx)
 
+    @property
+    def home_angle(self):
+        return self._home_position
+
     def home(self):
         _LOGGER.info("Homing joint <%r> -> %r", self._idx, self._angle)
         self.angle = self._home_position
 
     def _set_angle(self, angle):
-        _LOGGER.info("Setting joint angle <%r> -> %r", self._idx, self._angle)
+        _HOT_PATH_LOGGER.info(
+            "Setting joint angle <%r> -> %r", self._idx, self._angle)
         self._angle = angle
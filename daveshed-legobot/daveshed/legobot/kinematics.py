@@ -0,0 +1,322 @@
+"""
+Kinematics of the three degree of freedom arm so that it may be driven in
+Cartesian space rather than joint by joint. The arm has a base joint that
+turns it about the vertical axis, a shoulder and an elbow. Positions are in
+millimetres with the origin on the floor beneath the base, z up and x forward
+when the base is at its home angle.
+
+Inverse kinematics is solved in closed form where the target may be reached
+within the joint limits. Otherwise, eg. for targets out of reach, a numeric
+damped least squares solver finds the pose that gets closest to the target.
+Solutions are cached per target, rounded to a resolution, and per way of
+reaching it so that a controller revisiting the same positions is answered
+without solving again. numpy is only imported when the numeric solver is first
+needed.
+"""
+import functools
+import logging
+import math
+
+from daveshed.legobot import lazy
+
+_LOGGER = logging.getLogger("KINEMATICS")
+
+# the resolution that targets are rounded to in millimetres
+DEFAULT_RESOLUTION = 0.1
+DEFAULT_CACHE_SIZE = 4096
+
+
+class ArmGeometry:
+    """
+    The dimensions and joint conventions of the arm. The kinematic angle of
+    each joint is its angle in degrees less its offset. The base angle turns
+    the arm anticlockwise seen from above, the shoulder angle is the elevation
+    of the upper arm and the elbow angle is that of the forearm relative to
+    the upper arm. With the default offsets the home angles of 90 degrees hold
+    the upper arm vertical and the forearm horizontal and pointing forward.
+
+    Args:
+        base_height (float): the height of the shoulder above the floor
+        upper_arm (float): the distance from the shoulder to the elbow
+        forearm (float): the distance from the elbow to the end effector
+        offsets (tuple): the joint angle of each joint at which its kinematic
+            angle is zero
+        limits (tuple): the (lowest, highest) angle of each joint
+    """
+    def __init__(self, base_height=60.0, upper_arm=80.0, forearm=100.0,
+                 offsets=(90.0, 0.0, 180.0),
+                 limits=((0.0, 180.0), (0.0, 180.0), (0.0, 180.0))):
+        self.base_height = base_height
+        self.upper_arm = upper_arm
+        self.forearm = forearm
+        self.offsets = tuple(offsets)
+        self.limits = tuple(tuple(limit) for limit in limits)
+
+    def within_limits(self, angles, tolerance=1e-9):
+        """
+        Whether joint angles are within the joint limits
+
+        Args:
+            angles (sequence): the angle of each joint in degrees
+            tolerance (float): how far a limit may be exceeded in degrees
+
+        Returns:
+            bool: True if every angle is within its limits
+        """
+        return all(
+            low - tolerance <= angle <= high + tolerance
+            for angle, (low, high) in zip(angles, self.limits))
+
+    def clamp(self, angles):
+        """
+        Limit joint angles to the joint limits
+
+        Args:
+            angles (sequence): the angle of each joint in degrees
+
+        Returns:
+            tuple: the nearest angles within the limits
+        """
+        return tuple(
+            min(max(angle, low), high)
+            for angle, (low, high) in zip(angles, self.limits))
+
+
+class ArmKinematics:
+    """
+    Forward and inverse kinematics of the arm.
+
+    Args:
+        geometry (ArmGeometry): the arm. Defaults to the lego arm.
+        resolution (float): targets are rounded to this resolution in
+            millimetres before they are solved and cached
+        cache_size (int): the number of solutions that are cached
+        home (tuple): the joint angles that are preferred when a target may
+            be reached in several ways
+    """
+    _TOLERANCE = 1e-3
+    _MAX_ITERATIONS = 100
+    _DAMPING = 1.0
+    _STEP_DEG = 1e-3
+
+    def __init__(self, geometry=None, resolution=DEFAULT_RESOLUTION,
+                 cache_size=DEFAULT_CACHE_SIZE, home=(90.0, 90.0, 90.0)):
+        self.geometry = ArmGeometry() if geometry is None else geometry
+        self._resolution = resolution
+        self._home = tuple(home)
+        self._candidates = functools.lru_cache(maxsize=cache_size)(
+            self._candidates)
+        self._solve = functools.lru_cache(maxsize=cache_size)(self._solve)
+
+    @property
+    def resolution(self):
+        """
+        The resolution that targets are rounded to
+
+        Returns:
+            float: the resolution in millimetres
+        """
+        return self._resolution
+
+    def forward(self, angles):
+        """
+        The position of the end effector
+
+        Args:
+            angles (sequence): the angle of each joint in degrees
+
+        Returns:
+            tuple: the (x, y, z) position in millimetres
+        """
+        geometry = self.geometry
+        base, shoulder, elbow = (
+            math.radians(angle - offset)
+            for angle, offset in zip(angles, geometry.offsets))
+        reach = geometry.upper_arm * math.cos(shoulder) \
+            + geometry.forearm * math.cos(shoulder + elbow)
+        height = geometry.base_height + geometry.upper_arm * math.sin(
+            shoulder) + geometry.forearm * math.sin(shoulder + elbow)
+        return (reach * math.cos(base), reach * math.sin(base), height)
+
+    def forward_many(self, angles):
+        """
+        The positions of the end effector for many sets of joint angles in
+        one go
+
+        Args:
+            angles (array_like): joint angles in degrees of shape (n, 3)
+
+        Returns:
+            numpy.ndarray: the positions in millimetres of shape (n, 3)
+        """
+        np = lazy.numpy()
+        geometry = self.geometry
+        radians = np.radians(
+            np.asarray(angles, dtype=float) - np.asarray(geometry.offsets))
+        base, shoulder, elbow = radians[:, 0], radians[:, 1], radians[:, 2]
+        reach = geometry.upper_arm * np.cos(shoulder) \
+            + geometry.forearm * np.cos(shoulder + elbow)
+        height = geometry.base_height + geometry.upper_arm * np.sin(
+            shoulder) + geometry.forearm * np.sin(shoulder + elbow)
+        return np.stack(
+            (reach * np.cos(base), reach * np.sin(base), height), axis=1)
+
+    def jacobian(self, angles):
+        """
+        The rate of change of the end effector position with each joint angle
+        estimated by central differences. Every perturbed pose is evaluated in
+        a single call to `forward_many`.
+
+        Args:
+            angles (sequence): the angle of each joint in degrees
+
+        Returns:
+            numpy.ndarray: the jacobian in millimetres per degree of shape
+                (3, joints)
+        """
+        np = lazy.numpy()
+        angles = np.asarray(angles, dtype=float)
+        steps = np.eye(angles.size) * self._STEP_DEG
+        positions = self.forward_many(
+            np.concatenate((angles + steps, angles - steps)))
+        return (positions[:angles.size] - positions[angles.size:]).T \
+            / (2.0 * self._STEP_DEG)
+
+    def inverse(self, position, seed=None):
+        """
+        The joint angles that put the end effector at a position or as close
+        to it as the arm can get within its joint limits. Most positions may
+        be reached in several ways eg. with the elbow bent either way. Given a
+        seed, such as the current joint angles, the way nearest the seed is
+        kept even if it cannot reach the position so that the arm never flips
+        from one to another between neighbouring positions. Otherwise the way
+        that reaches the position nearest the home angles is used.
+
+        Args:
+            position (sequence): the (x, y, z) target in millimetres
+            seed (sequence): joint angles in degrees that the solution should
+                be nearest to
+
+        Returns:
+            tuple: the angle of each joint in degrees
+        """
+        resolution = self._resolution
+        quantized = tuple(
+            int(round(coordinate / resolution)) for coordinate in position)
+        branch = None
+        if seed is not None:
+            candidates = self._candidates(quantized)
+            branch = min(
+                range(len(candidates)),
+                key=lambda idx: self._from_seed(candidates[idx], seed))
+        return self._solve(quantized, branch)
+
+    def cache_info(self):
+        """
+        Statistics of the solution cache
+
+        Returns:
+            functools._CacheInfo: the hits, misses and size of the cache
+        """
+        return self._solve.cache_info()
+
+    def cache_clear(self):
+        """Forget all cached solutions"""
+        self._candidates.cache_clear()
+        self._solve.cache_clear()
+
+    def _candidates(self, quantized):
+        # pylint: disable=method-hidden
+        return tuple(self._closed_form(self._target(quantized)))
+
+    def _solve(self, quantized, branch):
+        # pylint: disable=method-hidden
+        target = self._target(quantized)
+        candidates = self._candidates(quantized)
+        if branch is None:
+            reachable = [
+                angles for angles in candidates
+                if self.geometry.within_limits(angles)]
+            if reachable:
+                return self.geometry.clamp(
+                    min(reachable, key=self._from_home))
+            closest = min(candidates, key=self._from_home)
+        else:
+            closest = candidates[branch]
+            if self.geometry.within_limits(closest):
+                return self.geometry.clamp(closest)
+        return self._numeric(target, self.geometry.clamp(closest))
+
+    def _target(self, quantized):
+        return tuple(
+            coordinate * self._resolution for coordinate in quantized)
+
+    def _from_home(self, angles):
+        return _squared_distance(angles, self._home)
+
+    def _from_seed(self, angles, seed):
+        # the base keeps facing the way it does. Only then is the elbow bent
+        # the way that is within limits so that the arm bends out of a
+        # straight pose rather than being held straight by its elbow limit.
+        return (abs(angles[0] - seed[0]),
+                not self.geometry.within_limits(angles),
+                _squared_distance(angles, seed))
+
+    def _closed_form(self, target):
+        # the base may face the target or face away from it with the arm
+        # reaching back over itself and the elbow may bend either way so there
+        # are up to four solutions. Targets beyond reach give the pose that
+        # points straight at them.
+        geometry = self.geometry
+        x, y, z = target
+        height = z - geometry.base_height
+        reach = math.hypot(x, y)
+        facing = math.atan2(y, x) if reach else math.radians(
+            self._home[0] - geometry.offsets[0])
+        upper, fore = geometry.upper_arm, geometry.forearm
+        cosine = (reach ** 2 + height ** 2 - upper ** 2 - fore ** 2) \
+            / (2.0 * upper * fore)
+        cosine = min(max(cosine, -1.0), 1.0)
+        result = []
+        for base, signed_reach in (
+                (facing, reach), (facing - math.copysign(math.pi, facing),
+                                  -reach)):
+            for elbow in (-math.acos(cosine), math.acos(cosine)):
+                shoulder = math.atan2(height, signed_reach) - math.atan2(
+                    fore * math.sin(elbow), upper + fore * math.cos(elbow))
+                result.append(tuple(
+                    math.degrees(_wrap(angle)) + offset
+                    for angle, offset in zip(
+                        (base, shoulder, elbow), geometry.offsets)))
+        return result
+
+    def _numeric(self, target, seed):
+        np = lazy.numpy()
+        limits = np.asarray(self.geometry.limits)
+        target = np.asarray(target)
+        angles = np.asarray(seed, dtype=float)
+        damping = self._DAMPING ** 2 * np.eye(3)
+        for _ in range(self._MAX_ITERATIONS):
+            error = target - self.forward_many(angles[np.newaxis])[0]
+            if np.linalg.norm(error) < self._TOLERANCE:
+                break
+            jacobian = self.jacobian(angles)
+            step = jacobian.T @ np.linalg.solve(
+                jacobian @ jacobian.T + damping, error)
+            updated = np.clip(angles + step, limits[:, 0], limits[:, 1])
+            if np.max(np.abs(updated - angles)) < self._TOLERANCE:
+                break
+            angles = updated
+        _LOGGER.debug(
+            "Solved %r numerically to within %.3fmm", tuple(target),
+            np.linalg.norm(target - self.forward_many(angles[np.newaxis])[0]))
+        return tuple(angles.tolist())
+
+
+def _squared_distance(first, second):
+    return sum((a - b) ** 2 for a, b in zip(first, second))
+
+
+def _wrap(angle):
+    # the equivalent angle between -pi and pi
+    return math.atan2(math.sin(angle), math.cos(angle))
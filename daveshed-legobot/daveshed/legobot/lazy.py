@@ -0,0 +1,16 @@
+"""
+Dependencies that are slow to import and are only imported when they are
+first used so that importing the robot does not pay for them.
+"""
+
+
+def numpy():
+    """
+    The numpy module which is imported on the first call
+
+    Returns:
+        module: numpy
+    """
+    # pylint: disable=import-outside-toplevel
+    import numpy as np
+    return np
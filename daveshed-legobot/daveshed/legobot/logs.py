@@ -0,0 +1,283 @@
+"""
+Logging for the hot path. The input pipeline logs as it handles every event
+and moves the robot so at INFO level several records may be made per mouse
+tick. `configure` routes records through a queue to a background thread that
+formats and writes them so that the control thread never blocks on log I/O
+and limits how often each call site ie. line of code is logged:
+
+    from daveshed.legobot import logs
+
+    logs.configure(level=logging.INFO)
+
+Most of the cost of a log call is making the record so call sites that run
+for every event or move log through a `HotPathLogger` which decides whether
+the call site may log before any record is made:
+
+    _LOGGER = logging.getLogger("ROBOT")
+    _HOT_PATH_LOGGER = logs.HotPathLogger(_LOGGER)
+
+Records from every other call site are limited by a filter on the queue. In
+both cases the records that are suppressed are counted and the count is added
+to the next record from the same call site that gets through. Until
+`configure` is called nothing is limited.
+"""
+import atexit
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+import time
+
+# records per second allowed from each call site
+DEFAULT_RATE = 5.0
+# records from a call site that may be made in quick succession
+DEFAULT_BURST = 10
+
+# marks the records made by hot path loggers so that they are not limited
+# twice
+_LIMITED = {"call_site_limited": True}
+_LOCK = threading.Lock()
+_ACTIVE = None
+# limits hot path call sites. None until configured.
+_HOT_PATH_LIMITER = None
+
+
+class RateLimiter:
+    """
+    Limits each call site to a steady rate with bursts allowed by a token
+    bucket.
+
+    Args:
+        rate (float): records per second allowed from each call site
+        burst (int): records that may be made in quick succession
+        clock (callable): returns the time in seconds
+    """
+    def __init__(self, rate=DEFAULT_RATE, burst=DEFAULT_BURST,
+                 clock=time.monotonic):
+        if rate <= 0.0 or burst < 1:
+            raise ValueError("Rate and burst must be positive")
+        self._rate = rate
+        self._burst = burst
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._sites = {}
+
+    def admit(self, site):
+        """
+        Decide whether a call site may log
+
+        Args:
+            site (tuple): identifies the call site
+
+        Returns:
+            tuple: whether the call site may log and the number of records
+                that have been suppressed since it last logged
+        """
+        with self._lock:
+            now = self._clock()
+            tokens, last, suppressed = self._sites.get(
+                site, (self._burst, now, 0))
+            tokens = min(self._burst, tokens + (now - last) * self._rate)
+            if tokens < 1.0:
+                self._sites[site] = (tokens, now, suppressed + 1)
+                return False, 0
+            self._sites[site] = (tokens - 1.0, now, 0)
+            return True, suppressed
+
+
+class Sampler:
+    """
+    Lets one in every n records from each call site through starting with
+    the first.
+
+    Args:
+        every (int): the sampling interval
+    """
+    def __init__(self, every):
+        if every < 1:
+            raise ValueError("Sampling interval must be positive")
+        self._every = every
+        self._lock = threading.Lock()
+        self._sites = {}
+
+    def admit(self, site):
+        """
+        Decide whether a call site may log
+
+        Args:
+            site (tuple): identifies the call site
+
+        Returns:
+            tuple: whether the call site may log and the number of records
+                that have been suppressed since it last logged
+        """
+        with self._lock:
+            count = self._sites.get(site, 0)
+            self._sites[site] = count + 1
+        if count % self._every:
+            return False, 0
+        return True, self._every - 1 if count else 0
+
+
+class CallSiteFilter(logging.Filter):
+    """
+    Filters records per call site. Records above the given level and those
+    already limited by a `HotPathLogger` always pass.
+
+    Args:
+        limiter (RateLimiter or Sampler): decides which records pass
+        level (int): the most severe level that is filtered
+    """
+    def __init__(self, limiter, level=logging.INFO):
+        super().__init__()
+        self._limiter = limiter
+        self._level = level
+
+    def filter(self, record):
+        if record.levelno > self._level \
+                or getattr(record, "call_site_limited", False):
+            return True
+        passed, suppressed = self._limiter.admit(
+            (record.pathname, record.lineno))
+        if passed and suppressed:
+            record.msg = _annotate(record.getMessage(), suppressed)
+            record.args = ()
+        return passed
+
+
+class HotPathLogger:
+    """
+    Wraps a logger for call sites that run for every event or move. Once
+    logging is configured each call site is limited before its record is
+    made. Records are attributed to the call site as they would be by the
+    wrapped logger.
+
+    Args:
+        logger (logging.Logger): the logger that records are made by
+    """
+    __slots__ = ("_logger",)
+
+    def __init__(self, logger):
+        self._logger = logger
+
+    def debug(self, msg, *args):
+        """Log a message at DEBUG level. See `logging.Logger.debug`."""
+        self._log(logging.DEBUG, msg, args)
+
+    def info(self, msg, *args):
+        """Log a message at INFO level. See `logging.Logger.info`."""
+        self._log(logging.INFO, msg, args)
+
+    def _log(self, level, msg, args):
+        if not self._logger.isEnabledFor(level):
+            return
+        limiter = _HOT_PATH_LIMITER
+        if limiter is not None:
+            # pylint: disable=protected-access
+            frame = sys._getframe(2)
+            passed, suppressed = limiter.admit(
+                (frame.f_code, frame.f_lineno))
+            if not passed:
+                return
+            if suppressed:
+                msg, args = _annotate(msg % args if args else msg,
+                                      suppressed), ()
+        # the call site is two frames above this one
+        self._logger.log(level, msg, *args, extra=_LIMITED, stacklevel=3)
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    A queue handler that leaves records to be formatted by the thread that
+    handles them rather than the thread that logs them. Records are passed by
+    reference so their arguments must not be mutated after logging which
+    holds for everything the application logs.
+    """
+    def prepare(self, record):
+        return record
+
+
+def configure(level=logging.INFO, handlers=None, rate=DEFAULT_RATE,
+              burst=DEFAULT_BURST, sample=None):
+    """
+    Configure the root logger to hand records to a background thread and
+    limit how often each call site logs at INFO level and below. Any previous
+    configuration is replaced.
+
+    Args:
+        level (int): the root logger's level
+        handlers (list): the handlers that write records. Defaults to a
+            stream handler on stderr with the `logging.basicConfig` format.
+        rate (float): records per second allowed from each call site or None
+            to not limit call sites
+        burst (int): records that a call site may make in quick succession
+        sample (int): let one in every n records from each call site through
+            rather than limiting the rate
+
+    Returns:
+        logging.handlers.QueueListener: the listener that writes records
+    """
+    if handlers is None:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+        handlers = [handler]
+
+    def make_limiter():
+        if sample:
+            return Sampler(sample)
+        if rate:
+            return RateLimiter(rate, burst)
+        return None
+
+    records = queue.SimpleQueue()
+    queue_handler = DeferredQueueHandler(records)
+    limiter = make_limiter()
+    if limiter is not None:
+        queue_handler.addFilter(CallSiteFilter(limiter))
+    listener = logging.handlers.QueueListener(
+        records, *handlers, respect_handler_level=True)
+    # pylint: disable=global-statement
+    global _ACTIVE, _HOT_PATH_LIMITER
+    with _LOCK:
+        _shutdown()
+        root = logging.getLogger()
+        for handler in root.handlers[:]:
+            root.removeHandler(handler)
+            handler.close()
+        root.addHandler(queue_handler)
+        root.setLevel(level)
+        listener.start()
+        _ACTIVE = (queue_handler, listener)
+        _HOT_PATH_LIMITER = make_limiter()
+    atexit.unregister(shutdown)
+    atexit.register(shutdown)
+    return listener
+
+
+def shutdown():
+    """
+    Write the records that are still queued, stop the background thread and
+    remove its handler from the root logger. Call sites are no longer
+    limited. Called at exit.
+    """
+    with _LOCK:
+        _shutdown()
+
+
+def _shutdown():
+    # pylint: disable=global-statement
+    global _ACTIVE, _HOT_PATH_LIMITER
+    _HOT_PATH_LIMITER = None
+    if _ACTIVE is None:
+        return
+    queue_handler, listener = _ACTIVE
+    _ACTIVE = None
+    logging.getLogger().removeHandler(queue_handler)
+    listener.stop()
+    for handler in listener.handlers:
+        handler.flush()
+
+
+def _annotate(message, suppressed):
+    return "%s (%d similar suppressed)" % (message, suppressed)
@@ -0,0 +1,331 @@
+"""
+Runtime metrics for watching a running application. Counters and gauges are
+kept in a registry and served in the Prometheus text exposition format from a
+local HTTP endpoint on a TCP port or a unix socket:
+
+    $ curl -s localhost:9100/metrics
+    $ curl -s --unix-socket /tmp/legobot.sock localhost/metrics
+
+Metrics whose values are already counted elsewhere eg. by the input stream
+are read from a function when they are scraped so that the hot path pays
+nothing for them.
+"""
+import http.server
+import logging
+import math
+import os
+import socketserver
+import threading
+
+_LOGGER = logging.getLogger("METRICS")
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Counter:
+    """
+    A value that only goes up eg. the number of events read.
+
+    Args:
+        name (str): the metric name
+        documentation (str): what the metric measures
+        labels (dict): label names and values that identify this metric
+            among others with the same name
+        function (callable): returns the value when the metric is read
+            rather than it being counted with `inc`
+    """
+    TYPE = "counter"
+
+    def __init__(self, name, documentation, labels=None, function=None):
+        self.name = name
+        self.documentation = documentation
+        self.labels = dict(labels or {})
+        self._function = function
+        self._value = 0
+
+    @property
+    def value(self):
+        """
+        The current value
+
+        Returns:
+            float: the value or None if there is currently no value
+        """
+        if self._function is not None:
+            return self._function()
+        return self._value
+
+    def inc(self, amount=1):
+        """
+        Increase the value
+
+        Args:
+            amount (float): the amount to add
+        """
+        self._value += amount
+
+
+class Gauge(Counter):
+    """
+    A value that may go up and down eg. a joint angle. See `Counter`.
+    """
+    TYPE = "gauge"
+
+    def set(self, value):
+        """
+        Set the value
+
+        Args:
+            value (float): the new value
+        """
+        self._value = value
+
+    def dec(self, amount=1):
+        """
+        Decrease the value
+
+        Args:
+            amount (float): the amount to subtract
+        """
+        self._value -= amount
+
+
+class Registry:
+    """
+    A collection of metrics that are exposed together.
+    """
+    def __init__(self):
+        self._metrics = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        """
+        Add a metric
+
+        Args:
+            metric (Counter or Gauge): the metric
+
+        Returns:
+            Counter or Gauge: the metric
+
+        Raises:
+            ValueError: if a metric with the same name and labels is already
+                registered or one with the same name is of another type
+        """
+        with self._lock:
+            for other in self._metrics:
+                if other.name != metric.name:
+                    continue
+                if other.TYPE != metric.TYPE \
+                        or other.labels == metric.labels:
+                    raise ValueError(
+                        "Metric %s%r is already registered" % (
+                            metric.name, metric.labels))
+            self._metrics = self._metrics + [metric]
+        return metric
+
+    def unregister(self, metric):
+        """
+        Remove a metric
+
+        Args:
+            metric (Counter or Gauge): the metric
+        """
+        with self._lock:
+            self._metrics = [
+                other for other in self._metrics if other is not metric]
+
+    def counter(self, name, documentation, labels=None, function=None):
+        """
+        Make and register a counter. See `Counter`.
+
+        Returns:
+            Counter: the counter
+        """
+        return self.register(Counter(name, documentation, labels, function))
+
+    def gauge(self, name, documentation, labels=None, function=None):
+        """
+        Make and register a gauge. See `Counter`.
+
+        Returns:
+            Gauge: the gauge
+        """
+        return self.register(Gauge(name, documentation, labels, function))
+
+    def metrics(self):
+        """
+        The registered metrics
+
+        Returns:
+            list: the metrics in the order they were registered
+        """
+        return list(self._metrics)
+
+
+# metrics that are not tied to a single application eg. those of the hardware
+# backends
+DEFAULT_REGISTRY = Registry()
+
+
+def exposition(*registries):
+    """
+    Format metrics in the Prometheus text exposition format. Metrics with the
+    same name are grouped under a single HELP and TYPE line. Metrics that
+    currently have no value are left out.
+
+    Args:
+        registries: the registries whose metrics are formatted
+
+    Returns:
+        str: the formatted metrics
+    """
+    families = {}
+    for registry in registries:
+        for metric in registry.metrics():
+            families.setdefault(metric.name, []).append(metric)
+    lines = []
+    for name, metrics in families.items():
+        lines.append("# HELP %s %s" % (name, _escape_help(
+            metrics[0].documentation)))
+        lines.append("# TYPE %s %s" % (name, metrics[0].TYPE))
+        for metric in metrics:
+            try:
+                value = metric.value
+            # pylint: disable=broad-except
+            except Exception as error:
+                _LOGGER.warning("Failed to read %s: %r", name, error)
+                continue
+            if value is None:
+                continue
+            lines.append("%s%s %s" % (
+                name, _format_labels(metric.labels), _format_value(value)))
+    return "\n".join(lines) + "\n"
+
+
+class MetricsServer:
+    """
+    Serves metrics over HTTP from a background thread. Any path other than
+    /metrics is not found.
+
+    Args:
+        address (tuple or str): the (host, port) to listen on or the path of
+            a unix socket. Port 0 picks a free port.
+        registries (iterable): the registries whose metrics are served
+    """
+    def __init__(self, address, registries=(DEFAULT_REGISTRY,)):
+        self._address = address
+        self._registries = tuple(registries)
+        self._server = None
+        self._thread = None
+
+    @property
+    def address(self):
+        """
+        The address being listened on
+
+        Returns:
+            tuple or str: the (host, port) or unix socket path
+        """
+        if self._server is None:
+            return self._address
+        return self._server.server_address
+
+    def start(self):
+        """
+        Start serving
+
+        Returns:
+            MetricsServer: this server
+        """
+        handler = _make_handler(self._registries)
+        if isinstance(self._address, str):
+            if os.path.exists(self._address):
+                os.unlink(self._address)
+            self._server = _UnixHTTPServer(self._address, handler)
+        else:
+            self._server = _TCPHTTPServer(self._address, handler)
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="MetricsServer",
+            daemon=True)
+        self._thread.start()
+        _LOGGER.info("Serving metrics on %r", self.address)
+        return self
+
+    def stop(self):
+        """Stop serving"""
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+        if isinstance(self._address, str) and os.path.exists(self._address):
+            os.unlink(self._address)
+        self._server = None
+        self._thread = None
+
+
+class _TCPHTTPServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    daemon_threads = True
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn,
+                      socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def _make_handler(registries):
+
+    class _MetricsHandler(http.server.BaseHTTPRequestHandler):
+        # pylint: disable=invalid-name
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = exposition(*registries).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def address_string(self):
+            # unix socket clients have no address
+            if not self.client_address:
+                return "local"
+            return self.client_address[0]
+
+        def log_message(self, format, *args):
+            # pylint: disable=redefined-builtin
+            _LOGGER.debug(format, *args)
+
+    return _MetricsHandler
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{%s}" % ",".join(
+        '%s="%s"' % (name, _escape_label(str(value)))
+        for name, value in labels.items())
+
+
+def _format_value(value):
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, int):
+        return str(value)
+    value = float(value)
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(value)
+
+
+def _escape_help(text):
+    return text.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+def _escape_label(text):
+    return _escape_help(text).replace('"', '\\"')
@@ -0,0 +1,162 @@
+"""
+Motion control loop definitions. The control loop decouples the rate at which
+the robot's joints are updated from the rate at which a human interface device
+reports events.
+"""
+import logging
+import threading
+import time
+
+from daveshed.legobot import instrumentation
+from daveshed.legobot.robot import Robot
+
+_LOGGER = logging.getLogger("MOTION")
+
+
+class MotionLoop(threading.Thread, Robot):
+    """
+    A fixed-rate control loop that stands in for a robot. Movement commands
+    from a controller are accumulated as setpoints and applied to the robot
+    once per tick so that joint updates (and bus traffic) are bounded no matter
+    how bursty the input is.
+
+    Args:
+        robot (daveshed.legobot.robot.Robot): the robot to drive
+        frequency (float): the rate at which the robot is updated in Hz. This
+            defaults to the servo pwm frequency.
+    """
+    FREQUENCY_HZ = 50.0
+    AXES = ("X", "Y", "Z")
+
+    def __init__(self, robot, *args, frequency=FREQUENCY_HZ, **kwargs):
+        self.stop = threading.Event()
+        self._robot = robot
+        self._period = 1.0 / frequency
+        self._lock = threading.Lock()
+        self._displacement = dict.fromkeys(self.AXES, 0.0)
+        self._velocity = dict.fromkeys(self.AXES, 0.0)
+        self._pending_since = None
+        super().__init__(*args, **kwargs)
+
+    @property
+    def robot(self):
+        """
+        The robot driven by this control loop
+
+        Returns:
+            daveshed.legobot.robot.Robot: the robot object
+        """
+        return self._robot
+
+    @property
+    def period(self):
+        """
+        The control loop period
+
+        Returns:
+            float: the time between ticks in seconds
+        """
+        return self._period
+
+    def run(self):
+        deadline = time.monotonic()
+        while not self.stop.is_set():
+            self.tick()
+            deadline += self._period
+            delay = deadline - time.monotonic()
+            if delay < 0.0:
+                _LOGGER.debug("Control loop overran by %fs", -delay)
+                deadline = time.monotonic()
+                continue
+            self.stop.wait(delay)
+
+    def terminate(self):
+        """Graceful exit"""
+        self.stop.set()
+        if self.is_alive():
+            self.join()
+
+    def set_velocity(self, axis, velocity):
+        """
+        Set a velocity setpoint so that the robot keeps moving in the specified
+        axis on every tick until the setpoint is changed.
+
+        Args:
+            axis (str): the axis in which to move
+            velocity (float): the rate of movement per second
+        """
+        with self._lock:
+            self._velocity[axis] = velocity
+
+    def move_x(self, distance):
+        self._add_displacement("X", distance)
+
+    def move_y(self, distance):
+        self._add_displacement("Y", distance)
+
+    def move_z(self, distance):
+        self._add_displacement("Z", distance)
+
+    def move(self, x=0.0, y=0.0, z=0.0):
+        with self._lock:
+            self._mark_pending()
+            self._displacement["X"] += x
+            self._displacement["Y"] += y
+            self._displacement["Z"] += z
+
+    def open_grasper(self):
+        self._robot.open_grasper()
+
+    def close_grasper(self):
+        self._robot.close_grasper()
+
+    def home(self):
+        self._clear_setpoints()
+        return self._robot.home()
+
+    def enable(self):
+        self._robot.enable()
+
+    def disable(self):
+        self._clear_setpoints()
+        self._robot.disable()
+
+    def _add_displacement(self, axis, distance):
+        with self._lock:
+            self._mark_pending()
+            self._displacement[axis] += distance
+
+    def _mark_pending(self):
+        if self._pending_since is None:
+            self._pending_since = time.perf_counter()
+
+    def _clear_setpoints(self):
+        with self._lock:
+            for axis in self.AXES:
+                self._displacement[axis] = 0.0
+                self._velocity[axis] = 0.0
+            self._pending_since = None
+
+    def tick(self):
+        """
+        Apply the accumulated setpoints to the robot once. This is called on
+        every period while the thread is running but may be called by another
+        scheduler instead of starting the thread.
+        """
+        with self._lock:
+            distances = {
+                axis: self._displacement[axis]
+                      + self._velocity[axis] * self._period
+                for axis in self.AXES
+            }
+            for axis in self.AXES:
+                self._displacement[axis] = 0.0
+            pending_since, self._pending_since = self._pending_since, None
+        if pending_since is not None:
+            instrumentation.record(
+                instrumentation.MOTION_QUEUE,
+                time.perf_counter() - pending_since)
+        if any(distances.values()):
+            with instrumentation.timed(instrumentation.ROBOT_MOVE):
+                self._robot.move(
+                    x=distances["X"], y=distances["Y"], z=distances["Z"])
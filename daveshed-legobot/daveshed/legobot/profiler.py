@@ -0,0 +1,205 @@
+"""
+A sampling profiler for the application's threads that may be switched on and
+off while the application runs. A background thread periodically takes the
+stack of each profiled thread and counts how often each stack is seen. The
+profiled threads are not interrupted or traced so the cost to them is only
+the time that the sampler holds the interpreter lock, which at the default
+rate is a small fraction of a percent.
+
+Stacks are written in the collapsed format, one stack per line from the
+thread down to the innermost function followed by its count, that flamegraph
+tools read:
+
+    $ flamegraph.pl profile.txt > profile.svg
+"""
+import collections
+import logging
+import queue
+import signal
+import sys
+import threading
+
+_LOGGER = logging.getLogger("PROFILER")
+
+# samples per second
+DEFAULT_RATE_HZ = 100.0
+
+
+class SamplingProfiler:
+    """
+    Samples the stacks of a set of threads.
+
+    Args:
+        threads (iterable): the `threading.Thread`s to profile. Threads that
+            have not started or have finished are skipped.
+        rate (float): samples per second
+    """
+    def __init__(self, threads, rate=DEFAULT_RATE_HZ):
+        if rate <= 0.0:
+            raise ValueError("Sampling rate must be positive")
+        self._threads = list(threads)
+        self._interval = 1.0 / rate
+        self._lock = threading.Lock()
+        # held while the sampler is started or stopped. It is separate from
+        # the lock on the samples since stopping waits for the last sample.
+        self._running_lock = threading.RLock()
+        self._stacks = collections.Counter()
+        self._labels = {}
+        self._samples = 0
+        self._stop = threading.Event()
+        self._sampler = None
+        self._requests = None
+
+    @property
+    def running(self):
+        """
+        Whether stacks are being sampled
+
+        Returns:
+            bool: True if sampling
+        """
+        return self._sampler is not None
+
+    @property
+    def samples(self):
+        """
+        The number of times that the threads have been sampled
+
+        Returns:
+            int: the number of samples
+        """
+        return self._samples
+
+    def start(self):
+        """
+        Start sampling. Samples are added to any already taken.
+
+        Returns:
+            SamplingProfiler: this profiler
+        """
+        with self._running_lock:
+            if self._sampler is None:
+                self._stop.clear()
+                self._sampler = threading.Thread(
+                    target=self._run, name="SamplingProfiler", daemon=True)
+                self._sampler.start()
+                _LOGGER.info(
+                    "Profiling %s", ", ".join(
+                        thread.name for thread in self._threads))
+        return self
+
+    def stop(self):
+        """Stop sampling. The samples taken are kept."""
+        with self._running_lock:
+            if self._sampler is None:
+                return
+            self._stop.set()
+            self._sampler.join()
+            self._sampler = None
+        _LOGGER.info("Stopped profiling after %d samples", self._samples)
+
+    def toggle(self, path=None):
+        """
+        Start sampling if stopped or otherwise stop sampling
+
+        Args:
+            path (str): a file that samples are written to when stopping
+        """
+        with self._running_lock:
+            if not self.running:
+                self.start()
+                return
+            self.stop()
+        if path is not None:
+            self.dump(path)
+
+    def reset(self):
+        """Forget the samples taken so far"""
+        with self._lock:
+            self._stacks.clear()
+            self._samples = 0
+
+    def sample(self):
+        """Take a sample of each profiled thread's stack now"""
+        frames = sys._current_frames()  # pylint: disable=protected-access
+        with self._lock:
+            for thread in self._threads:
+                frame = frames.get(thread.ident)
+                if frame is not None:
+                    self._stacks[(thread.name, self._stack(frame))] += 1
+            self._samples += 1
+
+    def collapsed(self):
+        """
+        The samples in the collapsed stack format
+
+        Returns:
+            str: a line per distinct stack with the number of times it was
+                sampled, most frequent first
+        """
+        with self._lock:
+            stacks = self._stacks.most_common()
+        return "".join(
+            "%s %d\n" % (";".join((thread_name,) + tuple(
+                self._labels[code] for code in stack)), count)
+            for (thread_name, stack), count in stacks)
+
+    def dump(self, path):
+        """
+        Write the samples to a file in the collapsed stack format
+
+        Args:
+            path (str): the file to write. It is overwritten if it exists.
+        """
+        with open(path, "w") as stream:
+            stream.write(self.collapsed())
+        _LOGGER.info("Wrote %d samples to %s", self._samples, path)
+
+    def install_signal_handler(self, path, signum=signal.SIGUSR1):
+        """
+        Toggle sampling whenever the process receives a signal, writing the
+        samples to a file each time that sampling stops, eg.
+
+            $ kill -USR1 <pid>  # start profiling
+            $ kill -USR1 <pid>  # stop profiling and write the samples
+
+        The handler only queues the request. Sampling is started or stopped,
+        and the samples written, by a background thread so that the handler
+        never waits on the sampler or the file. This must be called from the
+        main thread.
+
+        Args:
+            path (str): the file that samples are written to
+            signum (int): the signal
+        """
+        if self._requests is None:
+            # SimpleQueue.put may safely be called from a signal handler
+            self._requests = queue.SimpleQueue()
+            threading.Thread(
+                target=self._serve_requests, name="SamplingProfilerSignal",
+                daemon=True).start()
+        requests = self._requests
+        signal.signal(signum, lambda *_: requests.put(path))
+
+    def _serve_requests(self):
+        while True:
+            self.toggle(self._requests.get())
+
+    def _run(self):
+        while not self._stop.wait(self._interval):
+            self.sample()
+
+    def _stack(self, frame):
+        # the stack is kept as code objects from the outermost inwards and
+        # labelled once per code object rather than per sample
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            if code not in self._labels:
+                self._labels[code] = "%s.%s" % (
+                    frame.f_globals.get("__name__", "?"),
+                    getattr(code, "co_qualname", code.co_name))
+            stack.append(code)
+            frame = frame.f_back
+        stack.reverse()
+        return tuple(stack)
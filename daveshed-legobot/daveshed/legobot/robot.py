@@ -4,7 +4,14 @@ Robot class definitions
 import abc
 import logging
 
+from daveshed.legobot.joint import set_angles
+from daveshed.legobot import kinematics
+from daveshed.legobot import logs
+from daveshed.legobot import trajectory
+from daveshed.legobot.trajectory import TrajectoryHandle
+
 _LOGGER = logging.getLogger("ROBOT")
+_HOT_PATH_LOGGER = logs.HotPathLogger(_LOGGER)
 
 
 class Robot(abc.ABC):
@@ -40,6 +47,23 @@ class Robot(abc.ABC):
             distance (float): the distance to move
         """
 
+    def move(self, x=0.0, y=0.0, z=0.0):
+        """
+        Respond to movement commands in several axes at once. Axes with no
+        movement are ignored.
+
+        Args:
+            x (float): the distance to move in the x-axis
+            y (float): the distance to move in the y-axis
+            z (float): the distance to move in the z-axis
+        """
+        if x:
+            self.move_x(x)
+        if y:
+            self.move_y(y)
+        if z:
+            self.move_z(z)
+
     @abc.abstractmethod
     def open_grasper(self):
         """
@@ -55,7 +79,11 @@ class Robot(abc.ABC):
     @abc.abstractmethod
     def home(self):
         """
-        Return the robot to its home position
+        Return the robot to its home position. This does not block.
+
+        Returns:
+            daveshed.legobot.trajectory.TrajectoryHandle: a handle to wait on
+                or cancel homing
         """
 
     @abc.abstractmethod
@@ -72,6 +100,26 @@ class Robot(abc.ABC):
         to instructions to move or open/close the grasper etc.
         """
 
+    @property
+    def joint_angles(self):
+        """
+        The current angle of each joint
+
+        Returns:
+            tuple: the angles in degrees. Empty if the robot has no joints.
+        """
+        return ()
+
+    @property
+    def grasper_open(self):
+        """
+        The current status of the grasper
+
+        Returns:
+            bool: True if the grasper is open or None if it is not known
+        """
+        return None
+
 
 class RobotStub(Robot):
     """
@@ -79,13 +127,13 @@ class RobotStub(Robot):
     python logger.
     """
     def move_x(self, distance):
-        _LOGGER.info("Moving %r in x...", distance)
+        _HOT_PATH_LOGGER.info("Moving %r in x...", distance)
 
     def move_y(self, distance):
-        _LOGGER.info("Moving %r in y...", distance)
+        _HOT_PATH_LOGGER.info("Moving %r in y...", distance)
 
     def move_z(self, distance):
-        _LOGGER.info("Moving %r in z...", distance)
+        _HOT_PATH_LOGGER.info("Moving %r in z...", distance)
 
     def stop(self):
         _LOGGER.info("Stop moving")
@@ -98,6 +146,7 @@ class RobotStub(Robot):
 
     def home(self):
         _LOGGER.info("Homing...")
+        return TrajectoryHandle.completed()
 
     def enable(self):
         _LOGGER.info("Enabled")
@@ -109,6 +158,8 @@ class RobotStub(Robot):
 class ThreeDofLegoRobot(Robot):
     """
     A simple lego robot implementation that has three joints and a grasper.
+    The robot starts homing on creation. Any movement command cancels homing
+    or any other trajectory that is in progress.
 
     Args:
         joints (tuple): `JointController`s corresponding to the robot's joints
@@ -118,20 +169,33 @@ class ThreeDofLegoRobot(Robot):
     def __init__(self, joints, grasper):
         self._joints = joints
         self._grasper = grasper
+        self._trajectory = TrajectoryHandle.completed()
         self.home()
 
     def move_x(self, distance):
-        _LOGGER.info("Moving %r in x...", distance)
+        _HOT_PATH_LOGGER.info("Moving %r in x...", distance)
+        self._stop_trajectory()
         self._joints[0].angle += distance
 
     def move_y(self, distance):
-        _LOGGER.info("Moving %r in y...", distance)
+        _HOT_PATH_LOGGER.info("Moving %r in y...", distance)
+        self._stop_trajectory()
         self._joints[1].angle += distance
 
     def move_z(self, distance):
-        _LOGGER.info("Moving %r in z...", distance)
+        _HOT_PATH_LOGGER.info("Moving %r in z...", distance)
+        self._stop_trajectory()
         self._joints[2].angle += distance
 
+    def move(self, x=0.0, y=0.0, z=0.0):
+        _HOT_PATH_LOGGER.info("Moving %r in x, %r in y, %r in z...", x, y, z)
+        self._stop_trajectory()
+        set_angles({
+            joint: joint.angle + distance
+            for joint, distance in zip(self._joints, (x, y, z))
+            if distance
+        })
+
     def open_grasper(self):
         _LOGGER.info("Opening grasper...")
         self._grasper.open()
@@ -142,8 +206,36 @@ class ThreeDofLegoRobot(Robot):
 
     def home(self):
         _LOGGER.info("Homing...")
-        for joint in self._joints:
-            joint.home()
+        return self.move_to([joint.home_angle for joint in self._joints])
+
+    @property
+    def joint_angles(self):
+        return tuple(joint.angle for joint in self._joints)
+
+    @property
+    def grasper_open(self):
+        return self._grasper.is_open
+
+    def move_to(self, angles, **limits):
+        """
+        Move all joints to the specified angles along a planned trajectory so
+        that they start and finish together. This does not block.
+
+        Args:
+            angles (sequence): the target angle of each joint in degrees
+            limits: velocity, acceleration and profile options passed to
+                `daveshed.legobot.trajectory.plan_move`
+
+        Returns:
+            daveshed.legobot.trajectory.TrajectoryHandle: a handle to wait on
+                or cancel the move
+        """
+        self._stop_trajectory()
+        samples = trajectory.plan_move(
+            [joint.angle for joint in self._joints], angles, **limits)
+        self._trajectory = trajectory.run_trajectory(
+            trajectory.trajectory_setpoints(self._joints, samples))
+        return self._trajectory
 
     def enable(self):
         _LOGGER.info("Enabled")
@@ -152,3 +244,86 @@ class ThreeDofLegoRobot(Robot):
     def disable(self):
         _LOGGER.info("Disabled")
         # FIXME: requires states
+
+    def _stop_trajectory(self):
+        if not self._trajectory.done():
+            _LOGGER.info("Cancelling trajectory")
+            self._trajectory.cancel()
+            self._trajectory.wait()
+
+
+class CartesianLegoRobot(ThreeDofLegoRobot):
+    """
+    A three joint lego robot that moves its end effector in straight lines
+    along the x, y and z axes. Distances are in millimetres. The robot keeps
+    the position it was last told to move to rather than reading it back from
+    the joints so that small moves are not lost to rounding. Moves towards a
+    position out of reach stop at the nearest position that can be reached
+    without changing the way the arm is posed eg. turning the base right
+    round. Moves that would need any joint to turn further than
+    `MAX_JOINT_STEP_DEG` at once are rejected.
+
+    Args:
+        joints (tuple): `JointController`s corresponding to the robot's base,
+            shoulder and elbow
+        grasper (daveshed.legobot.grasper.Grasper): a grasper to be part of the
+            robot
+        arm (daveshed.legobot.kinematics.ArmKinematics): the kinematics of the
+            arm. Defaults to the lego arm.
+    """
+    MAX_JOINT_STEP_DEG = 30.0
+
+    def __init__(self, joints, grasper, arm=None):
+        self._arm = kinematics.ArmKinematics() if arm is None else arm
+        self._target = None
+        super().__init__(joints, grasper)
+
+    @property
+    def position(self):
+        """
+        The current position of the end effector
+
+        Returns:
+            tuple: the (x, y, z) position in millimetres
+        """
+        return self._arm.forward(self.joint_angles)
+
+    def move_x(self, distance):
+        self.move(x=distance)
+
+    def move_y(self, distance):
+        self.move(y=distance)
+
+    def move_z(self, distance):
+        self.move(z=distance)
+
+    def move(self, x=0.0, y=0.0, z=0.0):
+        _HOT_PATH_LOGGER.info("Moving %r in x, %r in y, %r in z...", x, y, z)
+        self._stop_trajectory()
+        start = self.position if self._target is None else self._target
+        target = tuple(
+            coordinate + distance
+            for coordinate, distance in zip(start, (x, y, z)))
+        current = self.joint_angles
+        angles = self._arm.inverse(target, seed=current)
+        step = max(abs(angle - last) for angle, last in zip(angles, current))
+        if step > self.MAX_JOINT_STEP_DEG:
+            _HOT_PATH_LOGGER.info(
+                "Rejected move to %r that needs a %.1f degree step",
+                target, step)
+            return
+        reached = self._arm.forward(angles)
+        # only follow the arm when the target was out of reach so that the
+        # next move starts from where the arm stopped
+        if _distance(reached, target) > self._arm.resolution:
+            target = reached
+        self._target = target
+        set_angles(dict(zip(self._joints, angles)))
+
+    def move_to(self, angles, **limits):
+        self._target = None
+        return super().move_to(angles, **limits)
+
+
+def _distance(first, second):
+    return sum((a - b) ** 2 for a, b in zip(first, second)) ** 0.5
@@ -0,0 +1,247 @@
+"""
+Joint trajectory definitions. A trajectory is a sequence of setpoints, each
+mapping joints to the angles they should be at, that is followed by a
+background thread at a fixed rate so that the caller is never blocked. Moves
+between joint angles are planned up front as arrays of time-parameterised
+samples. numpy is only imported when a move is first planned so that importing
+the robot does not pay for it.
+"""
+import logging
+import threading
+import time
+
+from daveshed.legobot import lazy
+from daveshed.legobot.joint import set_angles
+
+_LOGGER = logging.getLogger("TRAJECTORY")
+
+PERIOD_SEC = 0.02
+MAX_VELOCITY_DEG_PER_SEC = 50.0
+MAX_ACCELERATION_DEG_PER_SEC2 = 250.0
+TRAPEZOIDAL = "trapezoidal"
+S_CURVE = "s-curve"
+
+
+class TrajectoryHandle:
+    """
+    A handle on a trajectory that is being followed in the background. The
+    caller may wait for the trajectory to finish or cancel it.
+    """
+    def __init__(self):
+        self._cancelled = threading.Event()
+        self._finished = threading.Event()
+
+    @classmethod
+    def completed(cls):
+        """
+        A handle for a trajectory that has nothing left to do
+
+        Returns:
+            TrajectoryHandle: a handle that is already done
+        """
+        handle = cls()
+        handle._finished.set()
+        return handle
+
+    @property
+    def cancelled(self):
+        """
+        Whether the trajectory has been cancelled
+
+        Returns:
+            bool: True if cancel has been called
+        """
+        return self._cancelled.is_set()
+
+    def done(self):
+        """
+        Whether the trajectory has finished either because the last setpoint
+        was reached or because it was cancelled.
+
+        Returns:
+            bool: True if the trajectory is no longer running
+        """
+        return self._finished.is_set()
+
+    def wait(self, timeout=None):
+        """
+        Block until the trajectory has finished
+
+        Args:
+            timeout (float): the maximum time to wait in seconds
+
+        Returns:
+            bool: True if the trajectory finished before the timeout
+        """
+        return self._finished.wait(timeout)
+
+    def cancel(self):
+        """
+        Stop following the trajectory. Joints are left at the last setpoint
+        that was applied.
+        """
+        self._cancelled.set()
+
+
+def run_trajectory(setpoints, period=PERIOD_SEC):
+    """
+    Follow a trajectory in a background thread applying one setpoint per
+    period.
+
+    Args:
+        setpoints (iterable): dicts mapping joints to the angle to set
+        period (float): the time between setpoints in seconds
+
+    Returns:
+        TrajectoryHandle: a handle to wait on or cancel the trajectory
+    """
+    handle = TrajectoryHandle()
+    threading.Thread(
+        target=_follow, args=(setpoints, period, handle), daemon=True).start()
+    return handle
+
+
+def plan_move(start, target, max_velocity=MAX_VELOCITY_DEG_PER_SEC,
+              max_acceleration=MAX_ACCELERATION_DEG_PER_SEC2,
+              period=PERIOD_SEC, profile=TRAPEZOIDAL):
+    """
+    Plan a synchronised move of several joints. Every joint follows the same
+    normalised motion profile scaled to its own distance so that all joints
+    start and finish together and the joint travelling furthest is held to the
+    velocity and acceleration limits.
+
+    Args:
+        start (sequence): the starting angle of each joint in degrees
+        target (sequence): the target angle of each joint in degrees
+        max_velocity (float): the velocity limit in degrees per second
+        max_acceleration (float): the acceleration limit in degrees per second
+            squared
+        period (float): the time between samples in seconds
+        profile (str): `TRAPEZOIDAL` or `S_CURVE`
+
+    Returns:
+        numpy.ndarray: the angle of every joint at each sample with shape
+            (samples, joints). The last sample is the target.
+    """
+    np = lazy.numpy()
+    start = np.asarray(start, dtype=float)
+    target = np.asarray(target, dtype=float)
+    distance = target - start
+    longest = np.max(np.abs(distance), initial=0.0)
+    if longest == 0.0:
+        return np.empty((0, start.size))
+    progress = _PROFILES[profile](longest, max_velocity, max_acceleration)
+    duration = progress.duration
+    samples = max(1, int(np.ceil(duration / period)))
+    times = np.minimum(np.arange(1, samples + 1) * period, duration)
+    return start + np.outer(progress(times), distance)
+
+
+def trajectory_setpoints(joints, samples):
+    """
+    Turn planned samples into setpoints that may be followed by
+    `run_trajectory`. Each joint is handed its planned angles to prepare
+    before the first setpoint is made and is released once the setpoints
+    are finished with.
+
+    Args:
+        joints (sequence): the `JointControllerBase`s in the same order as the
+            columns of the samples
+        samples (numpy.ndarray): the planned angles of shape (samples, joints)
+
+    Yields:
+        dict: maps the joints whose angle changes from the previous setpoint
+            to the angle to set
+    """
+    previous = [joint.angle for joint in joints]
+    for joint, angles in zip(joints, samples.T):
+        joint.prepare(angles)
+    try:
+        for row in samples.tolist():
+            yield {
+                joint: angle
+                for joint, angle, last in zip(joints, row, previous)
+                if angle != last
+            }
+            previous = row
+    finally:
+        for joint in joints:
+            joint.release()
+
+
+class _TrapezoidalProgress:
+    # pylint: disable=missing-docstring,too-few-public-methods
+    # constant acceleration up to the velocity limit, cruise then constant
+    # deceleration. Short moves never reach the limit and are triangular.
+    def __init__(self, distance, max_velocity, max_acceleration):
+        np = lazy.numpy()
+        self._distance = distance
+        self._acceleration = max_acceleration
+        if distance * max_acceleration >= max_velocity ** 2:
+            self._ramp = max_velocity / max_acceleration
+            cruise = (distance - max_velocity * self._ramp) / max_velocity
+        else:
+            self._ramp = np.sqrt(distance / max_acceleration)
+            cruise = 0.0
+        self._velocity = self._acceleration * self._ramp
+        self.duration = 2.0 * self._ramp + cruise
+
+    def __call__(self, times):
+        np = lazy.numpy()
+        ramp_distance = 0.5 * self._acceleration * self._ramp ** 2
+        remaining = self.duration - times
+        position = np.where(
+            times < self._ramp,
+            0.5 * self._acceleration * times ** 2,
+            np.where(
+                remaining < self._ramp,
+                self._distance - 0.5 * self._acceleration * remaining ** 2,
+                ramp_distance + self._velocity * (times - self._ramp)))
+        return position / self._distance
+
+
+class _SCurveProgress:
+    # pylint: disable=missing-docstring,too-few-public-methods
+    # a minimum-jerk quintic so that acceleration ramps smoothly. Its peak
+    # velocity is 15/8 and peak acceleration 10/sqrt(3) of the average.
+    def __init__(self, distance, max_velocity, max_acceleration):
+        np = lazy.numpy()
+        self.duration = max(
+            1.875 * distance / max_velocity,
+            np.sqrt(10.0 / np.sqrt(3.0) * distance / max_acceleration))
+
+    def __call__(self, times):
+        tau = times / self.duration
+        return tau ** 3 * (10.0 - 15.0 * tau + 6.0 * tau ** 2)
+
+
+_PROFILES = {
+    TRAPEZOIDAL: _TrapezoidalProgress,
+    S_CURVE: _SCurveProgress,
+}
+
+
+def _follow(setpoints, period, handle):
+    # pylint: disable=protected-access
+    try:
+        deadline = time.monotonic()
+        for setpoint in setpoints:
+            if handle.cancelled:
+                break
+            set_angles(setpoint)
+            deadline += period
+            if handle._cancelled.wait(max(0.0, deadline - time.monotonic())):
+                break
+    # pylint: disable=broad-except
+    except Exception:
+        _LOGGER.exception("Trajectory failed")
+    finally:
+        try:
+            # a cancelled trajectory is closed so that it is finished with
+            # before the handle says so
+            close = getattr(setpoints, "close", None)
+            if close is not None:
+                close()
+        finally:
+            _LOGGER.debug("Trajectory finished")
+            handle._finished.set()
@@ -0,0 +1,47 @@
+"""
+Stand-in input devices shared by the tests
+"""
+import os
+import struct
+from types import SimpleNamespace
+
+import inputs
+
+# the evdev (type, code) of the records that the stand-in devices emit
+EVENT_CODES = {
+    (0, 0): ("Sync", "SYN_REPORT"),
+    (1, 272): ("Key", "BTN_LEFT"),
+    (2, 0): ("Relative", "REL_X"),
+}
+
+
+class PipeDevice:
+    """Stands in for an evdev device whose character device is a pipe"""
+
+    def __init__(self):
+        read_fd, self._write_fd = os.pipe()
+        self._character_device = os.fdopen(read_fd, "rb")
+
+    def emit(self, *records):
+        os.write(self._write_fd, b"".join(
+            struct.pack(inputs.EVENT_FORMAT, 0, 0, ev_type, code, value)
+            for ev_type, code, value in records))
+
+    def emit_x(self, delta):
+        self.emit((2, 0, delta), (0, 0, 0))
+
+    def hang_up(self):
+        if self._write_fd is not None:
+            os.close(self._write_fd)
+            self._write_fd = None
+
+    def close(self):
+        self.hang_up()
+        self._character_device.close()
+
+    @staticmethod
+    def _make_event(tv_sec, tv_usec, ev_type, code, value):
+        ev_type, code = EVENT_CODES[(ev_type, code)]
+        return SimpleNamespace(
+            ev_type=ev_type, code=code, state=value,
+            timestamp=tv_sec + tv_usec / 1e6)
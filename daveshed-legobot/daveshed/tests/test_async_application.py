@@ -0,0 +1,79 @@
+import asyncio
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from daveshed.legobot.async_application import AsyncApplication
+from daveshed.legobot.events import base
+from daveshed.legobot.events import mouse
+from daveshed.legobot.motion import MotionLoop
+from daveshed.legobot.robot import Robot
+from daveshed.legobot.trajectory import TrajectoryHandle
+
+from devices import PipeDevice
+
+
+class AsyncApplicationTestGroup(unittest.TestCase):
+
+    def setUp(self):
+        self.robot = mock.Mock(name="Robot", spec_set=Robot)
+        self.robot.home.return_value = TrajectoryHandle.completed()
+        self.device = PipeDevice()
+        self.addCleanup(self.device.close)
+        bus = base.EventBus()
+        motion_loop = MotionLoop(self.robot)
+        bus.subscribe(
+            mouse.MouseMovedX, lambda event: motion_loop.move_x(event.delta))
+        factory = SimpleNamespace(
+            robot=self.robot,
+            motion_loop=motion_loop,
+            make_input_stream=lambda: base.InputStream(
+                self.device, mouse.MouseInputEvent.from_raw_input_event, bus,
+                shed_load=False))
+        self.application = AsyncApplication(factory)
+        # raw events are stamped at the epoch so treat them as real time.
+        patcher = mock.patch.object(
+            base.UserInputEventBase, "is_real_time", True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def run_until_complete(self, coroutine):
+        return asyncio.run(asyncio.wait_for(coroutine, 2.0))
+
+    def test_input_moves_robot_until_device_is_closed(self):
+        async def scenario():
+            running = asyncio.create_task(self.application.run())
+            self.device.emit_x(5)
+            await asyncio.sleep(0.1)
+            self.device.hang_up()
+            await running
+
+        self.run_until_complete(scenario())
+        self.robot.move.assert_called_once_with(x=5.0, y=0.0, z=0.0)
+        self.robot.home.assert_called_once()
+
+    def test_stop_does_not_wait_for_input(self):
+        async def scenario():
+            asyncio.get_running_loop().call_later(0.05, self.application.stop)
+            await self.application.run()
+
+        self.run_until_complete(scenario())
+        self.robot.home.assert_called_once()
+
+    def test_homing_can_be_cancelled(self):
+        handle = TrajectoryHandle()
+        self.robot.home.return_value = handle
+
+        async def scenario():
+            running = asyncio.create_task(self.application.run())
+            homing = asyncio.create_task(self.application.home())
+            await asyncio.sleep(0.1)
+            homing.cancel()
+            await asyncio.sleep(0.1)
+            self.assertTrue(handle.cancelled)
+            # let the robot home on the way out
+            self.robot.home.return_value = TrajectoryHandle.completed()
+            self.application.stop()
+            await running
+
+        self.run_until_complete(scenario())
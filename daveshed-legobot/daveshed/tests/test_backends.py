@@ -0,0 +1,42 @@
+import sys
+import unittest
+
+from daveshed.legobot import backends
+from daveshed.legobot import factory
+from daveshed.legobot.joint import FakeJointController
+
+
+def make_fake_joints(channels):
+    return [FakeJointController(90.0, channel) for channel in channels]
+
+
+class BackendsTestGroup(unittest.TestCase):
+
+    def tearDown(self):
+        for name in ("fake", "fake-by-reference"):
+            backends._REGISTERED.pop(name, None)
+            backends._LOADED.pop(name, None)
+
+    def test_registered_backend_makes_joints(self):
+        backends.register("fake", make_fake_joints)
+        joints = backends.make_joints((0, 1, 2), "fake")
+        self.assertEqual(len(joints), 3)
+        self.assertIn("fake", backends.available())
+
+    def test_backend_references_are_imported_when_loaded(self):
+        backends.register(
+            "fake-by-reference", "daveshed.tests_backend_module:make_joints")
+        self.assertNotIn("daveshed.tests_backend_module", sys.modules)
+        with self.assertRaises(ImportError):
+            backends.load("fake-by-reference")
+        backends.register(
+            "fake-by-reference", __name__ + ":make_fake_joints")
+        self.assertIs(backends.load("fake-by-reference"), make_fake_joints)
+
+    def test_unknown_backends_are_rejected(self):
+        with self.assertRaises(LookupError):
+            backends.load("no-such-backend")
+
+    def test_stub_factories_do_not_load_hardware(self):
+        factory.MouseRobotStubFactory()
+        self.assertNotIn("adafruit", backends._LOADED)
@@ -2,6 +2,8 @@ import unittest
 from unittest import mock
 
 from daveshed.legobot import controller
+from daveshed.legobot.events import base
+from daveshed.legobot.events import trackpad
 from daveshed.legobot.robot import Robot
 
 
@@ -55,3 +57,53 @@ class ControllerTestGroup(unittest.TestCase):
         self.robot.move_x.assert_not_called()
         self.robot.move_y.assert_not_called()
         self.robot.move_z.assert_not_called()
+
+
+class TrackpadControllerTestGroup(unittest.TestCase):
+
+    def setUp(self):
+        self.robot = mock.Mock(name="Robot", spec_set=Robot)
+        self.bus = base.EventBus()
+        self.controller = controller.TrackpadController(self.robot, self.bus)
+        self.controller.register_handlers(trackpad)
+
+    def publish(self, event_class, state=1):
+        raw_event = mock.Mock(state=state, timestamp=0.0)
+        self.bus.publish(event_class(raw_event))
+
+    def test_right_button_switches_y_movement_to_z(self):
+        self.publish(trackpad.PadTouched)
+        self.publish(trackpad.RightButtonClicked)
+        self.publish(trackpad.TrackpadMovedY, 0)
+        self.publish(trackpad.TrackpadMovedY, 100)
+        self.robot.move_z.assert_called_once_with(100 * 0.05)
+        self.publish(trackpad.RightButtonReleased)
+        self.publish(trackpad.TrackpadMovedY, 100)
+        self.publish(trackpad.TrackpadMovedY, 0)
+        self.robot.move_y.assert_called_once_with(-100 * 0.05)
+
+    def test_x_movement_is_ignored_in_z_mode(self):
+        self.publish(trackpad.PadTouched)
+        self.publish(trackpad.RightButtonClicked)
+        self.publish(trackpad.TrackpadMovedX, 0)
+        self.publish(trackpad.TrackpadMovedX, 100)
+        self.robot.move_x.assert_not_called()
+        self.publish(trackpad.RightButtonReleased)
+        self.publish(trackpad.TrackpadMovedX, 0)
+        self.publish(trackpad.TrackpadMovedX, 100)
+        self.robot.move_x.assert_called_once_with(100 * 0.05)
+
+    def test_movement_below_the_threshold_is_ignored(self):
+        self.publish(trackpad.PadTouched)
+        self.publish(trackpad.TrackpadMovedX, 100)
+        self.publish(trackpad.TrackpadMovedX, 102)
+        self.robot.move_x.assert_not_called()
+        self.publish(trackpad.TrackpadMovedX, 110)
+        self.robot.move_x.assert_called_once_with(10 * 0.05)
+
+    def test_deregistering_leaves_other_subscribers(self):
+        other = self.bus.subscribe(trackpad.LeftButtonClicked, mock.Mock())
+        self.controller.deregister_handlers()
+        self.publish(trackpad.LeftButtonClicked)
+        self.robot.open_grasper.assert_not_called()
+        other.assert_called_once()
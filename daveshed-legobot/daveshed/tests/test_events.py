@@ -0,0 +1,259 @@
+import time
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from daveshed.legobot.events import base
+from daveshed.legobot.events import gamepad
+from daveshed.legobot.events import mouse
+from daveshed.legobot.events import trackpad
+
+
+def make_raw_event(ev_type, code, state, timestamp=None):
+    return SimpleNamespace(
+        ev_type=ev_type,
+        code=code,
+        state=state,
+        timestamp=time.time() if timestamp is None else timestamp)
+
+
+class FakeDevice:
+
+    def __init__(self, *reads):
+        self._reads = list(reads)
+        self.exhausted = None
+
+    def read(self):
+        result = self._reads.pop(0)
+        if not self._reads and self.exhausted:
+            self.exhausted.set()
+        return result
+
+
+class ParserTestGroup(unittest.TestCase):
+
+    def test_motion_is_routed_for_any_state(self):
+        parse = mouse.MouseInputEvent.from_raw_input_event
+        for state in (-5, 1, 40):
+            event = parse(make_raw_event("Relative", "REL_WHEEL", state))
+            self.assertIsInstance(event, mouse.WheelMoved)
+            self.assertEqual(event.delta, state)
+
+    def test_keys_are_routed_by_state(self):
+        parse = trackpad.TrackpadInputEvent.from_raw_input_event
+        self.assertIsInstance(
+            parse(make_raw_event("Key", "BTN_TOUCH", 1)), trackpad.PadTouched)
+        self.assertIsInstance(
+            parse(make_raw_event("Key", "BTN_TOUCH", 0)), trackpad.PadReleased)
+
+    def test_gamepad_dpad_events_are_routed(self):
+        parse = gamepad.GamepadInputEvent.from_raw_input_event
+        self.assertIsInstance(
+            parse(make_raw_event("Absolute", "ABS_Y", 255)),
+            gamepad.UpDpadPressed)
+        self.assertIsNone(parse(make_raw_event("Absolute", "ABS_Y", 128)))
+
+    def test_unrouted_events_are_ignored(self):
+        parse = mouse.MouseInputEvent.from_raw_input_event
+        self.assertIsNone(parse(make_raw_event("Key", "BTN_SIDE", 1)))
+        self.assertIsNone(parse(make_raw_event("Absolute", "ABS_X", 3)))
+        self.assertIsNone(parse(make_raw_event("Sync", "SYN_REPORT", 0)))
+
+    def test_route_table_does_not_grow_with_new_states(self):
+        parse = trackpad.TrackpadInputEvent.from_raw_input_event
+        # pylint: disable=protected-access
+        routes = trackpad.TrackpadInputEvent._routes
+        size = len(routes)
+        for state in range(1000):
+            self.assertIsInstance(
+                parse(make_raw_event("Absolute", "ABS_X", state)),
+                trackpad.TrackpadMovedX)
+            self.assertIsNone(
+                parse(make_raw_event("Misc", "MSC_TIMESTAMP", state)))
+            self.assertIsNone(
+                parse(make_raw_event("Absolute", "ABS_MT_POSITION_X", state)))
+        self.assertEqual(len(routes), size)
+
+    def test_unknown_event_types_are_rejected(self):
+        parse = mouse.MouseInputEvent.from_raw_input_event
+        with self.assertRaises(AssertionError):
+            parse(make_raw_event("LED", "LED_NUML", 1))
+
+
+class EventBusTestGroup(unittest.TestCase):
+
+    def setUp(self):
+        self.bus = base.EventBus()
+        self.event = mouse.LeftButtonClicked(
+            make_raw_event("Key", "BTN_LEFT", 1))
+
+    def test_all_subscribers_are_called_in_order(self):
+        calls = []
+        self.bus.subscribe(mouse.LeftButtonClicked, lambda _: calls.append(1))
+        self.bus.subscribe(mouse.LeftButtonClicked, lambda _: calls.append(2))
+        self.bus.publish(self.event)
+        self.assertEqual(calls, [1, 2])
+
+    def test_unsubscribe_removes_only_the_given_handler(self):
+        first = self.bus.subscribe(mouse.LeftButtonClicked, mock.Mock())
+        second = self.bus.subscribe(mouse.LeftButtonClicked, mock.Mock())
+        self.bus.unsubscribe(mouse.LeftButtonClicked, first)
+        self.bus.publish(self.event)
+        first.assert_not_called()
+        second.assert_called_once_with(self.event)
+
+    def test_exclusive_subscription_replaces_handlers(self):
+        first = self.bus.subscribe(mouse.LeftButtonClicked, mock.Mock())
+        second = self.bus.subscribe(
+            mouse.LeftButtonClicked, mock.Mock(), exclusive=True)
+        self.assertEqual(self.bus.handlers(mouse.LeftButtonClicked), (second,))
+        self.bus.unsubscribe(mouse.LeftButtonClicked)
+        self.assertEqual(self.bus.handlers(mouse.LeftButtonClicked), ())
+        first.assert_not_called()
+
+    def test_buses_are_independent(self):
+        handler = self.bus.subscribe(mouse.LeftButtonClicked, mock.Mock())
+        self.event.consume(base.EventBus())
+        self.event.consume()
+        handler.assert_not_called()
+        self.event.consume(self.bus)
+        handler.assert_called_once_with(self.event)
+
+
+class InputStreamTestGroup(unittest.TestCase):
+
+    def make_stream(self, *reads, **kwargs):
+        return base.InputStream(
+            device=FakeDevice(*reads),
+            parser=mouse.MouseInputEvent.from_raw_input_event,
+            **kwargs)
+
+    def test_all_events_in_a_read_are_parsed(self):
+        stream = self.make_stream([
+            make_raw_event("Relative", "REL_X", 4),
+            make_raw_event("Relative", "REL_Y", -2),
+            make_raw_event("Key", "BTN_LEFT", 1),
+        ])
+        events = stream.read_events()
+        self.assertEqual(
+            [type(event) for event in events],
+            [mouse.MouseMovedX, mouse.MouseMovedY, mouse.LeftButtonClicked])
+
+    def test_ignored_events_are_dropped_from_batch(self):
+        stream = self.make_stream([
+            make_raw_event("Sync", "SYN_REPORT", 0),
+            make_raw_event("Misc", "MSC_SCAN", 0),
+        ])
+        self.assertEqual(stream.read_events(), [])
+
+    def test_relative_motion_is_coalesced_per_axis(self):
+        stream = self.make_stream([
+            make_raw_event("Relative", "REL_X", 4),
+            make_raw_event("Relative", "REL_Y", -2),
+            make_raw_event("Sync", "SYN_REPORT", 0),
+            make_raw_event("Relative", "REL_X", 3),
+            make_raw_event("Sync", "SYN_REPORT", 0),
+        ])
+        [moved_x, moved_y] = stream.read_events()
+        self.assertIsInstance(moved_x, mouse.MouseMovedX)
+        self.assertEqual(moved_x.delta, 7)
+        self.assertIsInstance(moved_y, mouse.MouseMovedY)
+        self.assertEqual(moved_y.delta, -2)
+
+    def test_motion_is_released_before_button_events(self):
+        stream = self.make_stream([
+            make_raw_event("Relative", "REL_X", 4),
+            make_raw_event("Key", "BTN_LEFT", 1),
+            make_raw_event("Relative", "REL_X", 1),
+            make_raw_event("Sync", "SYN_REPORT", 0),
+        ])
+        events = stream.read_events()
+        self.assertEqual(
+            [type(event) for event in events],
+            [mouse.MouseMovedX, mouse.LeftButtonClicked, mouse.MouseMovedX])
+
+    def test_motion_is_held_until_frame_is_complete(self):
+        stream = self.make_stream(
+            [make_raw_event("Relative", "REL_X", 4)],
+            [
+                make_raw_event("Relative", "REL_X", 2),
+                make_raw_event("Sync", "SYN_REPORT", 0),
+            ])
+        self.assertEqual(stream.read_events(), [])
+        [moved_x] = stream.read_events()
+        self.assertEqual(moved_x.delta, 6)
+
+
+class LoadSheddingTestGroup(unittest.TestCase):
+
+    def setUp(self):
+        self.stale = time.time() - 1.0
+        self.clicked = mock.Mock(name="clicked")
+        self.moved = mock.Mock(name="moved")
+        mouse.LeftButtonClicked.register_handler(self.clicked)
+        mouse.MouseMovedX.register_handler(self.moved)
+
+    def tearDown(self):
+        mouse.LeftButtonClicked.deregister_handler()
+        mouse.MouseMovedX.deregister_handler()
+
+    def run_consumer(self, *reads, parser=None, **kwargs):
+        device = FakeDevice(*reads)
+        consumer = base.UserInputEventConsumer(
+            device=device,
+            parser=parser or mouse.MouseInputEvent.from_raw_input_event,
+            **kwargs)
+        device.exhausted = consumer.stop
+        consumer.run()
+        return consumer
+
+    def test_stale_motion_is_dropped_and_buttons_are_kept(self):
+        consumer = self.run_consumer([
+            make_raw_event("Relative", "REL_X", 4, self.stale),
+            make_raw_event("Sync", "SYN_REPORT", 0, self.stale),
+            make_raw_event("Key", "BTN_LEFT", 1, self.stale),
+            make_raw_event("Sync", "SYN_REPORT", 0, self.stale),
+            make_raw_event("Relative", "REL_X", 2),
+            make_raw_event("Sync", "SYN_REPORT", 0),
+        ])
+        self.clicked.assert_called_once()
+        [(moved,), _] = self.moved.call_args
+        self.assertEqual(moved.delta, 2)
+        self.assertEqual(consumer.dropped_events, 1)
+
+    def test_stale_dpad_transitions_are_kept(self):
+        pressed = mock.Mock(name="pressed")
+        released = mock.Mock(name="released")
+        gamepad.DownDpadPressed.register_handler(pressed)
+        gamepad.DownDpadReleased.register_handler(released)
+        self.addCleanup(gamepad.DownDpadPressed.deregister_handler)
+        self.addCleanup(gamepad.DownDpadReleased.deregister_handler)
+        consumer = self.run_consumer([
+            make_raw_event("Absolute", "ABS_Y", 0, self.stale),
+            make_raw_event("Sync", "SYN_REPORT", 0, self.stale),
+            make_raw_event("Absolute", "ABS_Y", 127, self.stale),
+            make_raw_event("Sync", "SYN_REPORT", 0, self.stale),
+        ], parser=gamepad.GamepadInputEvent.from_raw_input_event)
+        pressed.assert_called_once()
+        released.assert_called_once()
+        self.assertEqual(consumer.dropped_events, 0)
+
+    def test_dropped_events_are_summarised_when_finished(self):
+        with self.assertLogs("INPUT", "WARNING") as logs:
+            self.run_consumer([
+                make_raw_event("Relative", "REL_X", 4, self.stale),
+                make_raw_event("Relative", "REL_X", 4, self.stale),
+                make_raw_event("Sync", "SYN_REPORT", 0, self.stale),
+            ])
+        [message] = logs.output
+        self.assertIn("Dropped 2 stale events", message)
+
+    def test_stale_events_are_rejected_without_load_shedding(self):
+        consumer = self.run_consumer([
+            make_raw_event("Relative", "REL_X", 4, self.stale),
+            make_raw_event("Key", "BTN_LEFT", 1, self.stale),
+            make_raw_event("Sync", "SYN_REPORT", 0, self.stale),
+        ], shed_load=False)
+        self.clicked.assert_not_called()
+        self.moved.assert_not_called()
+        self.assertEqual(consumer.dropped_events, 0)
@@ -0,0 +1,59 @@
+import unittest
+
+from daveshed.legobot import instrumentation
+
+
+class HistogramTestGroup(unittest.TestCase):
+
+    def setUp(self):
+        self.histogram = instrumentation.Histogram()
+
+    def test_empty_histogram_has_no_percentiles(self):
+        self.assertIsNone(self.histogram.percentile(50))
+        self.assertEqual(self.histogram.count, 0)
+
+    def test_small_values_are_exact(self):
+        for micros in range(1, 11):
+            self.histogram.record(micros / 1e6)
+        self.assertAlmostEqual(self.histogram.percentile(50), 5e-6)
+        self.assertAlmostEqual(self.histogram.percentile(100), 10e-6)
+
+    def test_percentiles_are_within_precision(self):
+        values = [0.001 * idx for idx in range(1, 1001)]
+        for value in values:
+            self.histogram.record(value)
+        self.assertEqual(self.histogram.count, 1000)
+        for percentile in (50, 90, 99):
+            expected = values[percentile * 10 - 1]
+            self.assertAlmostEqual(
+                self.histogram.percentile(percentile), expected,
+                delta=expected * 0.04)
+        self.assertAlmostEqual(self.histogram.max, 1.0)
+
+    def test_reset_forgets_values(self):
+        self.histogram.record(0.5)
+        self.histogram.reset()
+        self.assertEqual(self.histogram.count, 0)
+        self.assertIsNone(self.histogram.percentile(99))
+
+
+class InstrumentationTestGroup(unittest.TestCase):
+
+    def tearDown(self):
+        instrumentation.uninstall()
+
+    def test_nothing_is_recorded_until_installed(self):
+        with instrumentation.timed(instrumentation.PARSE):
+            pass
+        instrumentation.record(instrumentation.CONSUME, 0.1)
+        self.assertIsNone(instrumentation.active())
+
+    def test_stage_timings_are_recorded_once_installed(self):
+        instruments = instrumentation.install()
+        with instrumentation.timed(instrumentation.PARSE):
+            pass
+        instrumentation.record(instrumentation.CONSUME, 0.1)
+        snapshot = instruments.snapshot()
+        self.assertEqual(snapshot[instrumentation.PARSE]["count"], 1)
+        self.assertAlmostEqual(
+            snapshot[instrumentation.CONSUME]["p99"], 0.1, delta=0.004)
@@ -0,0 +1,162 @@
+import random
+import unittest
+
+from daveshed.legobot import kinematics
+from daveshed.legobot.grasper import LegoServoGrasper
+from daveshed.legobot.joint import FakeJointController
+from daveshed.legobot.robot import CartesianLegoRobot
+
+
+class ArmKinematicsTestGroup(unittest.TestCase):
+
+    def setUp(self):
+        self.arm = kinematics.ArmKinematics()
+        self.geometry = self.arm.geometry
+
+    def assertPositionsAlmostEqual(self, first, second, places=3):
+        for a, b in zip(first, second):
+            self.assertAlmostEqual(a, b, places=places)
+
+    def test_home_holds_the_forearm_forward(self):
+        self.assertPositionsAlmostEqual(
+            self.arm.forward((90.0, 90.0, 90.0)),
+            (self.geometry.forearm, 0.0,
+             self.geometry.base_height + self.geometry.upper_arm))
+
+    def test_forward_many_matches_forward(self):
+        angles = [(10.0, 20.0, 30.0), (170.0, 100.0, 5.0)]
+        for position, expected in zip(
+                self.arm.forward_many(angles).tolist(), angles):
+            self.assertPositionsAlmostEqual(
+                position, self.arm.forward(expected))
+
+    def test_jacobian_predicts_small_moves(self):
+        angles = (60.0, 70.0, 100.0)
+        step = (0.1, -0.2, 0.1)
+        moved = self.arm.forward(
+            tuple(angle + delta for angle, delta in zip(angles, step)))
+        predicted = self.arm.jacobian(angles) @ step
+        for position, start, delta in zip(
+                moved, self.arm.forward(angles), predicted.tolist()):
+            self.assertAlmostEqual(position - start, delta, places=2)
+
+    def test_inverse_reaches_reachable_targets(self):
+        rng = random.Random(0)
+        for _ in range(200):
+            target = self.arm.forward(
+                tuple(rng.uniform(0.0, 180.0) for _ in range(3)))
+            angles = self.arm.inverse(target)
+            self.assertTrue(self.geometry.within_limits(angles))
+            self.assertPositionsAlmostEqual(
+                self.arm.forward(angles), target, places=1)
+
+    def test_inverse_prefers_the_pose_nearest_home(self):
+        target = self.arm.forward((90.0, 90.0, 90.0))
+        self.assertPositionsAlmostEqual(
+            self.arm.inverse(target), (90.0, 90.0, 90.0))
+
+    def test_inverse_points_at_targets_beyond_reach(self):
+        reach = self.geometry.upper_arm + self.geometry.forearm
+        angles = self.arm.inverse((0.0, 500.0, self.geometry.base_height))
+        self.assertTrue(self.geometry.within_limits(angles))
+        self.assertPositionsAlmostEqual(
+            self.arm.forward(angles),
+            (0.0, reach, self.geometry.base_height), places=1)
+
+    def test_inverse_stays_within_joint_limits(self):
+        # below the floor behind the base cannot be reached in closed form
+        # within the limits so the numeric solver gets as close as it can
+        angles = self.arm.inverse((-50.0, 0.0, -100.0))
+        self.assertTrue(self.geometry.within_limits(angles))
+
+    def test_seed_keeps_the_arm_posed_the_same_way(self):
+        # the base turns through its limit as x crosses zero so the arm
+        # would have to turn right round to follow the target
+        previous = self.arm.inverse((20.0, 153.5, 132.4))
+        for step in range(80):
+            target = (20.0 - 0.5 * step, 153.5, 132.4)
+            angles = self.arm.inverse(target, seed=previous)
+            self.assertTrue(self.geometry.within_limits(angles))
+            for angle, last in zip(angles, previous):
+                self.assertLess(abs(angle - last), 1.0)
+            previous = angles
+        self.assertAlmostEqual(self.arm.forward(previous)[0], 0.0, places=1)
+
+    def test_solutions_are_cached_per_resolution(self):
+        target = self.arm.forward((45.0, 80.0, 120.0))
+        first = self.arm.inverse(target)
+        second = self.arm.inverse(
+            tuple(coordinate + 0.01 for coordinate in target))
+        self.assertEqual(first, second)
+        info = self.arm.cache_info()
+        self.assertEqual((info.hits, info.misses), (1, 1))
+        self.arm.cache_clear()
+        self.assertEqual(self.arm.cache_info().currsize, 0)
+
+
+class CartesianLegoRobotTestGroup(unittest.TestCase):
+
+    def setUp(self):
+        joints = [FakeJointController(90.0, idx) for idx in range(4)]
+        self.robot = CartesianLegoRobot(
+            joints=joints[:3], grasper=LegoServoGrasper(joints[3]))
+        self.robot.home().wait()
+        self.home = self.robot.position
+
+    def assertMovedBy(self, expected):
+        for position, start, delta in zip(
+                self.robot.position, self.home, expected):
+            self.assertAlmostEqual(position - start, delta, places=1)
+
+    def test_moves_along_each_axis(self):
+        self.robot.move_x(-10.0)
+        self.assertMovedBy((-10.0, 0.0, 0.0))
+        self.robot.move_y(5.0)
+        self.assertMovedBy((-10.0, 5.0, 0.0))
+        self.robot.move_z(-20.0)
+        self.assertMovedBy((-10.0, 5.0, -20.0))
+
+    def test_moves_in_several_axes_at_once(self):
+        self.robot.move(x=-10.0, y=10.0, z=10.0)
+        self.assertMovedBy((-10.0, 10.0, 10.0))
+
+    def walk(self, steps, x=0.0, y=0.0, z=0.0):
+        for _ in range(steps):
+            self.robot.move(x=x, y=y, z=z)
+
+    def test_moves_stop_at_the_edge_of_reach(self):
+        self.walk(100, x=10.0)
+        edge = self.robot.position
+        geometry = kinematics.ArmGeometry()
+        reach = geometry.upper_arm + geometry.forearm
+        self.assertAlmostEqual(edge[0], reach, places=1)
+        # the elbow turns quickly as it bends out of a straight arm
+        self.robot.move(x=-2.0)
+        self.assertAlmostEqual(self.robot.position[0], edge[0] - 2.0, 1)
+
+    def test_moves_across_the_base_limit_never_jump(self):
+        self.walk(40, x=-2.0, y=3.75, z=-0.25)
+        previous = self.robot.joint_angles
+        for _ in range(80):
+            self.robot.move(x=-0.5)
+            for angle, last in zip(self.robot.joint_angles, previous):
+                self.assertLess(abs(angle - last), 1.0)
+            previous = self.robot.joint_angles
+        self.assertAlmostEqual(self.robot.position[0], 0.0, places=1)
+
+    def test_moves_needing_large_joint_steps_are_rejected(self):
+        self.robot.MAX_JOINT_STEP_DEG = 1.0
+        self.robot.move(x=-20.0)
+        self.assertMovedBy((0.0, 0.0, 0.0))
+        self.robot.move(x=-1.0)
+        self.assertMovedBy((-1.0, 0.0, 0.0))
+
+    def test_homing_forgets_the_target(self):
+        self.robot.move(z=-20.0)
+        self.robot.home().wait()
+        self.robot.move(x=-10.0)
+        self.assertMovedBy((-10.0, 0.0, 0.0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,162 @@
+import logging
+import threading
+import unittest
+
+from daveshed.legobot import logs
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class RecordingHandler(logging.Handler):
+
+    def __init__(self):
+        super().__init__()
+        self.records = []
+        self.threads = []
+
+    def emit(self, record):
+        self.records.append(record)
+        self.threads.append(threading.current_thread())
+
+
+class RateLimiterTestGroup(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.limiter = logs.RateLimiter(rate=2.0, burst=3, clock=self.clock)
+
+    def test_burst_is_admitted_then_suppressed(self):
+        admitted = [self.limiter.admit("site")[0] for _ in range(5)]
+        self.assertEqual(admitted, [True, True, True, False, False])
+
+    def test_suppressed_count_is_reported_when_admitted_again(self):
+        for _ in range(5):
+            self.limiter.admit("site")
+        self.clock.now = 0.5
+        self.assertEqual(self.limiter.admit("site"), (True, 2))
+        self.assertEqual(self.limiter.admit("site"), (False, 0))
+
+    def test_call_sites_are_limited_independently(self):
+        for _ in range(3):
+            self.limiter.admit("site")
+        self.assertEqual(self.limiter.admit("site")[0], False)
+        self.assertEqual(self.limiter.admit("other site")[0], True)
+
+
+class SamplerTestGroup(unittest.TestCase):
+
+    def test_one_in_every_n_is_admitted(self):
+        sampler = logs.Sampler(3)
+        admitted = [sampler.admit("site") for _ in range(7)]
+        self.assertEqual(admitted, [
+            (True, 0), (False, 0), (False, 0), (True, 2), (False, 0),
+            (False, 0), (True, 2)])
+
+
+class HotPathLoggerTestGroup(unittest.TestCase):
+
+    def setUp(self):
+        self.handler = RecordingHandler()
+        self.logger = logging.getLogger("TEST_LOGS")
+        self.logger.addHandler(self.handler)
+        self.logger.setLevel(logging.INFO)
+        self.logger.propagate = False
+        self.hot_path_logger = logs.HotPathLogger(self.logger)
+
+    def tearDown(self):
+        self.logger.removeHandler(self.handler)
+        self.logger.propagate = True
+        self.logger.setLevel(logging.NOTSET)
+        logs._HOT_PATH_LIMITER = None
+
+    def test_records_are_not_limited_until_configured(self):
+        for idx in range(20):
+            self.hot_path_logger.info("Moving %r", idx)
+        self.assertEqual(len(self.handler.records), 20)
+
+    def test_records_below_the_level_are_not_made(self):
+        self.hot_path_logger.debug("Moving %r", 1)
+        self.assertEqual(self.handler.records, [])
+
+    def test_records_are_attributed_to_the_call_site(self):
+        self.hot_path_logger.info("Moving %r", 1)
+        [record] = self.handler.records
+        self.assertEqual(
+            record.funcName, "test_records_are_attributed_to_the_call_site")
+        self.assertEqual(record.pathname, __file__)
+
+    def test_call_sites_are_limited_once_configured(self):
+        clock = FakeClock()
+        logs._HOT_PATH_LIMITER = logs.RateLimiter(1.0, 2, clock)
+
+        def move(idx):
+            self.hot_path_logger.info("Moving %r", idx)
+
+        for idx in range(5):
+            move(idx)
+        clock.now = 1.0
+        move(5)
+        self.assertEqual(
+            [record.getMessage() for record in self.handler.records],
+            ["Moving 0", "Moving 1", "Moving 5 (3 similar suppressed)"])
+
+
+class ConfigureTestGroup(unittest.TestCase):
+
+    def setUp(self):
+        self.root = logging.getLogger()
+        self.saved_handlers = self.root.handlers[:]
+        self.saved_level = self.root.level
+        self.handler = RecordingHandler()
+        self.logger = logging.getLogger("TEST_LOGS")
+
+    def tearDown(self):
+        logs.shutdown()
+        for handler in self.saved_handlers:
+            self.root.addHandler(handler)
+        self.root.setLevel(self.saved_level)
+
+    def test_records_are_handled_by_a_background_thread(self):
+        logs.configure(handlers=[self.handler])
+        self.logger.warning("Warning %d", 1)
+        logs.shutdown()
+        [record] = self.handler.records
+        self.assertEqual(record.getMessage(), "Warning 1")
+        self.assertIsNot(self.handler.threads[0], threading.current_thread())
+
+    def test_call_sites_are_limited(self):
+        logs.configure(handlers=[self.handler], rate=1.0, burst=2)
+        for idx in range(5):
+            self.logger.info("Moving %r", idx)
+        logs.shutdown()
+        self.assertEqual(len(self.handler.records), 2)
+
+    def test_warnings_are_not_limited(self):
+        logs.configure(handlers=[self.handler], rate=1.0, burst=2)
+        for idx in range(5):
+            self.logger.warning("Warning %r", idx)
+        logs.shutdown()
+        self.assertEqual(len(self.handler.records), 5)
+
+    def test_hot_path_records_are_only_limited_once(self):
+        logs.configure(handlers=[self.handler], rate=1.0, burst=2)
+        hot_path_logger = logs.HotPathLogger(self.logger)
+        for idx in range(5):
+            hot_path_logger.info("Moving %r", idx)
+        logs.shutdown()
+        self.assertEqual(len(self.handler.records), 2)
+
+    def test_shutdown_stops_limiting(self):
+        logs.configure(handlers=[self.handler], rate=1.0, burst=2)
+        logs.shutdown()
+        self.assertIsNone(logs._HOT_PATH_LIMITER)
+        self.assertNotIn(
+            logs.DeferredQueueHandler,
+            [type(handler) for handler in self.root.handlers])
@@ -0,0 +1,152 @@
+import os
+import socket
+import tempfile
+import time
+import unittest
+import urllib.error
+import urllib.request
+from types import SimpleNamespace
+
+from daveshed.legobot import metrics
+from daveshed.legobot.application import make_metrics
+from daveshed.legobot.events import base
+from daveshed.legobot.events import mouse
+from daveshed.legobot.grasper import LegoServoGrasper
+from daveshed.legobot.joint import FakeJointController
+from daveshed.legobot.robot import RobotStub
+from daveshed.legobot.robot import ThreeDofLegoRobot
+
+
+class ExpositionTestGroup(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = metrics.Registry()
+
+    def test_counter_is_formatted(self):
+        counter = self.registry.counter("events_total", "Events read")
+        counter.inc()
+        counter.inc(2)
+        self.assertEqual(
+            metrics.exposition(self.registry),
+            "# HELP events_total Events read\n"
+            "# TYPE events_total counter\n"
+            "events_total 3\n")
+
+    def test_labelled_metrics_share_a_family(self):
+        for joint, angle in enumerate((10.0, 20.5)):
+            self.registry.gauge(
+                "angle", "Joint angle", labels={"joint": joint},
+                function=lambda angle=angle: angle)
+        self.assertEqual(
+            metrics.exposition(self.registry),
+            "# HELP angle Joint angle\n"
+            "# TYPE angle gauge\n"
+            'angle{joint="0"} 10.0\n'
+            'angle{joint="1"} 20.5\n')
+
+    def test_metrics_without_a_value_are_left_out(self):
+        self.registry.gauge("open", "Grasper open", function=lambda: None)
+        self.assertEqual(
+            metrics.exposition(self.registry),
+            "# HELP open Grasper open\n"
+            "# TYPE open gauge\n")
+
+    def test_booleans_are_formatted_as_numbers(self):
+        self.registry.gauge("open", "Grasper open", function=lambda: True)
+        self.assertIn("open 1\n", metrics.exposition(self.registry))
+
+    def test_label_values_are_escaped(self):
+        self.registry.gauge("value", "Value", labels={"name": 'a"b\\c'})
+        self.assertIn(
+            'value{name="a\\"b\\\\c"} 0\n', metrics.exposition(self.registry))
+
+    def test_duplicate_metrics_are_rejected(self):
+        self.registry.counter("events_total", "Events read")
+        with self.assertRaises(ValueError):
+            self.registry.counter("events_total", "Events read")
+        with self.assertRaises(ValueError):
+            self.registry.gauge(
+                "events_total", "Events read", labels={"device": "mouse"})
+
+
+class MetricsServerTestGroup(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = metrics.Registry()
+        self.registry.counter("events_total", "Events read").inc(5)
+
+    def test_metrics_are_served_over_tcp(self):
+        server = metrics.MetricsServer(
+            ("127.0.0.1", 0), registries=[self.registry]).start()
+        self.addCleanup(server.stop)
+        host, port = server.address
+        url = "http://%s:%d" % (host, port)
+        with urllib.request.urlopen(url + "/metrics") as response:
+            self.assertEqual(
+                response.headers["Content-Type"], metrics.CONTENT_TYPE)
+            self.assertIn(b"events_total 5\n", response.read())
+        with self.assertRaises(urllib.error.HTTPError):
+            urllib.request.urlopen(url + "/other")
+
+    def test_metrics_are_served_over_a_unix_socket(self):
+        path = os.path.join(tempfile.mkdtemp(), "metrics.sock")
+        server = metrics.MetricsServer(
+            path, registries=[self.registry]).start()
+        with socket.socket(socket.AF_UNIX) as client:
+            client.connect(path)
+            client.sendall(b"GET /metrics HTTP/1.0\r\n\r\n")
+            response = b""
+            while True:
+                data = client.recv(4096)
+                if not data:
+                    break
+                response += data
+        server.stop()
+        self.assertTrue(response.startswith(b"HTTP/1.0 200"))
+        self.assertIn(b"events_total 5\n", response)
+        self.assertFalse(os.path.exists(path))
+        os.rmdir(os.path.dirname(path))
+
+
+class ApplicationMetricsTestGroup(unittest.TestCase):
+
+    def make_stream(self, bus):
+        now = time.time()
+        frames = [[
+            SimpleNamespace(
+                ev_type="Relative", code="REL_X", state=5, timestamp=now),
+            SimpleNamespace(
+                ev_type="Sync", code="SYN_REPORT", state=0, timestamp=now),
+        ]]
+        device = SimpleNamespace(read=frames.pop)
+        return base.InputStream(
+            device, mouse.MouseInputEvent.from_raw_input_event, bus,
+            shed_load=False)
+
+    def test_pipeline_counts_are_exposed(self):
+        bus = base.EventBus()
+        bus.subscribe(mouse.MouseMovedX, lambda _: None)
+        stream = self.make_stream(bus)
+        registry = make_metrics(stream, bus, RobotStub())
+        stream.process()
+        text = metrics.exposition(registry)
+        self.assertIn("legobot_input_events_read_total 2\n", text)
+        self.assertIn("legobot_input_events_parsed_total 1\n", text)
+        self.assertIn("legobot_input_events_dropped_total 0\n", text)
+        self.assertIn("legobot_handler_calls_total 1\n", text)
+        self.assertNotIn("legobot_joint_angle_degrees{", text)
+        self.assertNotIn("\nlegobot_grasper_open ", text)
+
+    def test_robot_state_is_exposed(self):
+        joints = [FakeJointController(90.0, idx) for idx in range(4)]
+        robot = ThreeDofLegoRobot(
+            joints=joints[:3], grasper=LegoServoGrasper(joints[3]))
+        robot.home().wait()
+        bus = base.EventBus()
+        registry = make_metrics(self.make_stream(bus), bus, robot)
+        joints[1].angle = 45.0
+        robot.close_grasper()
+        text = metrics.exposition(registry)
+        self.assertIn('legobot_joint_angle_degrees{joint="0"} 90.0\n', text)
+        self.assertIn('legobot_joint_angle_degrees{joint="1"} 45.0\n', text)
+        self.assertIn("legobot_grasper_open 0\n", text)
@@ -0,0 +1,67 @@
+import unittest
+from unittest import mock
+
+from daveshed.legobot.joint import FakeJointController
+from daveshed.legobot.motion import MotionLoop
+from daveshed.legobot.robot import Robot, ThreeDofLegoRobot
+
+
+class MotionLoopTestGroup(unittest.TestCase):
+
+    def setUp(self):
+        self.robot = mock.Mock(name="Robot", spec_set=Robot)
+        self.motion_loop = MotionLoop(self.robot, frequency=50.0)
+
+    def test_movements_are_accumulated_until_next_tick(self):
+        self.motion_loop.move_x(1.0)
+        self.motion_loop.move_x(2.5)
+        self.motion_loop.move_z(-1.0)
+        self.robot.move.assert_not_called()
+        self.motion_loop.tick()
+        self.robot.move.assert_called_once_with(x=3.5, y=0.0, z=-1.0)
+
+    def test_setpoints_are_cleared_after_tick(self):
+        self.motion_loop.move_y(1.0)
+        self.motion_loop.tick()
+        self.motion_loop.tick()
+        self.robot.move.assert_called_once_with(x=0.0, y=1.0, z=0.0)
+
+    def test_velocity_moves_robot_every_tick(self):
+        self.motion_loop.set_velocity("Y", 10.0)
+        self.motion_loop.tick()
+        self.motion_loop.tick()
+        self.assertEqual(
+            self.robot.move.call_args_list,
+            [mock.call(x=0.0, y=10.0 * self.motion_loop.period, z=0.0)] * 2)
+
+    def test_home_discards_pending_movements(self):
+        self.motion_loop.move_x(1.0)
+        self.motion_loop.set_velocity("X", 1.0)
+        self.motion_loop.home()
+        self.motion_loop.tick()
+        self.robot.home.assert_called_once()
+        self.robot.move.assert_not_called()
+
+
+class RobotMoveTestGroup(unittest.TestCase):
+
+    def setUp(self):
+        self.joints = [
+            FakeJointController(90.0, idx) for idx in range(3)
+        ]
+        self.robot = ThreeDofLegoRobot(
+            joints=self.joints, grasper=mock.Mock(name="Grasper"))
+
+    def test_move_sets_all_joints_in_one_batch(self):
+        with mock.patch.object(
+                FakeJointController, "_set_angles",
+                wraps=FakeJointController._set_angles) as set_angles:
+            self.robot.move(x=1.0, y=-2.0, z=3.0)
+        set_angles.assert_called_once()
+        self.assertEqual(
+            [joint.angle for joint in self.joints], [91.0, 88.0, 93.0])
+
+    def test_move_ignores_axes_without_movement(self):
+        self.robot.move(y=5.0)
+        self.assertEqual(
+            [joint.angle for joint in self.joints], [90.0, 95.0, 90.0])
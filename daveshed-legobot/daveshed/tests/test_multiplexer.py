@@ -0,0 +1,77 @@
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from daveshed.legobot.events import base
+from daveshed.legobot.events import mouse
+from daveshed.legobot.events.multiplexer import InputMultiplexer
+
+from devices import PipeDevice
+
+
+class InputMultiplexerTestGroup(unittest.TestCase):
+
+    def setUp(self):
+        self.devices = [PipeDevice(), PipeDevice()]
+        self.buses = [base.EventBus(), base.EventBus()]
+        self.streams = [
+            base.InputStream(
+                device, mouse.MouseInputEvent.from_raw_input_event, bus,
+                shed_load=False)
+            for device, bus in zip(self.devices, self.buses)
+        ]
+        self.multiplexer = InputMultiplexer(streams=self.streams, daemon=True)
+        # raw events are stamped at the epoch so treat them as real time.
+        patcher = mock.patch.object(
+            base.UserInputEventBase, "is_real_time", True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        if not self.multiplexer.stop.is_set():
+            self.multiplexer.terminate()
+        for device in self.devices:
+            device.close()
+
+    def subscribe(self, bus, event_class):
+        called = threading.Event()
+        handler = mock.Mock(side_effect=lambda _: called.set())
+        bus.subscribe(event_class, handler)
+        return handler, called
+
+    def test_events_are_fanned_out_to_each_streams_bus(self):
+        clicked, click_seen = self.subscribe(
+            self.buses[0], mouse.LeftButtonClicked)
+        moved, move_seen = self.subscribe(self.buses[1], mouse.MouseMovedX)
+        self.multiplexer.start()
+        self.devices[1].emit((2, 0, 5), (0, 0, 0))
+        self.devices[0].emit((1, 272, 1), (0, 0, 0))
+        self.assertTrue(click_seen.wait(1.0))
+        self.assertTrue(move_seen.wait(1.0))
+        self.assertEqual(moved.call_args[0][0].delta, 5)
+        clicked.assert_called_once()
+
+    def test_terminate_does_not_wait_for_input(self):
+        self.multiplexer.start()
+        self.multiplexer.terminate()
+        self.assertFalse(self.multiplexer.is_alive())
+
+    def test_streams_without_a_file_descriptor_are_rejected(self):
+        stream = base.InputStream(
+            SimpleNamespace(), mouse.MouseInputEvent.from_raw_input_event)
+        with self.assertRaises(ValueError):
+            self.multiplexer.add_stream(stream)
+
+    def test_a_closed_device_is_removed(self):
+        moved, move_seen = self.subscribe(self.buses[1], mouse.MouseMovedX)
+        self.multiplexer.start()
+        self.devices[0].hang_up()
+        self.devices[1].emit((2, 0, 5), (0, 0, 0))
+        self.assertTrue(move_seen.wait(1.0))
+        deadline = time.monotonic() + 1.0
+        while len(self.multiplexer.streams) > 1 \
+                and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self.multiplexer.streams, [self.streams[1]])
@@ -0,0 +1,142 @@
+import os
+import signal
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+from daveshed.legobot import profiler
+
+
+def wait_in_profiled_function(started, release):
+    started.set()
+    release.wait()
+
+
+class SamplingProfilerTestGroup(unittest.TestCase):
+
+    def setUp(self):
+        started = threading.Event()
+        self.release = threading.Event()
+        self.thread = threading.Thread(
+            target=wait_in_profiled_function, args=(started, self.release),
+            name="Profiled")
+        self.thread.start()
+        started.wait()
+        # let the thread block on the release event
+        time.sleep(0.05)
+        self.addCleanup(self.thread.join)
+        self.addCleanup(self.release.set)
+        self.profiler = profiler.SamplingProfiler([self.thread], rate=1000.0)
+        self.addCleanup(self.profiler.stop)
+
+    def test_stacks_are_collapsed_from_the_thread_inwards(self):
+        for _ in range(3):
+            self.profiler.sample()
+        [line] = self.profiler.collapsed().splitlines()
+        stack, count = line.rsplit(" ", 1)
+        frames = stack.split(";")
+        self.assertEqual(frames[0], "Profiled")
+        self.assertIn(__name__ + ".wait_in_profiled_function", frames)
+        self.assertEqual(frames[-1], "threading.Condition.wait")
+        self.assertEqual(count, "3")
+
+    def test_threads_that_are_not_running_are_skipped(self):
+        idle = threading.Thread(target=lambda: None, name="Idle")
+        sampler = profiler.SamplingProfiler([idle])
+        sampler.sample()
+        self.assertEqual(sampler.collapsed(), "")
+        self.assertEqual(sampler.samples, 1)
+
+    def test_samples_are_taken_in_the_background(self):
+        self.profiler.start()
+        self.assertTrue(self.profiler.running)
+        deadline = time.monotonic() + 5.0
+        while self.profiler.samples < 5 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.profiler.stop()
+        self.assertFalse(self.profiler.running)
+        self.assertGreaterEqual(self.profiler.samples, 5)
+
+    def test_concurrent_starts_and_stops_share_one_sampler(self):
+        make_thread = threading.Thread
+
+        def race(action):
+            barrier = threading.Barrier(8)
+
+            def run():
+                barrier.wait()
+                action()
+
+            threads = [make_thread(target=run) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        def slow_thread(*args, **kwargs):
+            # widen the gap between checking for a sampler and setting it
+            time.sleep(0.01)
+            return make_thread(*args, **kwargs)
+
+        with mock.patch.object(threading, "Thread", slow_thread):
+            race(self.profiler.start)
+        self.assertEqual(
+            [thread.name for thread in threading.enumerate()].count(
+                "SamplingProfiler"), 1)
+        race(self.profiler.stop)
+        self.assertFalse(self.profiler.running)
+        self.assertNotIn(
+            "SamplingProfiler",
+            [thread.name for thread in threading.enumerate()])
+
+    def test_reset_forgets_samples(self):
+        self.profiler.sample()
+        self.profiler.reset()
+        self.assertEqual(self.profiler.collapsed(), "")
+        self.assertEqual(self.profiler.samples, 0)
+
+    def wait_until(self, condition):
+        deadline = time.monotonic() + 5.0
+        while not condition() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertTrue(condition())
+
+    def wait_for_dump(self, path):
+        self.wait_until(
+            lambda: os.path.exists(path) and os.path.getsize(path) > 0)
+
+    def install_signal_handler(self):
+        path = os.path.join(tempfile.mkdtemp(), "profile.txt")
+        self.addCleanup(os.rmdir, os.path.dirname(path))
+        previous = signal.getsignal(signal.SIGUSR1)
+        self.addCleanup(signal.signal, signal.SIGUSR1, previous)
+        self.profiler.install_signal_handler(path)
+        return path
+
+    def test_signal_toggles_sampling_and_writes_samples(self):
+        path = self.install_signal_handler()
+        os.kill(os.getpid(), signal.SIGUSR1)
+        self.wait_until(lambda: self.profiler.running)
+        self.profiler.sample()
+        os.kill(os.getpid(), signal.SIGUSR1)
+        self.wait_for_dump(path)
+        self.assertFalse(self.profiler.running)
+        with open(path) as stream:
+            self.assertIn("wait_in_profiled_function", stream.read())
+        os.remove(path)
+
+    def test_signal_does_not_wait_on_the_sampler(self):
+        path = self.install_signal_handler()
+        self.profiler.sample()
+        self.profiler.start()
+        # pylint: disable=protected-access
+        with self.profiler._lock:
+            # the sampler blocks on the lock so stopping it now would never
+            # return if it were done by the handler
+            os.kill(os.getpid(), signal.SIGUSR1)
+            time.sleep(0.05)
+        self.wait_for_dump(path)
+        self.assertFalse(self.profiler.running)
+        os.remove(path)
@@ -0,0 +1,100 @@
+import io
+import time
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from daveshed.legobot.events import base
+from daveshed.legobot.events import mouse
+from daveshed.legobot.events import replay
+
+FRAMES = [
+    [
+        ("Relative", "REL_X", 4),
+        ("Relative", "REL_Y", -3),
+        ("Sync", "SYN_REPORT", 0),
+    ],
+    [("Key", "BTN_LEFT", 1), ("Sync", "SYN_REPORT", 0)],
+]
+
+
+class FakeDevice:
+
+    def __init__(self, frames, start=1000.0, interval=0.05):
+        self._reads = [
+            [
+                SimpleNamespace(
+                    ev_type=ev_type, code=code, state=state,
+                    timestamp=start + idx * interval)
+                for ev_type, code, state in frame
+            ]
+            for idx, frame in enumerate(frames)
+        ]
+
+    def read(self):
+        return self._reads.pop(0)
+
+
+class UnclosableBytesIO(io.BytesIO):
+
+    def close(self):
+        pass
+
+
+class ReplayTestGroup(unittest.TestCase):
+
+    def record(self, frames=FRAMES):
+        stream = UnclosableBytesIO()
+        recorder = replay.EventRecorder(FakeDevice(frames), stream)
+        for _ in frames:
+            recorder.read()
+        return stream.getvalue()
+
+    def replay(self, data, speed=replay.AS_FAST_AS_POSSIBLE):
+        return replay.ReplayDevice(io.BytesIO(data), speed)
+
+    def test_events_are_replayed_a_frame_at_a_time(self):
+        device = self.replay(self.record())
+        for frame in FRAMES:
+            self.assertEqual(
+                [(event.ev_type, event.code, event.state)
+                 for event in device.read()],
+                frame)
+        with self.assertRaises(EOFError):
+            device.read()
+
+    def test_strings_are_recorded_once(self):
+        once = self.record(FRAMES[:1])
+        twice = self.record(FRAMES[:1] * 2)
+        event_size = 1 + replay._EVENT_FIELDS.size
+        self.assertEqual(len(twice) - len(once), 3 * event_size)
+
+    def test_replay_keeps_recorded_intervals(self):
+        device = self.replay(self.record(), speed=2.0)
+        [first, *_] = device.read()
+        [second, _] = device.read()
+        self.assertAlmostEqual(
+            second.timestamp - first.timestamp, 0.025, places=6)
+        self.assertGreaterEqual(time.time(), second.timestamp)
+
+    def test_replayed_events_are_real_time(self):
+        device = self.replay(self.record())
+        parse = mouse.MouseInputEvent.from_raw_input_event
+        [moved_x, moved_y, _] = [parse(event) for event in device.read()]
+        self.assertTrue(moved_x.is_real_time)
+        self.assertEqual(moved_y.delta, -3)
+
+    def test_consumer_stops_at_end_of_recording(self):
+        clicked = mock.Mock(name="clicked")
+        bus = base.EventBus()
+        bus.subscribe(mouse.LeftButtonClicked, clicked)
+        consumer = base.UserInputEventConsumer(
+            device=self.replay(self.record()),
+            parser=mouse.MouseInputEvent.from_raw_input_event,
+            bus=bus)
+        consumer.run()
+        clicked.assert_called_once()
+
+    def test_other_files_are_rejected(self):
+        with self.assertRaises(ValueError):
+            self.replay(b"not a recording")
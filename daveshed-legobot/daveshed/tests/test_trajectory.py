@@ -0,0 +1,121 @@
+import threading
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from daveshed.legobot import trajectory
+from daveshed.legobot.joint import FakeJointController
+
+
+class PlanMoveTestGroup(unittest.TestCase):
+
+    def check_limits(self, samples, start, max_velocity, max_acceleration):
+        period = trajectory.PERIOD_SEC
+        positions = np.vstack([start, samples])
+        velocity = np.diff(positions, axis=0) / period
+        acceleration = np.diff(velocity, axis=0) / period
+        # finite differences of the sampled profile overshoot the continuous
+        # limits by a little at the phase boundaries.
+        self.assertLessEqual(np.abs(velocity).max(), max_velocity * 1.05)
+        self.assertLessEqual(
+            np.abs(acceleration).max(), max_acceleration * 1.5)
+
+    def test_all_joints_finish_on_target_together(self):
+        for profile in (trajectory.TRAPEZOIDAL, trajectory.S_CURVE):
+            samples = trajectory.plan_move(
+                [90.0, 90.0, 60.0], [180.0, 45.0, 60.0], profile=profile)
+            self.assertEqual(samples.shape[1], 3)
+            np.testing.assert_allclose(samples[-1], [180.0, 45.0, 60.0])
+            np.testing.assert_allclose(samples[:, 2], 60.0)
+            # joints are synchronised so progress is proportional
+            np.testing.assert_allclose(
+                (samples[:, 0] - 90.0) / 90.0, (90.0 - samples[:, 1]) / 45.0)
+
+    def test_trapezoidal_move_respects_limits(self):
+        samples = trajectory.plan_move(
+            [0.0], [90.0], max_velocity=50.0, max_acceleration=250.0)
+        self.check_limits(samples, [0.0], 50.0, 250.0)
+        # 0.2s to accelerate, 1.6s cruising and 0.2s to decelerate
+        self.assertEqual(len(samples), round(2.0 / trajectory.PERIOD_SEC))
+
+    def test_short_trapezoidal_move_is_triangular(self):
+        samples = trajectory.plan_move(
+            [0.0], [1.0], max_velocity=50.0, max_acceleration=250.0)
+        self.check_limits(samples, [0.0], 50.0, 250.0)
+        self.assertAlmostEqual(samples[-1, 0], 1.0)
+
+    def test_s_curve_move_respects_limits(self):
+        samples = trajectory.plan_move(
+            [0.0], [90.0], max_velocity=50.0, max_acceleration=250.0,
+            profile=trajectory.S_CURVE)
+        self.check_limits(samples, [0.0], 50.0, 250.0)
+
+    def test_no_movement_has_no_samples(self):
+        samples = trajectory.plan_move([90.0, 45.0], [90.0, 45.0])
+        self.assertEqual(samples.shape, (0, 2))
+
+
+class TrajectoryTestGroup(unittest.TestCase):
+
+    def setUp(self):
+        self.joints = [
+            FakeJointController(90.0, idx) for idx in range(3)
+        ]
+
+    def test_setpoints_only_include_joints_that_move(self):
+        samples = trajectory.plan_move(
+            [joint.angle for joint in self.joints], [90.0, 100.0, 90.0])
+        setpoints = list(
+            trajectory.trajectory_setpoints(self.joints, samples))
+        self.assertEqual(len(setpoints), len(samples))
+        for setpoint in setpoints:
+            self.assertEqual(list(setpoint), [self.joints[1]])
+        self.assertEqual(setpoints[-1], {self.joints[1]: 100.0})
+
+    def test_joints_are_prepared_with_their_planned_angles(self):
+        samples = trajectory.plan_move(
+            [joint.angle for joint in self.joints], [90.0, 100.0, 80.0])
+        for joint in self.joints:
+            joint.prepare = mock.Mock(name="prepare")
+        next(trajectory.trajectory_setpoints(self.joints, samples))
+        for joint, angles in zip(self.joints, samples.T):
+            [(prepared,), _] = joint.prepare.call_args
+            np.testing.assert_array_equal(prepared, angles)
+
+    def test_joints_are_released_when_a_cancelled_trajectory_finishes(self):
+        samples = trajectory.plan_move(
+            [joint.angle for joint in self.joints], [90.0, 100.0, 80.0])
+        for joint in self.joints:
+            joint.release = mock.Mock(name="release")
+        handle = trajectory.run_trajectory(
+            trajectory.trajectory_setpoints(self.joints, samples), period=1.0)
+        handle.cancel()
+        self.assertTrue(handle.wait(timeout=1.0))
+        for joint in self.joints:
+            joint.release.assert_called_once_with()
+
+    def test_trajectory_runs_to_completion(self):
+        self.joints[1].angle = 80.0
+        samples = trajectory.plan_move(
+            [joint.angle for joint in self.joints], [90.0, 90.0, 100.0])
+        handle = trajectory.run_trajectory(
+            trajectory.trajectory_setpoints(self.joints, samples), period=0.0)
+        self.assertTrue(handle.wait(timeout=1.0))
+        self.assertEqual(
+            [joint.angle for joint in self.joints], [90.0, 90.0, 100.0])
+
+    def test_cancelled_trajectory_stops_early(self):
+        started = threading.Event()
+
+        def setpoints():
+            for angle in range(100):
+                started.set()
+                yield {self.joints[0]: float(angle)}
+
+        handle = trajectory.run_trajectory(setpoints(), period=0.01)
+        started.wait(timeout=1.0)
+        handle.cancel()
+        self.assertTrue(handle.wait(timeout=1.0))
+        self.assertTrue(handle.cancelled)
+        self.assertLess(self.joints[0].angle, 99.0)
@@ -29,6 +29,7 @@ setuptools.setup(
     install_requires=[
         # FIXME: requires inputs but this should be abstracted
         'inputs',
+        'numpy',
     ],
 
     packages=setuptools.find_namespace_packages(include=['daveshed.*']),
@@ -1,9 +1,10 @@
 import logging
 
+from daveshed.legobot import logs
 from daveshed.legobot.application import Application
 from daveshed.legobot.factory import MouseLegoRobotFactory
 
-logging.basicConfig(level=logging.INFO)
+logs.configure(level=logging.INFO)
 
 factory = MouseLegoRobotFactory()
 application = Application(factory)
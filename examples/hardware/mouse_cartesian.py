@@ -0,0 +1,11 @@
+import logging
+
+from daveshed.legobot import logs
+from daveshed.legobot.application import Application
+from daveshed.legobot.factory import MouseCartesianLegoRobotFactory
+
+logs.configure(level=logging.INFO)
+
+factory = MouseCartesianLegoRobotFactory()
+application = Application(factory)
+application.start()
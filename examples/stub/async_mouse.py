@@ -0,0 +1,11 @@
+import asyncio
+import logging
+
+from daveshed.legobot import logs
+from daveshed.legobot.async_application import AsyncApplication
+from daveshed.legobot.factory import MouseRobotStubFactory
+
+logs.configure(level=logging.INFO)
+
+factory = MouseRobotStubFactory()
+asyncio.run(AsyncApplication(factory).run())
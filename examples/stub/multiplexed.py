@@ -0,0 +1,11 @@
+import logging
+
+from daveshed.legobot import logs
+from daveshed.legobot.application import MultiplexedApplication
+from daveshed.legobot.factory import GamepadRobotStubFactory
+from daveshed.legobot.factory import TrackpadRobotStubFactory
+
+logs.configure(level=logging.INFO)
+
+factories = [GamepadRobotStubFactory(), TrackpadRobotStubFactory()]
+application = MultiplexedApplication(factories).start()